@@ -4,6 +4,8 @@ Creates and configures Flask application instances.
 """
 import os
 import logging
+from datetime import datetime
+import click
 from logging.handlers import RotatingFileHandler
 from flask import Flask
 from app.config import get_config
@@ -52,6 +54,10 @@ def create_app(config_name=None):
     backup_dir = app.config.get('BACKUP_DIR', 'backups')
     os.makedirs(backup_dir, exist_ok=True)
     
+    # Ensure job artifact folder exists
+    artifact_dir = app.config.get('JOB_ARTIFACT_DIR', 'exports')
+    os.makedirs(artifact_dir, exist_ok=True)
+    
     # Initialize extensions
     init_extensions(app)
     
@@ -62,6 +68,11 @@ def create_app(config_name=None):
     from app.middleware.request_logger import setup_request_logging
     setup_request_logging(app)
     
+    # Set up Prometheus metrics (uses the request logger's query statistics)
+    if app.config.get('METRICS_ENABLED', True):
+        from app.middleware.metrics import setup_metrics
+        setup_metrics(app)
+    
     # Register error handlers
     register_error_handlers(app)
     
@@ -148,7 +159,7 @@ def register_blueprints(app):
     # Import blueprints
     from app.blueprints import (
         main_bp, products_bp, suppliers_bp, movements_bp,
-        item_groups_bp, customers_bp, sales_orders_bp, pricing_bp
+        item_groups_bp, customers_bp, sales_orders_bp, pricing_bp, jobs_bp
     )
     
     # Register blueprints
@@ -160,6 +171,7 @@ def register_blueprints(app):
     app.register_blueprint(customers_bp, url_prefix='/customers')
     app.register_blueprint(sales_orders_bp, url_prefix='/orders')
     app.register_blueprint(pricing_bp, url_prefix='/pricing')
+    app.register_blueprint(jobs_bp, url_prefix='/jobs')
     
     # Import other blueprints (to be created in subsequent tasks)
     # from app.blueprints.reports import reports_bp
@@ -186,6 +198,63 @@ def register_commands(app):
         app.logger.info('Database initialized')
         print('Database initialized successfully')
     
+    @app.cli.command('close-day')
+    @click.option('--date', 'fecha', default=None, help='Day to close (YYYY-MM-DD), default today.')
+    def close_day(fecha):
+        """Close a day and store stock snapshots."""
+        from app.services import StockSnapshotService
+        
+        day = datetime.strptime(fecha, '%Y-%m-%d').date() if fecha else datetime.now().date()
+        cierre = StockSnapshotService().close_day(day)
+        print(f'Day {day.isoformat()} closed: {cierre.productos} snapshots')
+    
+    @app.cli.command('rebuild-snapshots')
+    @click.option('--start', default=None, help='First day (YYYY-MM-DD), default first movement.')
+    @click.option('--end', default=None, help='Last day (YYYY-MM-DD), default yesterday.')
+    def rebuild_snapshots(start, end):
+        """Rebuild daily stock snapshots from movements."""
+        from app.services import StockSnapshotService
+        
+        start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end_date = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+        result = StockSnapshotService().rebuild(start_date, end_date)
+        print(f"Snapshots rebuilt: {result['days']} days, {result['snapshots']} rows")
+    
+    @app.cli.command('backfill-code-sequences')
+    def backfill_code_sequences():
+        """Seed product code counters from the existing codes."""
+        from app.utils.code_generator import CodeGenerator
+        
+        count = CodeGenerator.backfill_sequences()
+        print(f'Code sequences backfilled: {count} counters updated')
+    
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index():
+        """Refill the product full-text search index."""
+        from app.repositories import ProductRepository
+        
+        count = ProductRepository().rebuild_search_index()
+        print(f'Search index rebuilt: {count} products')
+    
+    @app.cli.command('run-jobs')
+    @click.option('--interval', default=2.0, help='Seconds between polls of an empty queue.')
+    @click.option('--once', is_flag=True, help='Exit when the queue is empty.')
+    def run_jobs(interval, once):
+        """Run queued background jobs (use with JOB_EXECUTOR=process)."""
+        from app.services import JobService
+        
+        count = JobService().run_worker(interval=interval, once=once)
+        print(f'Jobs run: {count}')
+    
+    @app.cli.command('purge-jobs')
+    @click.option('--days', default=None, type=int, help='Age in days, default JOB_RETENTION_DAYS.')
+    def purge_jobs(days):
+        """Delete finished background jobs and their files."""
+        from app.services import JobService
+        
+        count = JobService().purge_jobs(days)
+        print(f'Jobs purged: {count}')
+    
     @app.cli.command()
     def validate_config():
         """Validate application configuration."""
@@ -89,7 +89,7 @@ def edit(group_id):
                 return redirect(url_for('item_groups.index'))
             
             # Get all groups except current and its children (to prevent circular references)
-            all_groups = [g for g in item_group_service.get_all_groups() if g.id != group_id]
+            all_groups = item_group_service.get_parent_choices(group_id)
             return render_template('item_groups_form.html', group=group, all_groups=all_groups)
         
         except Exception as e:
@@ -119,13 +119,13 @@ def edit(group_id):
     except ValidationError as e:
         flash(f'Error de validación: {e.message}', 'error')
         group = item_group_service.get_item_group(group_id)
-        all_groups = [g for g in item_group_service.get_all_groups() if g.id != group_id]
+        all_groups = item_group_service.get_parent_choices(group_id)
         return render_template('item_groups_form.html', group=group, all_groups=all_groups, form_data=request.form)
     
     except (BusinessLogicError, DatabaseError) as e:
         flash(f'Error: {e.message}', 'error')
         group = item_group_service.get_item_group(group_id)
-        all_groups = [g for g in item_group_service.get_all_groups() if g.id != group_id]
+        all_groups = item_group_service.get_parent_choices(group_id)
         return render_template('item_groups_form.html', group=group, all_groups=all_groups, form_data=request.form)
 
 
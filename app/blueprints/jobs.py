@@ -0,0 +1,60 @@
+"""
+Jobs blueprint - Status polling and downloads for background jobs.
+"""
+import os
+
+from flask import Blueprint, jsonify, url_for, send_file, abort
+from flask_login import login_required, current_user
+
+from app.services import JobService
+from app.utils.exceptions import NotFoundError
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+def job_status(job):
+    """
+    Build the status payload of a job.
+
+    Args:
+        job: Background job
+
+    Returns:
+        Dictionary with the job state and its status/download URLs
+    """
+    data = job.to_dict()
+    data['status_url'] = url_for('jobs.status', job_id=job.id)
+    data['download_url'] = url_for('jobs.download', job_id=job.id) if job.has_artifact else None
+    return data
+
+
+@jobs_bp.route('/<int:job_id>')
+@login_required
+def status(job_id):
+    """Get job status and progress as JSON."""
+    try:
+        job = JobService().get_job(job_id, current_user)
+        return jsonify(job_status(job))
+
+    except NotFoundError as e:
+        return jsonify({'error': e.message}), 404
+
+
+@jobs_bp.route('/<int:job_id>/download')
+@login_required
+def download(job_id):
+    """Download the file produced by a finished job."""
+    try:
+        job = JobService().get_job(job_id, current_user)
+    except NotFoundError:
+        abort(404)
+
+    if not job.has_artifact or not os.path.exists(job.artifact_path):
+        abort(404)
+
+    return send_file(
+        job.artifact_path,
+        mimetype=job.artifact_mimetype,
+        as_attachment=True,
+        download_name=job.artifact_name
+    )
@@ -2,9 +2,8 @@
 Main blueprint for basic routes.
 """
 
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
 from flask_login import login_required, current_user, login_user, logout_user
-import pandas as pd
 from app.models import User
 
 main_bp = Blueprint('main', __name__)
@@ -71,7 +70,7 @@ def dashboard():
     
     try:
         dashboard_service = DashboardService()
-        metrics = dashboard_service.get_dashboard_metrics()
+        metrics = dashboard_service.get_dashboard_metrics(refresh=bool(request.args.get('refresh')))
         sales_chart = dashboard_service.get_sales_chart_data(days=30)
         top_products = dashboard_service.get_top_products(limit=5)
         
@@ -87,31 +86,75 @@ def dashboard():
 
 
 
+@main_bp.route('/buscar', methods=['GET', 'POST'])
+@login_required
+def buscar():
+    """Search products by description or code, optionally within a rubro."""
+    from app.services import ProductService
+    
+    if request.method == 'GET':
+        return render_template('buscar.html')
+    
+    query = request.form.get('query', '').strip()
+    rubro = request.form.get('rubro', '').strip().upper()
+    criterio = request.form.get('criterio', 'descripcion')
+    
+    try:
+        filters = {'search_by': 'codigo' if criterio == 'codigo' else 'descripcion'}
+        if rubro:
+            filters['code_prefix'] = rubro
+        
+        result = ProductService().search_products(query=query, filters=filters, page=1, per_page=100)
+        productos = result.items
+    except Exception as e:
+        flash(f'Error al buscar productos: {str(e)}', 'error')
+        productos = []
+    
+    return render_template('buscar.html', productos=productos, query=query, rubro=rubro, criterio=criterio)
+
+
 @main_bp.route('/import', methods=['GET', 'POST'])
 @login_required
 def import_inventory():
-    """Import inventory from Excel/CSV file."""
+    """Import inventory from Excel/CSV file in a background job."""
+    from app.services import JobService
+    from app.models import BackgroundJob
+    from app.blueprints.jobs import job_status
+    from app.utils.exceptions import NotFoundError
+    
     if request.method == 'GET':
-        return render_template('import_inventory.html')
+        job = None
+        results = None
+        job_id = request.args.get('job', type=int)
+        
+        if job_id:
+            try:
+                job = JobService().get_job(job_id, current_user)
+            except NotFoundError as e:
+                flash(e.message, 'error')
+                return redirect(url_for('main.import_inventory'))
+            
+            if job.status == BackgroundJob.STATUS_COMPLETED:
+                results = job.result
+                flash(f'Importación completada: {results["created"]} creados, {results["updated"]} actualizados', 'success')
+                if results['errors']:
+                    flash(f'Se encontraron {len(results["errors"])} errores durante la importación', 'warning')
+            elif job.status == BackgroundJob.STATUS_FAILED:
+                flash(f'Error al importar archivo: {job.error_message}', 'error')
+        
+        return render_template('import_inventory.html', job=job, results=results)
     
     try:
-        from app.services import ImportService
-        
         if 'file' not in request.files:
             flash('No se seleccionó ningún archivo', 'error')
             return redirect(request.url)
         
-        file = request.files['file']
+        job = JobService().submit_import(request.files['file'], current_user.id)
         
-        import_service = ImportService()
-        results = import_service.import_from_file(file, current_user.id)
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify(job_status(job)), 202
         
-        flash(f'Importación completada: {results["created"]} creados, {results["updated"]} actualizados', 'success')
-        
-        if results['errors']:
-            flash(f'Se encontraron {len(results["errors"])} errores durante la importación', 'warning')
-        
-        return render_template('import_inventory.html', results=results)
+        return redirect(url_for('main.import_inventory', job=job.id))
         
     except Exception as e:
         flash(f'Error al importar archivo: {str(e)}', 'error')
@@ -123,7 +166,7 @@ def import_inventory():
 def inventory_report():
     """Display inventory report in Art 177 format."""
     from datetime import datetime, timedelta
-    from app.services import ImportService
+    from app.services import InventoryReportService
     
     try:
         # Get date range from query params or default to current month
@@ -135,8 +178,8 @@ def inventory_report():
         if request.args.get('end_date'):
             end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d')
         
-        import_service = ImportService()
-        df = import_service.export_inventory_report(start_date, end_date)
+        report_service = InventoryReportService()
+        df = report_service.build_report(start_date, end_date)
         
         # Convert to list of dicts for template
         report_data = df.to_dict('records')
@@ -163,11 +206,11 @@ def inventory_report():
 @main_bp.route('/inventory-report/export')
 @login_required
 def export_inventory_report():
-    """Export inventory report to Excel."""
+    """Export inventory report to Excel (default) or CSV (?format=csv)."""
     from datetime import datetime
-    from app.services import ImportService
-    from flask import send_file
-    import io
+    from app.services import InventoryReportService
+    from flask import send_file, Response, stream_with_context
+    import tempfile
     
     try:
         # Get date range
@@ -179,39 +222,60 @@ def export_inventory_report():
         if request.args.get('end_date'):
             end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d')
         
-        import_service = ImportService()
-        df = import_service.export_inventory_report(start_date, end_date)
-        
-        # Create Excel file in memory
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            # Add header rows
-            header_df = pd.DataFrame([
-                ['EMPRESA: INVERSIONES FERRE-EXITO, C.A', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', ''],
-                ['R.I.F. J31764195-7', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', ''],
-                ['DIRECCION: Calle Bolívar. Palo Negro, Municipio Libertador. Estado Aragua', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', ''],
-                ['TELEFONO: 0412-7434522', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', ''],
-                ['', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', ''],
-                ['Relacion de movimiento de entradas y salidas de los inventarios', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', ''],
-                ['De acuerdo al Reglamento de la ley de I.S.L.R artículo 177.', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', ''],
-                [f'Fecha Desde: {start_date.strftime("%Y-%m-%d")}', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', ''],
-                [f'Fecha Hasta: {end_date.strftime("%Y-%m-%d")}', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', '', ''],
-            ])
-            
-            header_df.to_excel(writer, sheet_name='Inventario', index=False, header=False)
-            df.to_excel(writer, sheet_name='Inventario', startrow=9, index=False)
+        report_service = InventoryReportService()
+        filename = f'inventario_diario_{start_date.strftime("%Y-%m-%d")}_{end_date.strftime("%Y-%m-%d")}'
         
-        output.seek(0)
+        if request.args.get('format') == 'csv':
+            # Stream CSV chunks straight from the database cursor
+            return Response(
+                stream_with_context(report_service.iter_csv(start_date, end_date)),
+                mimetype='text/csv; charset=utf-8',
+                headers={'Content-Disposition': f'attachment; filename={filename}.csv'}
+            )
         
-        filename = f'inventario_diario_{start_date.strftime("%Y-%m-%d")}_{end_date.strftime("%Y-%m-%d")}.xlsx'
+        # Spool the workbook to a temp file (removed when the response is closed)
+        output = tempfile.TemporaryFile()
+        try:
+            report_service.write_xlsx(start_date, end_date, output)
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
         
         return send_file(
             output,
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
             as_attachment=True,
-            download_name=filename
+            download_name=f'{filename}.xlsx'
         )
         
     except Exception as e:
         flash(f'Error al exportar reporte: {str(e)}', 'error')
         return redirect(url_for('main.inventory_report'))
+
+
+@main_bp.route('/inventory-report/export-job', methods=['POST'])
+@login_required
+def export_inventory_report_job():
+    """Queue an Excel export of the inventory report as a background job."""
+    from datetime import datetime
+    from app.services import JobService
+    from app.blueprints.jobs import job_status
+    from app.utils.exceptions import ApplicationError
+    
+    try:
+        end_date = datetime.now()
+        start_date = datetime(end_date.year, end_date.month, 1)
+        
+        if request.values.get('start_date'):
+            start_date = datetime.strptime(request.values.get('start_date'), '%Y-%m-%d')
+        if request.values.get('end_date'):
+            end_date = datetime.strptime(request.values.get('end_date'), '%Y-%m-%d')
+        
+        job = JobService().submit_inventory_report(start_date.date(), end_date.date(), current_user.id)
+        return jsonify(job_status(job)), 202
+        
+    except ValueError:
+        return jsonify({'error': 'Formato de fecha inválido, use AAAA-MM-DD'}), 400
+    except ApplicationError as e:
+        return jsonify({'error': e.message}), e.status_code
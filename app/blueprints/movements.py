@@ -1,11 +1,11 @@
 """
 Movements blueprint - Routes for inventory movement management.
 """
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
 from flask_login import login_required, current_user
 from datetime import datetime, date
 
-from app.services import MovementService, ProductService
+from app.services import MovementService, ProductService, StockSnapshotService
 from app.utils.exceptions import ValidationError, NotFoundError, BusinessLogicError, DatabaseError
 
 movements_bp = Blueprint('movements', __name__)
@@ -18,7 +18,7 @@ def index():
     try:
         # Get query parameters
         fecha_str = request.args.get('fecha', date.today().isoformat())
-        page = request.args.get('page', 1, type=int)
+        cursor = request.args.get('cursor') or None
         per_page = request.args.get('per_page', 50, type=int)
         
         # Parse date
@@ -29,7 +29,9 @@ def index():
         
         # Get movements
         movement_service = MovementService()
-        result = movement_service.get_movements_by_date(fecha=fecha, page=page, per_page=per_page)
+        result = movement_service.get_movements_by_date(
+            fecha=fecha, per_page=per_page, cursor=cursor, keyset=True
+        )
         
         return render_template('movimientos.html',
                              movimientos=result.items,
@@ -95,6 +97,58 @@ def create():
         return render_template('movimientos_form.html', movimiento=None, productos=productos, form_data=request.form)
 
 
+@movements_bp.route('/batch', methods=['GET', 'POST'])
+@login_required
+def batch():
+    """
+    Register many movements (a receiving or dispatch session) in one transaction.
+    
+    Accepts the batch form, or JSON like
+    {"fecha": "2026-01-31", "descripcion": "...", "lineas": [{"codigo": "A-1", "tipo": "ENTRADA", "cantidad": 5}]}.
+    """
+    if request.method == 'GET':
+        return render_template('movimientos_batch.html', productos=ProductService().get_all_products())
+    
+    payload = request.get_json(silent=True) if request.is_json else None
+    if payload is not None:
+        lines = payload.get('lineas') or []
+        fecha_str = payload.get('fecha')
+        descripcion = payload.get('descripcion')
+    else:
+        lines = [
+            {'codigo': codigo, 'tipo': tipo, 'cantidad': cantidad}
+            for codigo, tipo, cantidad in zip(request.form.getlist('codigo'),
+                                              request.form.getlist('tipo'),
+                                              request.form.getlist('cantidad'))
+            if codigo.strip()
+        ]
+        fecha_str = request.form.get('fecha')
+        descripcion = request.form.get('descripcion', '').strip()
+    
+    try:
+        fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date() if fecha_str else date.today()
+    except ValueError:
+        fecha = None
+    
+    try:
+        if fecha is None:
+            raise ValidationError("El formato de fecha es inválido. Use: YYYY-MM-DD", field='fecha')
+        movements = MovementService().create_movements_batch(lines, current_user.id, fecha, descripcion or None)
+    
+    except (ValidationError, NotFoundError, BusinessLogicError, DatabaseError) as e:
+        if payload is not None:
+            return jsonify({'error': e.message}), e.status_code
+        flash(f'Error: {e.message}', 'error')
+        return render_template('movimientos_batch.html', productos=ProductService().get_all_products(),
+                               form_data=request.form, lines=lines)
+    
+    if payload is not None:
+        return jsonify({'created': len(movements), 'ids': [m.id for m in movements]}), 201
+    
+    flash(f'Lote registrado: {len(movements)} movimientos', 'success')
+    return redirect(url_for('movements.index', fecha=fecha.isoformat()))
+
+
 @movements_bp.route('/<int:movement_id>')
 @login_required
 def view(movement_id):
@@ -121,6 +175,29 @@ def today():
     return redirect(url_for('movements.index', fecha=date.today().isoformat()))
 
 
+@movements_bp.route('/close-day', methods=['POST'])
+@login_required
+def close_day():
+    """Close a day and store the closing stock of every product."""
+    fecha_str = request.form.get('fecha', date.today().isoformat())
+    
+    try:
+        fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date()
+    except ValueError:
+        fecha = date.today()
+    
+    try:
+        snapshot_service = StockSnapshotService()
+        cierre = snapshot_service.close_day(fecha, current_user.id)
+        
+        flash(f'Día {fecha.strftime("%d/%m/%Y")} cerrado: {cierre.productos} existencias registradas', 'success')
+    
+    except (BusinessLogicError, DatabaseError) as e:
+        flash(f'Error al cerrar el día: {e.message}', 'error')
+    
+    return redirect(url_for('movements.index', fecha=fecha.isoformat()))
+
+
 @movements_bp.route('/history/<int:product_id>')
 @login_required
 def product_history(product_id):
@@ -145,6 +222,9 @@ def product_history(product_id):
             except ValueError:
                 pass
         
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 50, type=int)
+        
         # Get product
         product_service = ProductService()
         product = product_service.get_product(product_id)
@@ -153,17 +233,20 @@ def product_history(product_id):
             flash('Producto no encontrado', 'error')
             return redirect(url_for('products.index'))
         
-        # Get movement history
+        # Get the ledger page with running balance
         movement_service = MovementService()
-        movements = movement_service.get_movement_history(
+        ledger, opening, start_date, end_date = movement_service.get_product_ledger(
             product_id=product_id,
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            page=page,
+            per_page=per_page
         )
         
         return render_template('movimientos_history.html',
                              producto=product,
-                             movimientos=movements,
+                             ledger=ledger,
+                             saldo_inicial=opening,
                              start_date=start_date,
                              end_date=end_date)
     
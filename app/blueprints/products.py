@@ -6,12 +6,19 @@ from flask import Blueprint, render_template, redirect, url_for, request, flash,
 from flask_login import login_required, current_user
 from werkzeug.exceptions import BadRequest
 
-from app.services import ProductService, SupplierService
+from app.services import ProductService, PricingService, CatalogueService
+from app.services.pricing_service import DEFAULT_EXCHANGE_RATE
 from app.utils.exceptions import ValidationError, NotFoundError, BusinessLogicError, DatabaseError
 
 products_bp = Blueprint('products', __name__)
 
 
+def _form_choices():
+    """Suppliers and item groups for the product form dropdowns."""
+    catalogue = CatalogueService()
+    return {'suppliers': catalogue.get_suppliers(), 'item_groups': catalogue.get_item_groups()}
+
+
 @products_bp.route('/')
 @login_required
 def index():
@@ -40,14 +47,10 @@ def index():
         item_group_service = ItemGroupService()
         categories = item_group_service.get_all_groups()
         
-        # Get current exchange rate
-        from app.models import ExchangeRate
-        current_rate = ExchangeRate.get_current_rate()
-        exchange_rate = float(current_rate.rate) if current_rate else 36.50
-        
-        # Convert to float for Jinja2 template calculations
-        # This ensures compatibility with Decimal types from database
-        exchange_rate = float(exchange_rate)
+        # Bs prices for the whole page at the cached current rate
+        pricing_service = PricingService()
+        exchange_rate = pricing_service.get_current_rate()
+        precios = pricing_service.price_products(result.items, exchange_rate)
         
         return render_template('productos.html',
                              productos=result.items,
@@ -56,11 +59,13 @@ def index():
                              search_by=search_by,
                              item_group_id=item_group_id,
                              categories=categories,
-                             exchange_rate=exchange_rate)
+                             exchange_rate=exchange_rate,
+                             precios=precios)
     
     except Exception as e:
         flash(f'Error al cargar productos: {str(e)}', 'error')
-        return render_template('productos.html', productos=[], pagination=None, exchange_rate=36.50)
+        return render_template('productos.html', productos=[], pagination=None,
+                             exchange_rate=DEFAULT_EXCHANGE_RATE, precios=[])
 
 
 @products_bp.route('/create', methods=['GET', 'POST'])
@@ -68,15 +73,8 @@ def index():
 def create():
     """Create new product."""
     if request.method == 'GET':
-        # Get suppliers and item groups for dropdowns
-        supplier_service = SupplierService()
-        suppliers = supplier_service.get_all_suppliers()
-        
-        from app.services import ItemGroupService
-        item_group_service = ItemGroupService()
-        item_groups = item_group_service.get_all_groups()
-        
-        return render_template('productos_form.html', producto=None, suppliers=suppliers, item_groups=item_groups)
+        # Suppliers and item groups for dropdowns
+        return render_template('productos_form.html', producto=None, **_form_choices())
     
     try:
         # Get form data
@@ -105,18 +103,11 @@ def create():
     
     except ValidationError as e:
         flash(f'Error de validación: {e.message}', 'error')
-        supplier_service = SupplierService()
-        suppliers = supplier_service.get_all_suppliers()
-        from app.services import ItemGroupService
-        item_group_service = ItemGroupService()
-        item_groups = item_group_service.get_all_groups()
-        return render_template('productos_form.html', producto=None, suppliers=suppliers, item_groups=item_groups, form_data=request.form)
+        return render_template('productos_form.html', producto=None, form_data=request.form, **_form_choices())
     
     except (BusinessLogicError, DatabaseError) as e:
         flash(f'Error: {e.message}', 'error')
-        supplier_service = SupplierService()
-        suppliers = supplier_service.get_all_suppliers()
-        return render_template('productos_form.html', producto=None, suppliers=suppliers, form_data=request.form)
+        return render_template('productos_form.html', producto=None, form_data=request.form, **_form_choices())
 
 
 @products_bp.route('/<int:product_id>/edit', methods=['GET', 'POST'])
@@ -132,14 +123,7 @@ def edit(product_id):
                 flash('Producto no encontrado', 'error')
                 return redirect(url_for('products.index'))
             
-            supplier_service = SupplierService()
-            suppliers = supplier_service.get_all_suppliers()
-            
-            from app.services import ItemGroupService
-            item_group_service = ItemGroupService()
-            item_groups = item_group_service.get_all_groups()
-            
-            return render_template('productos_form.html', producto=product, suppliers=suppliers, item_groups=item_groups)
+            return render_template('productos_form.html', producto=product, **_form_choices())
         
         except Exception as e:
             flash(f'Error al cargar producto: {str(e)}', 'error')
@@ -172,26 +156,12 @@ def edit(product_id):
     except ValidationError as e:
         flash(f'Error de validación: {e.message}', 'error')
         product = product_service.get_product(product_id)
-        supplier_service = SupplierService()
-        suppliers = supplier_service.get_all_suppliers()
-        from app.services import ItemGroupService
-        item_group_service = ItemGroupService()
-        item_groups = item_group_service.get_all_groups()
-        return render_template('productos_form.html', producto=product, suppliers=suppliers, item_groups=item_groups, form_data=request.form)
-    
-    except ValidationError as e:
-        flash(f'Error de validación: {e.message}', 'error')
-        product = product_service.get_product(product_id)
-        supplier_service = SupplierService()
-        suppliers = supplier_service.get_all_suppliers()
-        return render_template('productos_form.html', producto=product, suppliers=suppliers, form_data=request.form)
+        return render_template('productos_form.html', producto=product, form_data=request.form, **_form_choices())
     
     except (BusinessLogicError, DatabaseError) as e:
         flash(f'Error: {e.message}', 'error')
         product = product_service.get_product(product_id)
-        supplier_service = SupplierService()
-        suppliers = supplier_service.get_all_suppliers()
-        return render_template('productos_form.html', producto=product, suppliers=suppliers, form_data=request.form)
+        return render_template('productos_form.html', producto=product, form_data=request.form, **_form_choices())
 
 
 @products_bp.route('/<int:product_id>/delete', methods=['POST'])
@@ -225,12 +195,13 @@ def view(product_id):
             flash('Producto no encontrado', 'error')
             return redirect(url_for('products.index'))
         
-        # Get movement history
+        # Latest page of the movement ledger
         from app.services import MovementService
         movement_service = MovementService()
-        movements = movement_service.get_movement_history(product_id)
+        ledger, _, start_date, _ = movement_service.get_product_ledger(product_id, per_page=10)
         
-        return render_template('productos_detail.html', producto=product, movements=movements)
+        return render_template('productos_detail.html', producto=product, ledger=ledger,
+                             ledger_start=start_date)
     
     except Exception as e:
         flash(f'Error al cargar producto: {str(e)}', 'error')
@@ -4,12 +4,18 @@ Sales Orders blueprint - Routes for sales order management.
 from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
 from flask_login import login_required, current_user
 
-from app.services import SalesOrderService, CustomerService, ProductService
+from app.services import SalesOrderService, ProductService, CatalogueService
 from app.utils.exceptions import ValidationError, NotFoundError, BusinessLogicError, DatabaseError
 
 sales_orders_bp = Blueprint('sales_orders', __name__)
 
 
+def _form_choices():
+    """Customers and products for the sales order form dropdowns."""
+    catalogue = CatalogueService()
+    return {'customers': catalogue.get_customers(), 'products': catalogue.get_products()}
+
+
 @sales_orders_bp.route('/')
 @login_required
 def index():
@@ -43,12 +49,8 @@ def index():
 def create():
     """Create new sales order."""
     if request.method == 'GET':
-        # Get customers and products for dropdowns
-        customer_service = CustomerService()
-        product_service = ProductService()
-        customers = customer_service.get_all_customers()
-        products = product_service.get_all_products()
-        return render_template('sales_orders_form.html', order=None, customers=customers, products=products)
+        # Customers and products for dropdowns
+        return render_template('sales_orders_form.html', order=None, **_form_choices())
     
     try:
         # Get form data
@@ -86,19 +88,11 @@ def create():
     
     except ValidationError as e:
         flash(f'Error de validación: {e.message}', 'error')
-        customer_service = CustomerService()
-        product_service = ProductService()
-        customers = customer_service.get_all_customers()
-        products = product_service.get_all_products()
-        return render_template('sales_orders_form.html', order=None, customers=customers, products=products, form_data=request.form)
+        return render_template('sales_orders_form.html', order=None, form_data=request.form, **_form_choices())
     
     except (BusinessLogicError, DatabaseError) as e:
         flash(f'Error: {e.message}', 'error')
-        customer_service = CustomerService()
-        product_service = ProductService()
-        customers = customer_service.get_all_customers()
-        products = product_service.get_all_products()
-        return render_template('sales_orders_form.html', order=None, customers=customers, products=products, form_data=request.form)
+        return render_template('sales_orders_form.html', order=None, form_data=request.form, **_form_choices())
 
 
 @sales_orders_bp.route('/<int:order_id>')
@@ -16,6 +16,28 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'sqlite:///{os.path.abspath("instance/inventario.db")}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
+    # Optional read-only engine for searches, reports and dashboards: a replica,
+    # or the same SQLite file (sqlite:///file:/path/db?mode=ro&uri=true)
+    SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL')
+    
+    # Connection pool of each worker process (not used by in-memory SQLite)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 5)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 10)
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT') or 30)
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 3600)
+    
+    # SQLite performance profile, applied to every new connection
+    SQLITE_PROFILE_ENABLED = (os.environ.get('SQLITE_PROFILE_ENABLED') or 'true').lower() == 'true'
+    # WAL lets readers run while a worker writes; NORMAL only syncs at checkpoints in WAL mode
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL'
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    # Wait this long for a lock before raising "database is locked"
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024)
+    # Page cache per connection
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB') or 64 * 1024)
+    SQLITE_TEMP_STORE = os.environ.get('SQLITE_TEMP_STORE') or 'MEMORY'
+    SQLITE_FOREIGN_KEYS = (os.environ.get('SQLITE_FOREIGN_KEYS') or 'true').lower() == 'true'
     
     # Session
     SESSION_COOKIE_SECURE = False
@@ -44,6 +66,16 @@ class Config:
     LOG_MAX_BYTES = 10 * 1024 * 1024  # 10MB
     LOG_BACKUP_COUNT = 10
     
+    # Per-request SQL statistics (request_logger middleware)
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS') or 200)
+    # Statements of the same shape run more than this many times in one request are logged as N+1
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD') or 10)
+    # Send X-DB-Queries / X-DB-Time response headers
+    DB_STATS_HEADERS = True
+    
+    # Prometheus metrics at /metrics; set PROMETHEUS_MULTIPROC_DIR to aggregate gunicorn workers
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or 'true').lower() == 'true'
+    
     # Backup
     BACKUP_DIR = os.environ.get('BACKUP_DIR') or 'backups'
     BACKUP_RETENTION_DAYS = int(os.environ.get('BACKUP_RETENTION_DAYS') or 30)
@@ -52,6 +84,28 @@ class Config:
     CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'simple'
     CACHE_DEFAULT_TIMEOUT = 300
     CACHE_REDIS_URL = os.environ.get('REDIS_URL')
+    # Seconds a worker may serve the exchange rate history cached in memory;
+    # commits refresh it at once where the service cache is shared (Redis)
+    EXCHANGE_RATE_CACHE_TIMEOUT = int(os.environ.get('EXCHANGE_RATE_CACHE_TIMEOUT') or 60)
+    # Fall-back expiry (seconds) for @cached service results; commits invalidate them earlier
+    SERVICE_CACHE_TIMEOUT = int(os.environ.get('SERVICE_CACHE_TIMEOUT') or 300)
+    # Seconds a worker reuses its in-memory dropdown catalogue when it cannot see
+    # the commit versions (per-process cache); with Redis commits refresh it at once
+    CATALOGUE_SNAPSHOT_MAX_AGE = int(os.environ.get('CATALOGUE_SNAPSHOT_MAX_AGE') or 300)
+    
+    # Background jobs (imports, report exports)
+    # thread: per-process pool; process: 'flask run-jobs' worker; inline: run in the request
+    JOB_EXECUTOR = os.environ.get('JOB_EXECUTOR') or 'thread'
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS') or 2)
+    JOB_ARTIFACT_DIR = os.environ.get('JOB_ARTIFACT_DIR') or 'exports'
+    JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS') or 7)
+    JOB_TIMEOUT_MINUTES = int(os.environ.get('JOB_TIMEOUT_MINUTES') or 60)
+    
+    # Maximum lines accepted by one movement batch (receiving/dispatch session)
+    MOVEMENT_BATCH_MAX_LINES = int(os.environ.get('MOVEMENT_BATCH_MAX_LINES') or 500)
+    
+    # Days shown by default in a product's movement ledger
+    LEDGER_DEFAULT_DAYS = int(os.environ.get('LEDGER_DEFAULT_DAYS') or 90)
     
     # Pagination
     ITEMS_PER_PAGE = int(os.environ.get('ITEMS_PER_PAGE') or 20)
@@ -95,6 +149,9 @@ class TestingConfig(Config):
     WTF_CSRF_ENABLED = False
     RATELIMIT_ENABLED = False
     
+    # Run background jobs before the request returns
+    JOB_EXECUTOR = 'inline'
+    
     # Use simple cache for testing
     CACHE_TYPE = 'simple'
 
@@ -113,6 +170,9 @@ class ProductionConfig(Config):
     # Require HTTPS
     PREFERRED_URL_SCHEME = 'https'
     
+    # Keep query statistics in the logs only
+    DB_STATS_HEADERS = False
+    
     # Use Redis for caching and rate limiting in production
     CACHE_TYPE = 'redis'
     
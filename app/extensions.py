@@ -2,7 +2,11 @@
 Flask extensions initialization.
 Extensions are initialized here and then imported by the application factory.
 """
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.sql.elements import TextClause
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
@@ -11,8 +15,66 @@ from flask_limiter.util import get_remote_address
 from flask_caching import Cache
 from flask_bcrypt import Bcrypt
 
+# Bind key of the optional read-only engine (SQLALCHEMY_REPLICA_URI)
+REPLICA_BIND_KEY = 'replica'
+
+
+class RoutingSession(Session):
+    """
+    Session that sends read-only queries to the replica engine.
+
+    SELECTs run inside read_only() go to the replica bind when one is
+    configured. Once the session has written (a flush, an INSERT, UPDATE
+    or DELETE, or a raw SQL statement other than a SELECT) it stays on
+    the primary until it is removed at the end of the request, so a
+    request always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and self.info.get('read_only') and not self.info.get('wrote')
+                and getattr(clause, 'is_select', False)):
+            replica = self._db.engines.get(REPLICA_BIND_KEY)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _stick_to_primary_after_flush(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _stick_to_primary_after_statement(orm_execute_state):
+    statement = orm_execute_state.statement
+    if isinstance(statement, TextClause):
+        wrote = not statement.text.lstrip().upper().startswith(('SELECT', 'PRAGMA'))
+    else:
+        wrote = getattr(statement, 'is_dml', False)
+    if wrote:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@contextmanager
+def read_only():
+    """
+    Route the SELECTs run inside the block to the replica, if any.
+
+    Only wrap reads that tolerate replication lag (searches, reports,
+    dashboards); the block may still write, which pins the session to the
+    primary.
+    """
+    session = db.session()
+    previous = session.info.get('read_only', False)
+    session.info['read_only'] = True
+    try:
+        yield session
+    finally:
+        session.info['read_only'] = previous
+
+
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 login_manager = LoginManager()
 csrf = CSRFProtect()
@@ -33,7 +95,15 @@ def init_extensions(app):
         app: Flask application instance
     """
     # Database
+    from app.utils.sqlite_profile import engine_options, setup_sqlite_profile
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    if app.config.get('SQLALCHEMY_REPLICA_URI'):
+        app.config['SQLALCHEMY_BINDS'] = {
+            **(app.config.get('SQLALCHEMY_BINDS') or {}),
+            REPLICA_BIND_KEY: app.config['SQLALCHEMY_REPLICA_URI'],
+        }
     db.init_app(app)
+    setup_sqlite_profile(app)
     migrate.init_app(app, db)
     
     # Authentication
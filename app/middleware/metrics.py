@@ -0,0 +1,87 @@
+"""
+Metrics middleware.
+Records request count, latency, in-flight requests and SQL statements per
+Flask endpoint, and serves them at /metrics in Prometheus text format.
+"""
+import os
+import time
+from flask import Response, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+from app.extensions import csrf, limiter
+from app.utils.metrics import (
+    REQUESTS, REQUEST_LATENCY, REQUESTS_IN_PROGRESS, REQUEST_DB_QUERIES, REQUEST_DB_SECONDS,
+    endpoint_label
+)
+
+# Endpoints left out of the request metrics
+UNTRACKED_ENDPOINTS = {'metrics', 'static'}
+
+
+def collect_metrics() -> bytes:
+    """
+    Render all metrics in Prometheus text format.
+
+    Returns:
+        Exposition text; aggregated over every worker when
+        PROMETHEUS_MULTIPROC_DIR is set
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def setup_metrics(app):
+    """
+    Set up request metrics and the /metrics endpoint.
+
+    SQL statement counts come from the request logger's query statistics,
+    so this must be set up after setup_request_logging.
+
+    Args:
+        app: Flask application instance
+    """
+
+    @app.before_request
+    def start_request_metrics():
+        """Mark the request as in flight."""
+        endpoint = endpoint_label()
+        if endpoint in UNTRACKED_ENDPOINTS:
+            return
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_PROGRESS.labels(endpoint).inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        """Count the request and observe its latency and SQL statements."""
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+
+        endpoint = endpoint_label()
+        REQUESTS_IN_PROGRESS.labels(endpoint).dec()
+        REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+        REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - start)
+        stats = g.get('query_stats')
+        if stats is not None:
+            REQUEST_DB_QUERIES.labels(endpoint).observe(stats.count)
+            REQUEST_DB_SECONDS.labels(endpoint).inc(stats.duration)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exception=None):
+        """Release the in-flight slot of requests that failed before after_request."""
+        if g.pop('metrics_start', None) is not None:
+            endpoint = endpoint_label()
+            REQUESTS_IN_PROGRESS.labels(endpoint).dec()
+            REQUESTS.labels(endpoint, request.method, '500').inc()
+
+    @csrf.exempt
+    @limiter.exempt
+    def metrics():
+        """Prometheus scrape endpoint."""
+        return Response(collect_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+    app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', metrics)
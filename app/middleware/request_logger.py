@@ -1,16 +1,87 @@
 """
 Request logging middleware.
-Logs all incoming requests and responses with timing information.
+Logs all incoming requests and responses with timing information,
+including the SQL statements each request ran.
 """
+import re
 import time
 import logging
 import uuid
-from flask import request, g
+from collections import Counter
+from flask import current_app, request, g, has_request_context
 from functools import wraps
+from sqlalchemy import event
+
+from app.extensions import db
 
 logger = logging.getLogger(__name__)
 
 
+class QueryStats:
+    """SQL statements run by one request."""
+    
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+    
+    def record(self, statement: str, duration: float) -> None:
+        """Add one executed statement."""
+        self.count += 1
+        self.duration += duration
+        self.shapes[_statement_shape(statement)] += 1
+    
+    def repeated(self, threshold: int):
+        """Statement shapes run more than threshold times, most repeated first."""
+        return [(shape, times) for shape, times in self.shapes.most_common() if times > threshold]
+
+
+# Bound parameter placeholders of the supported drivers (qmark, format, pyformat)
+_PARAMETER = r'(?:\?|%s|%\(\w+\)s)'
+_PARAMETER_LIST = re.compile(rf'\(\s*{_PARAMETER}(?:\s*,\s*{_PARAMETER})+\s*\)')
+
+
+def _statement_shape(statement: str) -> str:
+    """Normalize a statement so calls differing only in IN-list size compare equal."""
+    return _PARAMETER_LIST.sub('(?)', re.sub(r'\s+', ' ', statement).strip())
+
+
+def setup_query_tracking(app):
+    """
+    Count SQL statements and database time per request through engine events.
+    
+    Statements slower than SLOW_QUERY_MS are logged with the request ID.
+    Statements run outside a request (jobs, CLI) are not counted.
+    
+    Args:
+        app: Flask application instance
+    """
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+    
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['query_start_time'].pop()
+        if not has_request_context():
+            return
+        stats = g.get('query_stats')
+        if stats is not None:
+            stats.record(statement, duration)
+        if duration * 1000 >= current_app.config.get('SLOW_QUERY_MS', 200):
+            logger.warning(
+                f'Slow query ({duration * 1000:.1f}ms): {_statement_shape(statement)[:500]}',
+                extra={
+                    'request_id': g.get('request_id', 'unknown'),
+                    'path': request.path,
+                    'duration': duration
+                }
+            )
+    
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+
 def setup_request_logging(app):
     """
     Set up request logging for the application.
@@ -18,6 +89,7 @@ def setup_request_logging(app):
     Args:
         app: Flask application instance
     """
+    setup_query_tracking(app)
     
     @app.before_request
     def before_request():
@@ -25,6 +97,7 @@ def setup_request_logging(app):
         # Generate unique request ID
         g.request_id = str(uuid.uuid4())
         g.start_time = time.time()
+        g.query_stats = QueryStats()
         
         # Log request details
         logger.info(
@@ -41,20 +114,40 @@ def setup_request_logging(app):
     @app.after_request
     def after_request(response):
         """Log response details after processing."""
+        stats = g.get('query_stats')
         if hasattr(g, 'start_time'):
             duration = time.time() - g.start_time
             
             logger.info(
-                f'Request completed: {request.method} {request.path} - {response.status_code} ({duration:.3f}s)',
+                f'Request completed: {request.method} {request.path} - {response.status_code} ({duration:.3f}s, '
+                f'{stats.count if stats else 0} queries in {stats.duration * 1000 if stats else 0:.1f}ms)',
                 extra={
                     'request_id': getattr(g, 'request_id', 'unknown'),
                     'method': request.method,
                     'path': request.path,
                     'status_code': response.status_code,
-                    'duration': duration
+                    'duration': duration,
+                    'db_queries': stats.count if stats else 0,
+                    'db_time': stats.duration if stats else 0.0
                 }
             )
         
+        if stats is not None:
+            # Same statement over and over: usually a lazy load inside a loop
+            for shape, times in stats.repeated(current_app.config.get('N_PLUS_ONE_THRESHOLD', 10)):
+                logger.warning(
+                    f'Possible N+1: statement run {times} times in {request.method} {request.path}: {shape[:500]}',
+                    extra={
+                        'request_id': getattr(g, 'request_id', 'unknown'),
+                        'path': request.path,
+                        'repeated': times
+                    }
+                )
+            
+            if current_app.config.get('DB_STATS_HEADERS', False):
+                response.headers['X-DB-Queries'] = str(stats.count)
+                response.headers['X-DB-Time'] = f'{stats.duration * 1000:.1f}ms'
+        
         # Add request ID to response headers
         if hasattr(g, 'request_id'):
             response.headers['X-Request-ID'] = g.request_id
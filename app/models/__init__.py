@@ -9,13 +9,22 @@ from app.models.movement import Movimiento
 from app.models.audit_log import AuditLog
 from app.models.backup_metadata import BackupMetadata
 from app.models.item_group import ItemGroup
+from app.models.item_group_closure import ItemGroupClosure  # Also maintains hierarchy and product counts
 from app.models.customer import Customer
 from app.models.sales_order import SalesOrder, SalesOrderItem
 from app.models.exchange_rate import ExchangeRate
+from app.models.day_close import CierreDia
+from app.models.stock_snapshot import StockSnapshot
+from app.models.background_job import BackgroundJob
+from app.models.code_sequence import CodeSequence
+from app.models.document_sequence import DocumentSequence
+from app.models.stock_reservation import StockReservation
+from app.models import product_search  # Full-text index DDL for products
 
 # Aliases for English names
 Supplier = Proveedor
 Movement = Movimiento
+DayClose = CierreDia
 
 __all__ = [
     'User',
@@ -31,5 +40,13 @@ __all__ = [
     'SalesOrder',
     'SalesOrderItem',
     'ExchangeRate',
+    'CierreDia',
+    'DayClose',
+    'StockSnapshot',
+    'BackgroundJob',
+    'CodeSequence',
+    'DocumentSequence',
+    'StockReservation',
+    'ItemGroupClosure',
 ]
 
@@ -0,0 +1,85 @@
+"""
+Background job model for imports and report exports run off the request thread.
+"""
+from datetime import datetime
+from app.extensions import db
+
+
+class BackgroundJob(db.Model):
+    """Queued or finished background job with its progress and artifact."""
+
+    __tablename__ = 'background_jobs'
+
+    # Job types
+    TYPE_IMPORT = 'IMPORT'
+    TYPE_INVENTORY_REPORT = 'INVENTORY_REPORT'
+
+    # Job statuses
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_COMPLETED = 'COMPLETED'
+    STATUS_FAILED = 'FAILED'
+
+    # Primary key
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Job information
+    job_type = db.Column(db.String(30), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING, index=True)
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 0-100
+    params = db.Column(db.JSON, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error_message = db.Column(db.Text, nullable=True)
+
+    # Finished artifact (file to download)
+    artifact_path = db.Column(db.String(500), nullable=True)
+    artifact_name = db.Column(db.String(255), nullable=True)
+    artifact_mimetype = db.Column(db.String(100), nullable=True)
+
+    # Audit fields
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Relationships
+    creator = db.relationship('User', foreign_keys=[created_by])
+
+    # Constraints
+    __table_args__ = (
+        db.CheckConstraint("job_type IN ('IMPORT', 'INVENTORY_REPORT')", name='check_job_type_valid'),
+        db.CheckConstraint(
+            "status IN ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED')",
+            name='check_job_status_valid'
+        ),
+        db.CheckConstraint('progress >= 0 AND progress <= 100', name='check_job_progress_range'),
+    )
+
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} {self.job_type} - {self.status}>'
+
+    @property
+    def is_finished(self):
+        """Check if the job has completed or failed."""
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+
+    @property
+    def has_artifact(self):
+        """Check if the job produced a downloadable file."""
+        return self.status == self.STATUS_COMPLETED and bool(self.artifact_path)
+
+    def to_dict(self):
+        """Convert job to dictionary."""
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error_message': self.error_message,
+            'artifact_name': self.artifact_name,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,41 @@
+"""
+Code sequence model with the last product code number per prefix.
+"""
+from datetime import datetime
+from app.extensions import db
+
+
+class CodeSequence(db.Model):
+    """Last sequence number handed out for a code prefix and initials."""
+    
+    __tablename__ = 'code_sequences'
+    
+    # Primary key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Sequence key: codes look like {prefix}-{initials}-{NN}
+    prefix = db.Column(db.String(10), nullable=False)  # Category prefix or rubro (E, P, A...)
+    initials = db.Column(db.String(20), nullable=False)  # Description initials (SO-PO, XX...)
+    last_value = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Audit fields
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Constraints
+    __table_args__ = (
+        db.UniqueConstraint('prefix', 'initials', name='uq_code_sequence_key'),
+        db.CheckConstraint('last_value >= 0', name='check_code_sequence_positive'),
+    )
+    
+    def __repr__(self):
+        return f'<CodeSequence {self.prefix}-{self.initials}: {self.last_value}>'
+    
+    def to_dict(self):
+        """Convert code sequence to dictionary."""
+        return {
+            'id': self.id,
+            'prefix': self.prefix,
+            'initials': self.initials,
+            'last_value': self.last_value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -3,6 +3,7 @@ Customer model for sales orders.
 """
 from datetime import datetime
 from app.extensions import db
+from app.models.indexes import active_index
 
 
 class Customer(db.Model):
@@ -56,6 +57,11 @@ class Customer(db.Model):
     creator = db.relationship('User', foreign_keys=[created_by], backref='created_customers')
     updater = db.relationship('User', foreign_keys=[updated_by], backref='updated_customers')
     
+    # Active customer list
+    __table_args__ = (
+        active_index('idx_customer_active_name', 'is_active', 'name'),
+    )
+    
     def __repr__(self):
         return f'<Customer {self.name}>'
     
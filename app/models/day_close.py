@@ -0,0 +1,36 @@
+"""
+Day close (CierreDia) model for tracking closed inventory days.
+"""
+from datetime import datetime
+from app.extensions import db
+
+
+class CierreDia(db.Model):
+    """Closed inventory day. Closing a day writes its stock snapshots."""
+    
+    __tablename__ = 'cierres_dia'
+    
+    # Primary key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Close information
+    fecha = db.Column(db.Date, unique=True, nullable=False, index=True)
+    cerrado_en = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    cerrado_por = db.Column(db.Integer, db.ForeignKey('users.id'))
+    productos = db.Column(db.Integer, default=0, nullable=False)  # Snapshots written
+    
+    # Relationships
+    closer = db.relationship('User', foreign_keys=[cerrado_por], backref='day_closes')
+    
+    def __repr__(self):
+        return f'<CierreDia {self.fecha}>'
+    
+    def to_dict(self):
+        """Convert day close to dictionary."""
+        return {
+            'id': self.id,
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'cerrado_en': self.cerrado_en.isoformat() if self.cerrado_en else None,
+            'cerrado_por': self.cerrado_por,
+            'productos': self.productos
+        }
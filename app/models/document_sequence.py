@@ -0,0 +1,41 @@
+"""
+Document sequence model with the last number issued per document type and period.
+"""
+from datetime import datetime
+from app.extensions import db
+
+
+class DocumentSequence(db.Model):
+    """Last number handed out for a document type (SO, PO, FAC...) in a period."""
+    
+    __tablename__ = 'document_sequences'
+    
+    # Primary key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Sequence key
+    name = db.Column(db.String(20), nullable=False)  # Document type: SO, PO, FAC...
+    period = db.Column(db.String(20), nullable=False, default='')  # YYYYMMDD, YYYY or '' (never resets)
+    last_value = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Audit fields
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Constraints
+    __table_args__ = (
+        db.UniqueConstraint('name', 'period', name='uq_document_sequence_key'),
+        db.CheckConstraint('last_value >= 0', name='check_document_sequence_positive'),
+    )
+    
+    def __repr__(self):
+        return f'<DocumentSequence {self.name} {self.period}: {self.last_value}>'
+    
+    def to_dict(self):
+        """Convert document sequence to dictionary."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'period': self.period,
+            'last_value': self.last_value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
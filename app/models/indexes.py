@@ -0,0 +1,25 @@
+"""
+Partial indexes over the rows that are not soft-deleted.
+
+Almost every query filters deleted_at IS NULL. Indexes restricted to those
+rows stay small and let the database answer the filter from the index;
+SQLite only uses them when the query repeats the index's WHERE terms
+literally, which the ORM's `deleted_at IS NULL` does.
+"""
+from app.extensions import db
+
+
+def active_index(name: str, *columns: str, where: str = None) -> db.Index:
+    """
+    Index over rows with deleted_at IS NULL (SQLite and PostgreSQL).
+
+    Args:
+        name: Index name
+        columns: Indexed columns, in order
+        where: Extra SQL condition ANDed to the soft-delete filter
+
+    Returns:
+        Index for __table_args__
+    """
+    condition = 'deleted_at IS NULL' + (f' AND {where}' if where else '')
+    return db.Index(name, *columns, sqlite_where=db.text(condition), postgresql_where=db.text(condition))
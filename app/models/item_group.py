@@ -22,6 +22,9 @@ class ItemGroup(db.Model):
     color = db.Column(db.String(7), default='#007bff')  # Hex color for UI
     icon = db.Column(db.String(50), default='bi-box')  # Bootstrap icon class
     
+    # Active products in this group and its subcategories (see item_group_closure)
+    product_count = db.Column(db.Integer, default=0, nullable=False)
+    
     # Audit fields
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -40,58 +43,54 @@ class ItemGroup(db.Model):
     
     def get_full_path(self):
         """Get full hierarchical path of the category."""
-        if self.parent:
-            return f"{self.parent.get_full_path()} > {self.name}"
-        return self.name
+        from app.models.item_group_closure import ItemGroupClosure
+        names = db.session.scalars(
+            db.select(ItemGroup.name)
+            .join(ItemGroupClosure, ItemGroupClosure.ancestor_id == ItemGroup.id)
+            .where(ItemGroupClosure.descendant_id == self.id)
+            .order_by(ItemGroupClosure.depth.desc())
+        ).all()
+        return ' > '.join(names) if names else self.name
     
     def get_all_children(self):
-        """Get all children recursively."""
-        children = []
-        try:
-            # Convert AppenderQuery to list safely
-            children_list = list(self.children)
-            # Filter out deleted children
-            active_children = [c for c in children_list if c.deleted_at is None]
-            for child in active_children:
-                children.append(child)
-                children.extend(child.get_all_children())
-        except Exception:
-            # If children access fails, return empty list
-            pass
-        return children
+        """Get all active descendants, nearest first."""
+        from app.models.item_group_closure import ItemGroupClosure
+        return db.session.scalars(
+            db.select(ItemGroup)
+            .join(ItemGroupClosure, ItemGroupClosure.descendant_id == ItemGroup.id)
+            .where(
+                ItemGroupClosure.ancestor_id == self.id,
+                ItemGroupClosure.depth > 0,
+                ItemGroup.deleted_at.is_(None)
+            )
+            .order_by(ItemGroupClosure.depth, ItemGroup.name)
+        ).all()
     
     def get_product_count(self):
         """Get total number of products in this category and subcategories."""
-        try:
-            # Count products in this category
-            count = self.products.filter_by(deleted_at=None).count()
-            
-            # Get children safely - convert AppenderQuery to list
-            try:
-                children_list = list(self.children)
-                active_children = [c for c in children_list if c.deleted_at is None]
-            except Exception:
-                # If children access fails, just return current count
-                return count
-            
-            # Add products from children recursively
-            for child in active_children:
-                count += child.get_product_count()
-            
-            return count
-        except Exception as e:
-            # If anything fails, return 0 to avoid breaking the UI
-            return 0
+        return self.product_count or 0
     
-    def to_dict(self):
-        """Convert item group to dictionary."""
+    def to_dict(self, ancestor_names=None):
+        """
+        Convert item group to dictionary.
+        
+        Args:
+            ancestor_names: Names from the root down to this group, already
+                loaded (see ItemGroupService.serialize_groups); queried if None
+        """
+        if ancestor_names:
+            parent_name = ancestor_names[-2] if len(ancestor_names) > 1 else None
+            full_path = ' > '.join(ancestor_names)
+        else:
+            parent_name = self.parent.name if self.parent else None
+            full_path = self.get_full_path()
         return {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'parent_id': self.parent_id,
-            'parent_name': self.parent.name if self.parent else None,
-            'full_path': self.get_full_path(),
+            'parent_name': parent_name,
+            'full_path': full_path,
             'color': self.color,
             'icon': self.icon,
             'product_count': self.get_product_count(),
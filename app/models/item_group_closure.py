@@ -0,0 +1,157 @@
+"""
+Closure table for the item group hierarchy, and product count maintenance.
+
+item_group_closure holds one row per (ancestor, descendant) pair, each
+group being its own ancestor at depth 0, so a whole subtree or ancestor
+chain is a single indexed read. item_groups.product_count holds the active
+products of a group and all its subcategories.
+
+Both are kept current from the session's after_flush hook: new groups are
+linked under their parent, reparented groups move with their subtree, and
+products that are created, deleted or moved between groups adjust the
+counts of every ancestor with one UPDATE per group touched.
+"""
+from collections import Counter
+from typing import Dict, Optional
+
+from sqlalchemy import event, delete, insert, select, true, update
+from sqlalchemy.orm import Session, aliased, attributes
+
+from app.extensions import db
+from app.models.item_group import ItemGroup
+from app.models.product import Product
+from app.utils.service_cache import touch_tags
+
+
+class ItemGroupClosure(db.Model):
+    """Ancestor/descendant pair of item groups."""
+
+    __tablename__ = 'item_group_closure'
+
+    ancestor_id = db.Column(db.Integer, db.ForeignKey('item_groups.id', ondelete='CASCADE'), primary_key=True)
+    descendant_id = db.Column(db.Integer, db.ForeignKey('item_groups.id', ondelete='CASCADE'),
+                              primary_key=True, index=True)
+    depth = db.Column(db.Integer, nullable=False)  # 0 for the group itself
+
+    def __repr__(self):
+        return f'<ItemGroupClosure {self.ancestor_id} -> {self.descendant_id} ({self.depth})>'
+
+
+def link_group(connection, group_id: int, parent_id: Optional[int]) -> None:
+    """Add the closure rows of a new group (no descendants yet)."""
+    closure = ItemGroupClosure.__table__
+    connection.execute(insert(closure).values(ancestor_id=group_id, descendant_id=group_id, depth=0))
+    if parent_id:
+        connection.execute(insert(closure).from_select(
+            ['ancestor_id', 'descendant_id', 'depth'],
+            select(closure.c.ancestor_id, group_id, closure.c.depth + 1)
+            .where(closure.c.descendant_id == parent_id)
+        ))
+
+
+def move_group(connection, group_id: int, parent_id: Optional[int]) -> None:
+    """Reattach a group and its subtree under a new parent (None for root)."""
+    closure = ItemGroupClosure.__table__
+    groups = ItemGroup.__table__
+    total = connection.execute(
+        select(groups.c.product_count).where(groups.c.id == group_id)
+    ).scalar() or 0
+
+    # The subtree's products leave the old ancestors...
+    add_to_ancestors(connection, group_id, -total, include_self=False)
+    connection.execute(delete(closure).where(
+        closure.c.descendant_id.in_(select(closure.c.descendant_id).where(closure.c.ancestor_id == group_id)),
+        closure.c.ancestor_id.in_(
+            select(closure.c.ancestor_id).where(closure.c.descendant_id == group_id,
+                                                closure.c.ancestor_id != group_id)
+        )
+    ))
+
+    # ...and join the new ones
+    if parent_id:
+        supertree, subtree = aliased(closure), aliased(closure)
+        connection.execute(insert(closure).from_select(
+            ['ancestor_id', 'descendant_id', 'depth'],
+            # Every new ancestor with every subtree member: a deliberate cross join
+            select(supertree.c.ancestor_id, subtree.c.descendant_id,
+                   supertree.c.depth + subtree.c.depth + 1)
+            .select_from(supertree).join(subtree, true())
+            .where(supertree.c.descendant_id == parent_id, subtree.c.ancestor_id == group_id)
+        ))
+    add_to_ancestors(connection, group_id, total, include_self=False)
+
+
+def add_to_ancestors(connection, group_id: int, delta: int, include_self: bool = True) -> None:
+    """Add delta to the product count of a group's ancestors."""
+    if not delta:
+        return
+    closure = ItemGroupClosure.__table__
+    groups = ItemGroup.__table__
+    ancestors = select(closure.c.ancestor_id).where(closure.c.descendant_id == group_id)
+    if not include_self:
+        ancestors = ancestors.where(closure.c.depth > 0)
+    connection.execute(
+        update(groups)
+        .where(groups.c.id.in_(ancestors))
+        .values(product_count=groups.c.product_count + delta, updated_at=groups.c.updated_at)
+    )
+
+
+def apply_product_count_deltas(connection, deltas: Dict[int, int]) -> None:
+    """Apply per-group product count changes, in group id order."""
+    for group_id in sorted(deltas):
+        add_to_ancestors(connection, group_id, deltas[group_id])
+
+
+def _previous(obj, key: str):
+    """Value an attribute had before the pending changes."""
+    history = attributes.get_history(obj, key)
+    if history.deleted:
+        return history.deleted[0]
+    if history.added:
+        return None
+    return getattr(obj, key)
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_hierarchy(session, flush_context):
+    new_groups = [obj for obj in session.new if isinstance(obj, ItemGroup)]
+    moved_groups = [
+        obj for obj in session.dirty
+        if isinstance(obj, ItemGroup) and attributes.get_history(obj, 'parent_id').has_changes()
+    ]
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Product) and obj.deleted_at is None and obj.item_group_id:
+            deltas[obj.item_group_id] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Product) and _previous(obj, 'deleted_at') is None and _previous(obj, 'item_group_id'):
+            deltas[_previous(obj, 'item_group_id')] -= 1
+    for obj in session.dirty:
+        if not isinstance(obj, Product):
+            continue
+        old_group = _previous(obj, 'item_group_id') if _previous(obj, 'deleted_at') is None else None
+        new_group = obj.item_group_id if obj.deleted_at is None else None
+        if old_group != new_group:
+            if old_group:
+                deltas[old_group] -= 1
+            if new_group:
+                deltas[new_group] += 1
+
+    if not (new_groups or moved_groups or any(deltas.values())):
+        return
+
+    # Product counts and paths change without the groups being flushed
+    touch_tags(session, ItemGroup.__name__)
+    connection = session.connection()
+    # Parents first when a parent and its children are created together
+    pending = {group.id: group for group in new_groups}
+    while pending:
+        for group_id, group in sorted(pending.items()):
+            if group.parent_id not in pending:
+                link_group(connection, group_id, group.parent_id)
+                del pending[group_id]
+                break
+    for group in moved_groups:
+        move_group(connection, group.id, group.parent_id)
+    apply_product_count_deltas(connection, {group: delta for group, delta in deltas.items() if delta})
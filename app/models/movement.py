@@ -3,6 +3,7 @@ Enhanced Movement (Movimiento) model with audit fields.
 """
 from datetime import datetime
 from app.extensions import db
+from app.models.indexes import active_index
 
 
 class Movimiento(db.Model):
@@ -36,11 +37,43 @@ class Movimiento(db.Model):
         db.CheckConstraint('cantidad > 0', name='check_cantidad_positive'),
         db.CheckConstraint("tipo IN ('ENTRADA', 'SALIDA', 'AJUSTE', 'entrada', 'salida', 'ajuste')", name='check_tipo_valid'),
         db.Index('idx_movement_product_date', 'producto_id', 'fecha'),
+        # Recent activity
+        active_index('idx_movement_active_created', 'created_at'),
     )
     
     def __repr__(self):
         return f'<Movimiento {self.tipo} {self.cantidad} - Product:{self.producto_id}>'
     
+    @classmethod
+    def net_quantity(cls):
+        """
+        SQL expression for the signed stock effect of a movement.
+        
+        Entries add and exits subtract; AJUSTE rows count as 0 because
+        they set the stock instead (see is_adjustment). Matching on tipo is
+        case-insensitive.
+        """
+        tipo = db.func.lower(cls.tipo)
+        return db.case(
+            (tipo == 'entrada', cls.cantidad),
+            (tipo == 'salida', -cls.cantidad),
+            else_=0
+        )
+    
+    @classmethod
+    def is_adjustment(cls):
+        """SQL expression true for AJUSTE rows, whose cantidad is the new stock."""
+        return db.func.lower(cls.tipo) == 'ajuste'
+    
+    @classmethod
+    def balance_quantity(cls):
+        """
+        SQL expression for a movement's term in a running balance that
+        restarts at each AJUSTE: its cantidad for AJUSTE rows, otherwise
+        the net quantity.
+        """
+        return db.case((cls.is_adjustment(), cls.cantidad), else_=cls.net_quantity())
+    
     def to_dict(self):
         """Convert movement to dictionary."""
         return {
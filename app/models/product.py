@@ -3,6 +3,7 @@ Enhanced Product model with audit fields and constraints.
 """
 from datetime import datetime
 from app.extensions import db
+from app.models.indexes import active_index
 
 
 class Product(db.Model):
@@ -17,6 +18,7 @@ class Product(db.Model):
     codigo = db.Column(db.String(50), unique=True, nullable=False, index=True)
     descripcion = db.Column(db.String(200), nullable=False, index=True)
     stock = db.Column(db.Integer, default=0, nullable=False)
+    reserved = db.Column(db.Integer, default=0, nullable=False)  # Held by confirmed sales orders
     precio_dolares = db.Column(db.Numeric(10, 2), default=0.0, nullable=False)
     factor_ajuste = db.Column(db.Numeric(5, 2), default=1.0, nullable=False)
     
@@ -42,8 +44,16 @@ class Product(db.Model):
     # Constraints
     __table_args__ = (
         db.CheckConstraint('stock >= 0', name='check_stock_positive'),
+        db.CheckConstraint('reserved >= 0', name='check_reserved_positive'),
         db.CheckConstraint('precio_dolares >= 0', name='check_price_positive'),
         db.CheckConstraint('factor_ajuste > 0', name='check_factor_positive'),
+        # Listings and keyset pages ordered by codigo, overall and by category
+        active_index('idx_product_active_codigo', 'codigo'),
+        active_index('idx_product_active_group_codigo', 'item_group_id', 'codigo'),
+        # Out of stock and below-threshold lists
+        active_index('idx_product_active_stock', 'stock'),
+        # Low stock alerts: only the products at or below their reorder point
+        active_index('idx_product_reorder', 'stock', where='stock <= reorder_point'),
     )
     
     def __repr__(self):
@@ -53,6 +63,11 @@ class Product(db.Model):
         """Check if product is soft deleted."""
         return self.deleted_at is not None
     
+    @property
+    def available(self) -> int:
+        """Stock not held by reservations (available to promise)."""
+        return self.stock - (self.reserved or 0)
+    
     def needs_reorder(self) -> bool:
         """Check if product needs to be reordered."""
         return self.stock <= self.reorder_point
@@ -83,6 +98,7 @@ class Product(db.Model):
             'codigo': self.codigo,
             'descripcion': self.descripcion,
             'stock': self.stock,
+            'reserved': self.reserved,
             'precio_dolares': float(self.precio_dolares) if self.precio_dolares else 0.0,
             'factor_ajuste': float(self.factor_ajuste) if self.factor_ajuste else 1.0,
             'proveedor_id': self.proveedor_id,
@@ -0,0 +1,67 @@
+"""
+Full-text search index for products (SQLite FTS5).
+
+products_fts mirrors codigo, descripcion and the category name of every
+product, keyed by product id (rowid). Triggers keep it in sync, and the
+unicode61 tokenizer folds case and accents ("tubería" matches "tuberia").
+"""
+from sqlalchemy import DDL, event
+
+from app.models.product import Product
+
+FTS_TABLE = 'products_fts'
+
+CREATE_STATEMENTS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        codigo, descripcion, categoria,
+        tokenize = "unicode61 remove_diacritics 2"
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, codigo, descripcion, categoria)
+        VALUES (new.id, new.codigo, new.descripcion,
+                (SELECT name FROM item_groups WHERE id = new.item_group_id));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_update
+    AFTER UPDATE OF codigo, descripcion, item_group_id ON products BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, codigo, descripcion, categoria)
+        VALUES (new.id, new.codigo, new.descripcion,
+                (SELECT name FROM item_groups WHERE id = new.item_group_id));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_category_rename
+    AFTER UPDATE OF name ON item_groups BEGIN
+        UPDATE {FTS_TABLE} SET categoria = new.name
+        WHERE rowid IN (SELECT id FROM products WHERE item_group_id = new.id);
+    END
+    """,
+]
+
+REBUILD_STATEMENTS = [
+    f"DELETE FROM {FTS_TABLE}",
+    f"""
+    INSERT INTO {FTS_TABLE} (rowid, codigo, descripcion, categoria)
+    SELECT products.id, products.codigo, products.descripcion, item_groups.name
+    FROM products LEFT JOIN item_groups ON item_groups.id = products.item_group_id
+    """,
+]
+
+# Create the index with the products table (db.create_all) on SQLite only
+for statement in CREATE_STATEMENTS:
+    event.listen(Product.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+event.listen(
+    Product.__table__, 'after_drop',
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect='sqlite')
+)
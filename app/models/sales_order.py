@@ -3,6 +3,7 @@ Sales Order model for managing customer orders.
 """
 from datetime import datetime, date
 from app.extensions import db
+from app.models.indexes import active_index
 
 
 class SalesOrder(db.Model):
@@ -58,6 +59,14 @@ class SalesOrder(db.Model):
     creator = db.relationship('User', foreign_keys=[created_by], backref='created_sales_orders')
     updater = db.relationship('User', foreign_keys=[updated_by], backref='updated_sales_orders')
     
+    # Indexes matching the order lists, newest first
+    __table_args__ = (
+        active_index('idx_sales_order_active_status_date', 'status', 'order_date'),
+        active_index('idx_sales_order_active_customer_date', 'customer_id', 'order_date'),
+        active_index('idx_sales_order_active_date', 'order_date'),
+        active_index('idx_sales_order_active_created', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<SalesOrder {self.order_number}>'
     
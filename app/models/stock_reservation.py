@@ -0,0 +1,61 @@
+"""
+Stock reservation model for quantities held by confirmed sales orders.
+"""
+from datetime import datetime
+from app.extensions import db
+
+
+class StockReservation(db.Model):
+    """Quantity of a product held for a sales order until it ships or is cancelled."""
+    
+    __tablename__ = 'stock_reservations'
+    
+    # Reservation statuses
+    STATUS_ACTIVE = 'ACTIVE'
+    STATUS_RELEASED = 'RELEASED'
+    STATUS_FULFILLED = 'FULFILLED'
+    
+    # Primary key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Foreign keys
+    sales_order_id = db.Column(db.Integer, db.ForeignKey('sales_orders.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    
+    # Reservation information
+    quantity = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_ACTIVE)
+    
+    # Audit fields
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    closed_at = db.Column(db.DateTime, nullable=True)
+    
+    # Relationships
+    product = db.relationship('Product')
+    
+    # Constraints
+    __table_args__ = (
+        db.CheckConstraint('quantity > 0', name='check_reservation_quantity_positive'),
+        db.CheckConstraint(
+            "status IN ('ACTIVE', 'RELEASED', 'FULFILLED')",
+            name='check_reservation_status_valid'
+        ),
+        db.Index('idx_reservation_order_status', 'sales_order_id', 'status'),
+        db.Index('idx_reservation_product_status', 'product_id', 'status'),
+    )
+    
+    def __repr__(self):
+        return f'<StockReservation order:{self.sales_order_id} product:{self.product_id} {self.quantity} - {self.status}>'
+    
+    def to_dict(self):
+        """Convert reservation to dictionary."""
+        return {
+            'id': self.id,
+            'sales_order_id': self.sales_order_id,
+            'product_id': self.product_id,
+            'quantity': self.quantity,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'closed_at': self.closed_at.isoformat() if self.closed_at else None
+        }
@@ -0,0 +1,44 @@
+"""
+Stock snapshot model with per-product daily closing balances.
+"""
+from datetime import datetime
+from app.extensions import db
+
+
+class StockSnapshot(db.Model):
+    """Closing stock of a product at the end of a closed day."""
+    
+    __tablename__ = 'stock_snapshots'
+    
+    # Primary key
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Snapshot information
+    producto_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False, index=True)
+    closing_qty = db.Column(db.Integer, default=0, nullable=False)
+    closing_value = db.Column(db.Numeric(14, 2), default=0.0, nullable=False)  # USD at close
+    
+    # Audit fields
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    producto = db.relationship('Product', backref=db.backref('snapshots', lazy='dynamic'))
+    
+    # Constraints
+    __table_args__ = (
+        db.UniqueConstraint('producto_id', 'fecha', name='uq_snapshot_product_date'),
+    )
+    
+    def __repr__(self):
+        return f'<StockSnapshot Product:{self.producto_id} {self.fecha}: {self.closing_qty}>'
+    
+    def to_dict(self):
+        """Convert snapshot to dictionary."""
+        return {
+            'id': self.id,
+            'producto_id': self.producto_id,
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'closing_qty': self.closing_qty,
+            'closing_value': float(self.closing_value) if self.closing_value else 0.0
+        }
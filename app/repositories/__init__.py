@@ -1,5 +1,7 @@
 # Repositories package
-from app.repositories.base_repository import BaseRepository, PaginatedResult
+from app.repositories.base_repository import (
+    BaseRepository, PaginatedResult, CursorPaginatedResult, read_only_query
+)
 from app.repositories.product_repository import ProductRepository
 from app.repositories.supplier_repository import SupplierRepository
 from app.repositories.movement_repository import MovementRepository
@@ -11,6 +13,8 @@ from app.repositories.sales_order_repository import SalesOrderRepository
 __all__ = [
     'BaseRepository',
     'PaginatedResult',
+    'CursorPaginatedResult',
+    'read_only_query',
     'ProductRepository',
     'SupplierRepository',
     'MovementRepository',
@@ -2,10 +2,10 @@
 Audit log repository.
 """
 from datetime import date
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from sqlalchemy.exc import SQLAlchemyError
 from app.models.audit_log import AuditLog
-from app.repositories.base_repository import BaseRepository, PaginatedResult
+from app.repositories.base_repository import BaseRepository, PaginatedResult, read_only_query
 from app.extensions import db
 from app.utils.exceptions import DatabaseError
 
@@ -16,9 +16,11 @@ class AuditRepository(BaseRepository[AuditLog]):
     def __init__(self):
         super().__init__(AuditLog)
     
+    @read_only_query
     def search_logs(self, filters: Dict[str, Any], 
-                   page: int = 1, per_page: int = 50) -> PaginatedResult[AuditLog]:
-        """Search audit logs with filters."""
+                   page: int = 1, per_page: int = 50,
+                   cursor: Optional[str] = None, keyset: bool = False) -> PaginatedResult[AuditLog]:
+        """Search audit logs with filters (keyset pages seek on timestamp, id)."""
         try:
             q = db.session.query(AuditLog)
             
@@ -33,10 +35,10 @@ class AuditRepository(BaseRepository[AuditLog]):
             if 'end_date' in filters and filters['end_date']:
                 q = q.filter(AuditLog.timestamp <= filters['end_date'])
             
-            q = q.order_by(AuditLog.timestamp.desc())
-            
-            total = q.count()
-            items = q.offset((page - 1) * per_page).limit(per_page).all()
-            return PaginatedResult(items, total, page, per_page)
+            if keyset or cursor is not None:
+                return self.paginate_keyset(
+                    q, [(AuditLog.timestamp, True), (AuditLog.id, True)], cursor, per_page
+                )
+            return self.paginate(q.order_by(AuditLog.timestamp.desc()), page, per_page)
         except SQLAlchemyError as e:
             raise DatabaseError("Error searching audit logs", e)
@@ -2,17 +2,45 @@
 Base repository with common CRUD operations.
 Provides generic data access patterns for all repositories.
 """
-from typing import TypeVar, Generic, Type, Optional, List, Dict, Any
+import base64
+import binascii
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import wraps
+from typing import TypeVar, Generic, Type, Optional, List, Dict, Any, Tuple
+from sqlalchemy import and_, or_, tuple_
 from sqlalchemy.exc import SQLAlchemyError
-from app.extensions import db
-from app.utils.exceptions import DatabaseError, NotFoundError
+from app.extensions import db, cache, read_only
+from app.utils.exceptions import DatabaseError, NotFoundError, ValidationError
+from app.utils.metrics import record_cache_lookup
 
 T = TypeVar('T')
 
+# Seconds a cached keyset total is reused
+COUNT_CACHE_TIMEOUT = 60
+
+
+def read_only_query(method):
+    """
+    Run a method's SELECTs on the read replica, when one is configured.
+
+    For searches, reports and dashboards that tolerate replication lag;
+    see app.extensions.read_only.
+    """
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with read_only():
+            return method(*args, **kwargs)
+    return wrapper
+
 
 class PaginatedResult(Generic[T]):
     """Container for paginated query results."""
     
+    is_keyset = False
+    
     def __init__(self, items: List[T], total: int, page: int, per_page: int):
         self.items = items
         self.total = total
@@ -61,6 +89,112 @@ class PaginatedResult(Generic[T]):
         }
 
 
+class CursorPaginatedResult(PaginatedResult[T]):
+    """
+    Keyset (cursor) paginated results.
+
+    Pages are reached through opaque next/prev cursors instead of page
+    numbers. The total is optional: exact, cached for COUNT_CACHE_TIMEOUT
+    seconds, or None when it was not counted. Page number attributes are
+    kept so templates written for PaginatedResult still render.
+    """
+
+    is_keyset = True
+
+    def __init__(self, items: List[T], per_page: int, page: int = 1,
+                 next_cursor: Optional[str] = None, prev_cursor: Optional[str] = None,
+                 total: Optional[int] = None, total_is_cached: bool = False):
+        super().__init__(items, total or 0, page, per_page)
+        self.total = total
+        self.total_is_cached = total_is_cached
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.has_prev = prev_cursor is not None
+        self.has_next = next_cursor is not None
+        self.prev_num = page - 1 if self.has_prev else None
+        self.next_num = page + 1 if self.has_next else None
+        if total is None:
+            self.pages = page + 1 if self.has_next else page
+        else:
+            self.pages = max(self.pages, self.next_num or page)
+
+    def iter_pages(self, *args, **kwargs):
+        """Only the current page can be linked without a cursor."""
+        yield self.page
+
+    def to_dict(self):
+        """Convert to dictionary, including the cursors."""
+        data = super().to_dict()
+        data.update({
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'total_is_cached': self.total_is_cached
+        })
+        return data
+
+
+def _encode_cursor(direction: str, page: int, values: List[Any]) -> str:
+    """Pack a seek position into an opaque URL-safe token."""
+    def plain(value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    payload = json.dumps([direction, page, [plain(value) for value in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(token: str, keys: List[Tuple[Any, bool]]) -> Tuple[str, int, List[Any]]:
+    """
+    Unpack a cursor token built by _encode_cursor.
+
+    Raises:
+        ValidationError: If the token is malformed or does not match the keys
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, page, raw_values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if direction not in ('n', 'p') or len(raw_values) != len(keys):
+            raise ValueError(token)
+
+        values = []
+        for (column, _), value in zip(keys, raw_values):
+            python_type = column.type.python_type
+            if python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+            elif python_type is Decimal:
+                value = Decimal(value)
+            values.append(value)
+        return direction, int(page), values
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise ValidationError('Cursor de paginación inválido', field='cursor')
+
+
+def _seek_condition(keys: List[Tuple[Any, bool]], values: List[Any], forward: bool):
+    """
+    Build the WHERE clause that starts after (or before) a seek position.
+
+    Keys sorted in one direction use a row value comparison, which SQLite
+    and PostgreSQL resolve with a composite index; mixed directions expand
+    to the equivalent OR of prefixes.
+    """
+    def beyond(column, value, descending):
+        return column < value if descending == forward else column > value
+
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1:
+        columns = tuple_(*[column for column, _ in keys])
+        return beyond(columns, tuple_(*values), directions.pop())
+
+    clauses = []
+    for index, (column, descending) in enumerate(keys):
+        equal_prefix = [keys[j][0] == values[j] for j in range(index)]
+        clauses.append(and_(*equal_prefix, beyond(column, values[index], descending)))
+    return or_(*clauses)
+
+
 class BaseRepository(Generic[T]):
     """Base repository with common CRUD operations."""
     
@@ -88,25 +222,115 @@ class BaseRepository(Generic[T]):
         except SQLAlchemyError as e:
             raise DatabaseError(f"Error retrieving {self.model.__name__}", e)
     
-    def get_all(self, page: int = 1, per_page: int = 20) -> PaginatedResult[T]:
+    def get_all(self, page: int = 1, per_page: int = 20,
+                cursor: Optional[str] = None, keyset: bool = False) -> PaginatedResult[T]:
         """
         Get all entities with pagination.
         
         Args:
             page: Page number (1-indexed)
             per_page: Items per page
+            cursor: Keyset cursor from a previous page (implies keyset)
+            keyset: Seek on id instead of counting and offsetting
             
         Returns:
             Paginated result
         """
         try:
             query = db.session.query(self.model)
-            total = query.count()
-            items = query.offset((page - 1) * per_page).limit(per_page).all()
-            return PaginatedResult(items, total, page, per_page)
+            if keyset or cursor is not None:
+                return self.paginate_keyset(query, [(self.model.id, False)], cursor, per_page)
+            return self.paginate(query, page, per_page)
         except SQLAlchemyError as e:
             raise DatabaseError(f"Error retrieving {self.model.__name__} list", e)
     
+    def paginate(self, query, page: int, per_page: int) -> PaginatedResult[T]:
+        """
+        Paginate an ordered query with COUNT plus OFFSET/LIMIT.
+        
+        Args:
+            query: SQLAlchemy query
+            page: Page number (1-indexed)
+            per_page: Items per page
+            
+        Returns:
+            Paginated result
+        """
+        total = query.count()
+        items = query.offset((page - 1) * per_page).limit(per_page).all()
+        return PaginatedResult(items, total, page, per_page)
+    
+    def paginate_keyset(self, query, keys: List[Tuple[Any, bool]], cursor: Optional[str] = None,
+                        per_page: int = 20, total: Optional[str] = 'cached') -> CursorPaginatedResult[T]:
+        """
+        Paginate a query by seeking on its sort keys instead of offsetting.
+        
+        Each page costs the same regardless of depth. The last key must
+        make the order unique (usually the primary key) and keys must not
+        be nullable.
+        
+        Args:
+            query: Unordered SQLAlchemy query over the repository model
+            keys: (column, descending) pairs, e.g. [(Model.fecha, True), (Model.id, True)]
+            cursor: Token from a previous page's next_cursor/prev_cursor
+            per_page: Items per page
+            total: 'exact' to count, 'cached' to reuse a recent count, None to skip it
+            
+        Returns:
+            Cursor paginated result
+            
+        Raises:
+            ValidationError: If the cursor is invalid
+        """
+        count_query = query
+        forward, page = True, 1
+        if cursor:
+            direction, page, values = _decode_cursor(cursor, keys)
+            forward = direction == 'n'
+            query = query.filter(_seek_condition(keys, values, forward))
+        
+        ordering = [
+            column.desc() if descending == forward else column.asc()
+            for column, descending in keys
+        ]
+        rows = query.order_by(*ordering).limit(per_page + 1).all()
+        more = len(rows) > per_page
+        items = rows[:per_page]
+        if not forward:
+            items.reverse()
+        
+        def position(item):
+            return [getattr(item, column.key) for column, _ in keys]
+        
+        next_cursor = prev_cursor = None
+        if items:
+            if more if forward else page > 0:
+                next_cursor = _encode_cursor('n', page + 1, position(items[-1]))
+            if (page > 1 or cursor) if forward else more:
+                prev_cursor = _encode_cursor('p', page - 1, position(items[0]))
+        
+        counted = None
+        if total == 'exact':
+            counted = count_query.count()
+        elif total == 'cached':
+            counted = self._cached_count(count_query)
+        
+        return CursorPaginatedResult(items, per_page, page, next_cursor, prev_cursor,
+                                     counted, total_is_cached=total == 'cached')
+    
+    def _cached_count(self, query) -> int:
+        """Count a query, reusing the result for COUNT_CACHE_TIMEOUT seconds."""
+        compiled = query.statement.compile(dialect=db.engine.dialect)
+        fingerprint = f"{compiled}|{sorted(compiled.params.items(), key=str)}"
+        key = 'count:' + hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+        
+        total = cache.get(key)
+        record_cache_lookup('count', total is not None)
+        if total is None:
+            total = query.count()
+            cache.set(key, total, timeout=COUNT_CACHE_TIMEOUT)
+        return total
+    
     def get_all_list(self) -> List[T]:
         """
         Get all entities as a simple list (no pagination).
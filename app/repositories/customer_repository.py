@@ -3,7 +3,7 @@ Customer Repository - Data access for customers.
 """
 from typing import Optional
 from app.models.customer import Customer
-from app.repositories.base_repository import BaseRepository
+from app.repositories.base_repository import BaseRepository, read_only_query
 
 
 class CustomerRepository(BaseRepository[Customer]):
@@ -49,8 +49,9 @@ class CustomerRepository(BaseRepository[Customer]):
             PaginatedResult with customers
         """
         query = self.model.query.filter_by(is_active=True, deleted_at=None)
-        return self._paginate(query, page, per_page)
+        return self.paginate(query, page, per_page)
     
+    @read_only_query
     def search_customers(self, query: str, page: int = 1, per_page: int = 20):
         """
         Search customers by name, email, or tax ID.
@@ -70,7 +71,7 @@ class CustomerRepository(BaseRepository[Customer]):
              self.model.email.like(search) |
              self.model.tax_id.like(search))
         )
-        return self._paginate(db_query, page, per_page)
+        return self.paginate(db_query, page, per_page)
     
     def get_all_list(self):
         """
@@ -1,8 +1,11 @@
 """
 Item Group Repository - Data access for item groups/categories.
 """
-from typing import Optional, List
+from typing import Dict, Optional, List
+from sqlalchemy import select
 from app.models.item_group import ItemGroup
+from app.models.item_group_closure import ItemGroupClosure
+from app.extensions import db
 from app.repositories.base_repository import BaseRepository
 
 
@@ -46,6 +49,60 @@ class ItemGroupRepository(BaseRepository[ItemGroup]):
         """
         return self.model.query.filter_by(parent_id=parent_id, deleted_at=None).all()
     
+    def get_subtree_ids(self, root_id: int) -> List[int]:
+        """
+        Get the IDs of a group and all its active descendants from the closure table.
+        
+        Args:
+            root_id: Root group ID
+            
+        Returns:
+            Group IDs, empty if the root does not exist or is deleted
+        """
+        root_active = select(ItemGroup.id).where(ItemGroup.id == root_id, ItemGroup.deleted_at.is_(None)).exists()
+        return list(db.session.scalars(
+            select(ItemGroupClosure.descendant_id)
+            .join(ItemGroup, ItemGroup.id == ItemGroupClosure.descendant_id)
+            .where(ItemGroupClosure.ancestor_id == root_id, ItemGroup.deleted_at.is_(None), root_active)
+        ))
+    
+    def is_descendant(self, group_id: int, ancestor_id: int) -> bool:
+        """
+        Check whether a group is ancestor_id itself or lies below it.
+        
+        Args:
+            group_id: Group to check
+            ancestor_id: Possible ancestor
+            
+        Returns:
+            True if group_id is in the subtree of ancestor_id
+        """
+        return db.session.scalar(
+            select(ItemGroupClosure.depth)
+            .where(ItemGroupClosure.ancestor_id == ancestor_id, ItemGroupClosure.descendant_id == group_id)
+        ) is not None
+    
+    def get_ancestor_names(self, group_ids: List[int]) -> Dict[int, List[str]]:
+        """
+        Get the names along each group's path in one closure-table query.
+        
+        Args:
+            group_ids: Groups to resolve
+            
+        Returns:
+            Names from the root down to the group itself, by group ID
+        """
+        names: Dict[int, List[str]] = {group_id: [] for group_id in group_ids}
+        rows = db.session.execute(
+            select(ItemGroupClosure.descendant_id, ItemGroup.name)
+            .join(ItemGroup, ItemGroup.id == ItemGroupClosure.ancestor_id)
+            .where(ItemGroupClosure.descendant_id.in_(group_ids))
+            .order_by(ItemGroupClosure.descendant_id, ItemGroupClosure.depth.desc())
+        )
+        for group_id, name in rows:
+            names[group_id].append(name)
+        return names
+    
     def get_active_groups(self) -> List[ItemGroup]:
         """
         Get all active groups (not deleted).
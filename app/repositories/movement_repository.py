@@ -2,7 +2,9 @@
 Movement repository.
 """
 from datetime import date
-from typing import List
+from typing import Any, Dict, List, Optional
+from sqlalchemy import case, func, insert
+from sqlalchemy.orm import aliased
 from sqlalchemy.exc import SQLAlchemyError
 from app.models.movement import Movimiento
 from app.repositories.base_repository import BaseRepository, PaginatedResult
@@ -17,29 +19,106 @@ class MovementRepository(BaseRepository[Movimiento]):
         super().__init__(Movimiento)
     
     def get_by_date_range(self, start_date: date, end_date: date, 
-                         page: int = 1, per_page: int = 50) -> PaginatedResult[Movimiento]:
-        """Get movements by date range."""
+                         page: int = 1, per_page: int = 50,
+                         cursor: Optional[str] = None, keyset: bool = False) -> PaginatedResult[Movimiento]:
+        """Get movements by date range (keyset pages seek on fecha, id)."""
         try:
             q = db.session.query(Movimiento).filter(
                 Movimiento.fecha >= start_date,
                 Movimiento.fecha <= end_date
-            ).order_by(Movimiento.fecha.desc())
+            )
             
-            total = q.count()
-            items = q.offset((page - 1) * per_page).limit(per_page).all()
-            return PaginatedResult(items, total, page, per_page)
+            if keyset or cursor is not None:
+                return self.paginate_keyset(
+                    q, [(Movimiento.fecha, True), (Movimiento.id, True)], cursor, per_page
+                )
+            return self.paginate(q.order_by(Movimiento.fecha.desc()), page, per_page)
         except SQLAlchemyError as e:
             raise DatabaseError("Error retrieving movements by date range", e)
     
-    def get_by_product(self, producto_id: int) -> List[Movimiento]:
-        """Get all movements by product (no pagination)."""
+    def create_many(self, rows: List[Dict[str, Any]]) -> List[Movimiento]:
+        """
+        Insert many movements in one bulk statement without committing.
+        
+        Args:
+            rows: Column values of each movement
+            
+        Returns:
+            Created movements, in row order
+        """
         try:
-            return db.session.query(Movimiento).filter(
-                Movimiento.producto_id == producto_id
-            ).order_by(Movimiento.fecha.desc()).all()
+            # Ids are assigned in VALUES order; sorting by id restores row
+            # order without sort_by_parameter_order, which makes SQLite
+            # fall back to one INSERT per row
+            movements = db.session.scalars(insert(Movimiento).returning(Movimiento), rows).all()
+            return sorted(movements, key=lambda movement: movement.id)
+        except SQLAlchemyError as e:
+            raise DatabaseError("Error creating movements", e)
+    
+    def get_by_product(self, producto_id: int, start_date: Optional[date] = None,
+                       end_date: Optional[date] = None) -> List[Movimiento]:
+        """Get movements by product, optionally within dates (no pagination)."""
+        try:
+            q = db.session.query(Movimiento).filter(Movimiento.producto_id == producto_id)
+            if start_date:
+                q = q.filter(Movimiento.fecha >= start_date)
+            if end_date:
+                q = q.filter(Movimiento.fecha <= end_date)
+            return q.order_by(Movimiento.fecha.desc()).all()
         except SQLAlchemyError as e:
             raise DatabaseError(f"Error retrieving movements for product {producto_id}", e)
     
+    def get_ledger(self, producto_id: int, start_date: Optional[date] = None,
+                   end_date: Optional[date] = None, opening_balance: int = 0,
+                   page: int = 1, per_page: int = 50) -> PaginatedResult:
+        """
+        Get a product's movements with their running balance, newest first.
+        
+        The balance is a window SUM over the date range in (fecha, id)
+        order, so the database walks idx_movement_product_date once and
+        only the requested page is loaded. An AJUSTE sets the stock, so
+        the window restarts at each one: rows are partitioned by the
+        number of AJUSTE rows up to them, and only the partition before
+        the first AJUSTE starts from the opening balance.
+        
+        Args:
+            producto_id: Product ID
+            start_date: First day (inclusive)
+            end_date: Last day (inclusive)
+            opening_balance: Stock at the start of start_date
+            page: Page number
+            per_page: Items per page
+            
+        Returns:
+            Paginated (Movimiento, saldo) rows
+        """
+        try:
+            order = (Movimiento.fecha, Movimiento.id)
+            resets = func.count(case((Movimiento.is_adjustment(), 1))).over(
+                order_by=order, rows=(None, 0)
+            )
+            rows = db.session.query(Movimiento, resets.label('resets')).filter(
+                Movimiento.producto_id == producto_id,
+                Movimiento.deleted_at.is_(None)
+            )
+            if start_date:
+                rows = rows.filter(Movimiento.fecha >= start_date)
+            if end_date:
+                rows = rows.filter(Movimiento.fecha <= end_date)
+            rows = rows.subquery()
+            movement = aliased(Movimiento, rows)
+            
+            saldo = func.sum(movement.balance_quantity()).over(
+                partition_by=rows.c.resets,
+                order_by=(movement.fecha, movement.id), rows=(None, 0)
+            ) + case((rows.c.resets == 0, opening_balance), else_=0)
+            q = db.session.query(movement, saldo.label('saldo')).order_by(
+                movement.fecha.desc(), movement.id.desc()
+            )
+            return self.paginate(q, page, per_page)
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Error retrieving ledger for product {producto_id}", e)
+    
     def get_by_product_paginated(self, producto_id: int, 
                                  page: int = 1, per_page: int = 50) -> PaginatedResult[Movimiento]:
         """Get movements by product with pagination."""
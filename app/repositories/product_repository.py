@@ -1,31 +1,117 @@
 """
 Product repository with specialized query methods.
 """
+import re
+from datetime import datetime
 from typing import List, Optional, Dict, Any
-from sqlalchemy import or_
+from sqlalchemy import func, or_, select, table, literal_column, text, update
 from sqlalchemy.exc import SQLAlchemyError
 from app.models.product import Product
-from app.repositories.base_repository import BaseRepository, PaginatedResult
+from app.models.product_search import FTS_TABLE, REBUILD_STATEMENTS
+from app.repositories.base_repository import BaseRepository, PaginatedResult, read_only_query
 from app.extensions import db
 from app.utils.exceptions import DatabaseError
 
 
+# Full-text columns searched for each search_by value
+FTS_COLUMNS = {
+    'codigo': '{codigo}',
+    'descripcion': '{descripcion}',
+}
+
+# bm25 weights for codigo, descripcion, categoria
+FTS_WEIGHTS = '10.0, 5.0, 1.0'
+
+
 class ProductRepository(BaseRepository[Product]):
     """Product repository with specialized queries."""
     
     def __init__(self):
         super().__init__(Product)
     
+    @staticmethod
+    def build_match_expression(query: str, search_by: str = 'all') -> Optional[str]:
+        """
+        Build an FTS5 MATCH expression from user input.
+        
+        Every word becomes a prefix phrase ("E-SO" -> "e so"*) and all
+        words must match. Quotes and operators in the input are dropped.
+        
+        Args:
+            query: Search text
+            search_by: 'codigo', 'descripcion' or 'all'
+            
+        Returns:
+            MATCH expression, or None if the text has no searchable tokens
+        """
+        phrases = []
+        for word in query.split():
+            tokens = re.findall(r'[^\W_]+', word)
+            if tokens:
+                phrases.append(f'"{" ".join(tokens)}"*')
+        if not phrases:
+            return None
+        
+        expression = ' '.join(phrases)
+        columns = FTS_COLUMNS.get(search_by)
+        return f'{columns} : ({expression})' if columns else expression
+    
+    def has_search_index(self) -> bool:
+        """Check if the products full-text index exists (SQLite with FTS5)."""
+        if db.engine.dialect.name != 'sqlite':
+            return False
+        return db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': FTS_TABLE}
+        ).first() is not None
+    
+    def rebuild_search_index(self) -> int:
+        """
+        Refill the full-text index from the products table.
+        
+        Returns:
+            Number of indexed products
+            
+        Raises:
+            DatabaseError: If the index does not exist or the rebuild fails
+        """
+        try:
+            for statement in REBUILD_STATEMENTS:
+                db.session.execute(text(statement))
+            db.session.commit()
+            return db.session.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise DatabaseError("Error rebuilding product search index", e)
+    
+    def _search_matches(self, match: str):
+        """Build a subquery of (product_id, rank) for a MATCH expression."""
+        fts = table(FTS_TABLE)
+        return select(
+            literal_column('rowid').label('product_id'),
+            literal_column(f'bm25({FTS_TABLE}, {FTS_WEIGHTS})').label('rank')
+        ).select_from(fts).where(
+            literal_column(FTS_TABLE).op('MATCH')(match)
+        ).subquery('matches')
+    
+    @read_only_query
     def search_products(self, query: str, filters: Dict[str, Any] = None, 
-                       page: int = 1, per_page: int = 20) -> PaginatedResult[Product]:
+                       page: int = 1, per_page: int = 20,
+                       cursor: Optional[str] = None, keyset: bool = False) -> PaginatedResult[Product]:
         """
         Search products with filters and pagination.
         
+        Uses the ranked full-text index when it exists, otherwise a
+        case-insensitive substring match. Keyset pages are ordered by
+        codigo instead of rank, since rank is not a stable seek key.
+        
         Args:
-            query: Search query for codigo or descripcion
-            filters: Additional filters (search_by, item_group_id, proveedor_id, etc.)
+            query: Search query for codigo, descripcion or category name
+            filters: Additional filters (search_by, item_group_id, code_prefix, proveedor_id, etc.)
             page: Page number
             per_page: Items per page
+            cursor: Keyset cursor from a previous page (implies keyset)
+            keyset: Seek on (codigo, id) instead of counting and offsetting
             
         Returns:
             Paginated result
@@ -39,9 +125,15 @@ class ProductRepository(BaseRepository[Product]):
             q = q.options(joinedload(Product.item_group), joinedload(Product.proveedor))
             
             # Search based on search_by filter
-            if query:
-                search_by = filters.get('search_by', 'all') if filters else 'all'
-                
+            search_by = filters.get('search_by', 'all') if filters else 'all'
+            match = self.build_match_expression(query, search_by) if query else None
+            matches = None
+            
+            if match and self.has_search_index():
+                # Ranked full-text search
+                matches = self._search_matches(match)
+                q = q.join(matches, matches.c.product_id == Product.id)
+            elif query:
                 if search_by == 'codigo':
                     # Search only by codigo
                     q = q.filter(Product.codigo.ilike(f'%{query}%'))
@@ -62,6 +154,10 @@ class ProductRepository(BaseRepository[Product]):
                 if 'item_group_id' in filters and filters['item_group_id']:
                     q = q.filter(Product.item_group_id == filters['item_group_id'])
                 
+                # Filter by code prefix (rubro)
+                if filters.get('code_prefix'):
+                    q = q.filter(Product.codigo.like(f"{filters['code_prefix']}-%"))
+                
                 # Filter by supplier
                 if 'proveedor_id' in filters and filters['proveedor_id']:
                     q = q.filter(Product.proveedor_id == filters['proveedor_id'])
@@ -72,16 +168,164 @@ class ProductRepository(BaseRepository[Product]):
                 if 'max_stock' in filters:
                     q = q.filter(Product.stock <= filters['max_stock'])
             
-            # Order by codigo
-            q = q.order_by(Product.codigo)
+            if keyset or cursor is not None:
+                return self.paginate_keyset(
+                    q, [(Product.codigo, False), (Product.id, False)], cursor, per_page
+                )
             
-            total = q.count()
-            items = q.offset((page - 1) * per_page).limit(per_page).all()
+            # Best matches first for full-text searches, otherwise by codigo
+            if matches is not None:
+                q = q.order_by(matches.c.rank, Product.codigo)
+            else:
+                q = q.order_by(Product.codigo)
             
-            return PaginatedResult(items, total, page, per_page)
+            return self.paginate(q, page, per_page)
         except SQLAlchemyError as e:
             raise DatabaseError("Error searching products", e)
     
+    def get_active_by_keys(self, ids=(), codigos=()) -> List[Product]:
+        """
+        Get active products matching any of several ids or codes in one query.
+        
+        Args:
+            ids: Product IDs
+            codigos: Product codes
+            
+        Returns:
+            Matching products
+        """
+        if not ids and not codigos:
+            return []
+        try:
+            return db.session.query(Product).filter(
+                Product.deleted_at.is_(None),
+                or_(Product.id.in_(list(ids)), Product.codigo.in_(list(codigos)))
+            ).all()
+        except SQLAlchemyError as e:
+            raise DatabaseError("Error retrieving products", e)
+    
+    def adjust_stock(self, product_id: int, delta: int, user_id: Optional[int] = None) -> Optional[int]:
+        """
+        Add delta to a product's stock in one conditional UPDATE.
+        
+        The check and the write happen in the database, so concurrent
+        workers cannot lose updates or drive stock negative. Removals
+        cannot take units reserved for confirmed sales orders. The caller
+        owns the transaction and commits it with its other writes.
+        
+        Args:
+            product_id: Product ID
+            delta: Units to add (negative to remove)
+            user_id: ID of user making the change
+            
+        Returns:
+            New stock, or None if the product does not exist or the
+            stock would drop below the reserved quantity
+        """
+        floor = Product.reserved if delta < 0 else 0
+        try:
+            return db.session.execute(
+                update(Product)
+                .where(
+                    Product.id == product_id,
+                    Product.deleted_at.is_(None),
+                    Product.stock + delta >= floor
+                )
+                .values(stock=Product.stock + delta, updated_by=user_id, updated_at=datetime.utcnow())
+                .returning(Product.stock)
+            ).scalar()
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Error updating stock for product {product_id}", e)
+    
+    def set_stock(self, product_id: int, stock: int, user_id: Optional[int] = None) -> Optional[int]:
+        """
+        Overwrite a product's stock (inventory count adjustment) without committing.
+        
+        Like adjust_stock, the count cannot leave fewer units than are
+        reserved for confirmed sales orders.
+        
+        Args:
+            product_id: Product ID
+            stock: Counted stock
+            user_id: ID of user making the change
+            
+        Returns:
+            New stock, or None if the product does not exist or the
+            count is below the reserved quantity
+        """
+        try:
+            return db.session.execute(
+                update(Product)
+                .where(
+                    Product.id == product_id,
+                    Product.deleted_at.is_(None),
+                    Product.reserved <= stock
+                )
+                .values(stock=stock, updated_by=user_id, updated_at=datetime.utcnow())
+                .returning(Product.stock)
+            ).scalar()
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Error updating stock for product {product_id}", e)
+    
+    def _scope_conditions(self, item_group_ids: Optional[List[int]] = None,
+                          product_ids: Optional[List[int]] = None) -> list:
+        """Filter active products, optionally by category or explicit IDs."""
+        conditions = [Product.deleted_at.is_(None)]
+        if item_group_ids is not None:
+            conditions.append(Product.item_group_id.in_(item_group_ids))
+        if product_ids is not None:
+            conditions.append(Product.id.in_(product_ids))
+        return conditions
+    
+    def count_factors(self, item_group_ids: Optional[List[int]] = None,
+                      product_ids: Optional[List[int]] = None) -> Dict[str, int]:
+        """
+        Count active products per adjustment factor within a scope.
+        
+        Args:
+            item_group_ids: Only products in these categories
+            product_ids: Only these products
+            
+        Returns:
+            Number of products by factor, e.g. {'1.00': 120, '1.10': 4}
+        """
+        try:
+            rows = db.session.execute(
+                select(Product.factor_ajuste, func.count())
+                .where(*self._scope_conditions(item_group_ids, product_ids))
+                .group_by(Product.factor_ajuste)
+            )
+            return {f'{factor:.2f}': count for factor, count in rows}
+        except SQLAlchemyError as e:
+            raise DatabaseError("Error counting product factors", e)
+    
+    def apply_factor(self, factor, user_id: Optional[int] = None,
+                     item_group_ids: Optional[List[int]] = None,
+                     product_ids: Optional[List[int]] = None) -> int:
+        """
+        Set the adjustment factor of active products with one UPDATE, without committing.
+        
+        With no scope every active product is updated.
+        
+        Args:
+            factor: New adjustment factor
+            user_id: ID of user making the change
+            item_group_ids: Only products in these categories
+            product_ids: Only these products
+            
+        Returns:
+            Number of products updated
+        """
+        try:
+            result = db.session.execute(
+                update(Product)
+                .where(*self._scope_conditions(item_group_ids, product_ids))
+                .values(factor_ajuste=factor, updated_by=user_id, updated_at=datetime.utcnow())
+            )
+            return result.rowcount
+        except SQLAlchemyError as e:
+            raise DatabaseError("Error applying adjustment factor", e)
+    
     def get_low_stock_products(self, threshold: int = 10, 
                               page: int = 1, per_page: int = 20) -> PaginatedResult[Product]:
         """
@@ -2,9 +2,13 @@
 Sales Order Repository - Data access for sales orders.
 """
 from typing import Optional, List
-from datetime import date
+from datetime import date, datetime
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
 from app.models.sales_order import SalesOrder
 from app.repositories.base_repository import BaseRepository
+from app.extensions import db
+from app.utils.exceptions import DatabaseError
 
 
 class SalesOrderRepository(BaseRepository[SalesOrder]):
@@ -41,7 +45,7 @@ class SalesOrderRepository(BaseRepository[SalesOrder]):
         query = self.model.query.filter_by(customer_id=customer_id, deleted_at=None).order_by(
             self.model.order_date.desc()
         )
-        return self._paginate(query, page, per_page)
+        return self.paginate(query, page, per_page)
     
     def get_by_status(self, status: str, page: int = 1, per_page: int = 20):
         """
@@ -58,7 +62,7 @@ class SalesOrderRepository(BaseRepository[SalesOrder]):
         query = self.model.query.filter_by(status=status, deleted_at=None).order_by(
             self.model.order_date.desc()
         )
-        return self._paginate(query, page, per_page)
+        return self.paginate(query, page, per_page)
     
     def get_by_date_range(self, start_date: date, end_date: date, page: int = 1, per_page: int = 50):
         """
@@ -78,7 +82,7 @@ class SalesOrderRepository(BaseRepository[SalesOrder]):
             self.model.order_date <= end_date,
             self.model.deleted_at == None
         ).order_by(self.model.order_date.desc())
-        return self._paginate(query, page, per_page)
+        return self.paginate(query, page, per_page)
     
     def get_pending_orders(self, page: int = 1, per_page: int = 20):
         """
@@ -95,32 +99,58 @@ class SalesOrderRepository(BaseRepository[SalesOrder]):
             self.model.status.in_(['draft', 'confirmed']),
             self.model.deleted_at == None
         ).order_by(self.model.order_date.desc())
-        return self._paginate(query, page, per_page)
+        return self.paginate(query, page, per_page)
     
-    def generate_order_number(self) -> str:
+    def transition_status(self, order_id: int, from_statuses: List[str], to_status: str,
+                          user_id: Optional[int] = None) -> bool:
         """
-        Generate next order number.
+        Move an order to a new status only if it is still in one of the expected ones.
         
+        Two workers confirming or cancelling the same order race on this
+        UPDATE; only one of them sees a row changed. Not committed.
+        
+        Args:
+            order_id: Order ID
+            from_statuses: Statuses the order may be in
+            to_status: New status
+            user_id: ID of user making the change
+            
         Returns:
-            Order number in format SO-YYYYMMDD-NNNN
+            True if the order changed status
         """
-        from datetime import datetime
-        today = datetime.now()
-        prefix = f"SO-{today.strftime('%Y%m%d')}"
+        try:
+            return db.session.execute(
+                update(SalesOrder)
+                .where(
+                    SalesOrder.id == order_id,
+                    SalesOrder.deleted_at.is_(None),
+                    SalesOrder.status.in_(from_statuses)
+                )
+                .values(status=to_status, updated_by=user_id, updated_at=datetime.utcnow())
+            ).rowcount == 1
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Error updating status for order {order_id}", e)
+    
+    def get_last_order_sequence(self, prefix: str) -> int:
+        """
+        Get the highest sequence number used by orders with a number prefix.
+        
+        Only read when a day's counter is created, to continue after
+        numbers issued before document_sequences existed.
         
-        # Get last order number for today
+        Args:
+            prefix: Order number prefix (SO-YYYYMMDD)
+            
+        Returns:
+            Highest NNNN suffix in use, or 0
+        """
         last_order = self.model.query.filter(
-            self.model.order_number.like(f"{prefix}%")
+            self.model.order_number.like(f"{prefix}-%")
         ).order_by(self.model.order_number.desc()).first()
         
         if last_order:
-            # Extract sequence number and increment
             try:
-                last_seq = int(last_order.order_number.split('-')[-1])
-                next_seq = last_seq + 1
+                return int(last_order.order_number.split('-')[-1])
             except (ValueError, IndexError):
-                next_seq = 1
-        else:
-            next_seq = 1
-        
-        return f"{prefix}-{next_seq:04d}"
+                return 0
+        return 0
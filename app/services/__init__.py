@@ -10,7 +10,14 @@ from app.services.item_group_service import ItemGroupService
 from app.services.dashboard_service import DashboardService
 from app.services.customer_service import CustomerService
 from app.services.sales_order_service import SalesOrderService
+from app.services.stock_snapshot_service import StockSnapshotService
+from app.services.inventory_report_service import InventoryReportService
 from app.services.import_service import ImportService
+from app.services.job_service import JobService
+from app.services.document_sequence_service import DocumentSequenceService
+from app.services.stock_reservation_service import StockReservationService
+from app.services.pricing_service import PricingService
+from app.services.catalogue_service import CatalogueService
 
 __all__ = [
     'ValidationService',
@@ -21,5 +28,12 @@ __all__ = [
     'DashboardService',
     'CustomerService',
     'SalesOrderService',
+    'StockSnapshotService',
+    'InventoryReportService',
     'ImportService',
+    'JobService',
+    'DocumentSequenceService',
+    'StockReservationService',
+    'PricingService',
+    'CatalogueService',
 ]
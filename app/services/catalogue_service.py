@@ -0,0 +1,141 @@
+"""
+Catalogue Service - In-process snapshot of the data behind form dropdowns.
+"""
+import threading
+import time
+import weakref
+from typing import Tuple
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import Customer, ItemGroup, Product, Supplier
+from app.extensions import db
+from app.utils.exceptions import DatabaseError
+from app.utils.metrics import record_cache_lookup
+from app.utils.service_cache import tag_versions
+
+
+class _Option:
+    """Read-only record of the few columns a dropdown shows."""
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.id}>'
+
+
+class SupplierOption(_Option):
+    __slots__ = ('id', 'nombre', 'rif')
+
+
+class GroupOption(_Option):
+    __slots__ = ('id', 'name')
+
+
+class CustomerOption(_Option):
+    __slots__ = ('id', 'name', 'tax_id')
+
+
+class ProductOption(_Option):
+    # available: stock not held by confirmed orders' reservations
+    __slots__ = ('id', 'codigo', 'descripcion', 'precio_dolares', 'available')
+
+
+# Section -> (model whose commits refresh it, query, record class)
+SECTIONS = {
+    'suppliers': (
+        Supplier,
+        select(Supplier.id, Supplier.nombre, Supplier.rif)
+        .where(Supplier.deleted_at.is_(None)).order_by(Supplier.nombre),
+        SupplierOption
+    ),
+    'item_groups': (
+        ItemGroup,
+        select(ItemGroup.id, ItemGroup.name)
+        .where(ItemGroup.deleted_at.is_(None)).order_by(ItemGroup.name),
+        GroupOption
+    ),
+    'customers': (
+        Customer,
+        select(Customer.id, Customer.name, Customer.tax_id)
+        .where(Customer.deleted_at.is_(None)).order_by(Customer.name),
+        CustomerOption
+    ),
+    'products': (
+        Product,
+        select(Product.id, Product.codigo, Product.descripcion, Product.precio_dolares,
+               Product.stock - Product.reserved)
+        .where(Product.deleted_at.is_(None)).order_by(Product.codigo),
+        ProductOption
+    ),
+}
+
+# Sections loaded in this process, per database engine:
+# {section: (tag versions, loaded_at, records)}
+_snapshots = weakref.WeakKeyDictionary()
+_snapshots_lock = threading.Lock()
+
+
+class CatalogueService:
+    """
+    Service for the suppliers, categories, customers and products listed
+    in form dropdowns.
+
+    Each section is loaded once into process memory as a tuple of
+    read-only records and reused until a commit writes its model. Commits
+    replace the model's tag version in the app cache (see
+    app.utils.service_cache), so checking a section costs one cache read
+    and no query. With a per-process cache other workers cannot see those
+    versions, and reload after CATALOGUE_SNAPSHOT_MAX_AGE seconds.
+    """
+
+    def get_suppliers(self) -> Tuple[SupplierOption, ...]:
+        """Active suppliers by name."""
+        return self._section('suppliers')
+
+    def get_item_groups(self) -> Tuple[GroupOption, ...]:
+        """Active item groups by name."""
+        return self._section('item_groups')
+
+    def get_customers(self) -> Tuple[CustomerOption, ...]:
+        """Customers that are not deleted, by name."""
+        return self._section('customers')
+
+    def get_products(self) -> Tuple[ProductOption, ...]:
+        """Active products by codigo."""
+        return self._section('products')
+
+    def _section(self, name: str) -> tuple:
+        """Get a section from the snapshot, loading it if stale."""
+        model, stmt, record = SECTIONS[name]
+        # Read before loading: a commit racing the load bumps it again
+        versions = tuple(tag_versions([model.__name__]))
+        max_age = current_app.config.get('CATALOGUE_SNAPSHOT_MAX_AGE', 300)
+        engine = db.engine
+        entry = _snapshots.get(engine, {}).get(name)
+        # The open transaction sees its own uncommitted writes to the model
+        written = model.__name__ in db.session.info.get('cache_tags', ())
+        fresh = (entry is not None and entry[0] == versions and not written
+                 and time.monotonic() - entry[1] <= max_age)
+        record_cache_lookup('catalogue', fresh)
+        if not fresh:
+            try:
+                records = tuple(record(*row) for row in db.session.execute(stmt))
+            except SQLAlchemyError as e:
+                current_app.logger.error(f"Database error loading catalogue {name}: {str(e)}")
+                raise DatabaseError(f"Error al cargar el catálogo: {str(e)}")
+            entry = (versions, time.monotonic(), records)
+            # Rows written by the open transaction are not shared until committed
+            if not written:
+                with _snapshots_lock:
+                    _snapshots.setdefault(engine, {})[name] = entry
+        return entry[2]
@@ -4,34 +4,47 @@ Dashboard Service - Business logic for dashboard metrics and KPIs.
 from typing import Dict, Any
 from datetime import datetime, date, timedelta
 from flask import current_app
-from sqlalchemy import func
+from sqlalchemy import func, select, case
+from sqlalchemy.orm import joinedload
 
-from app.models import Product, SalesOrder, Customer, Movement
+from app.models import Product, SalesOrder, Customer, Movement, ItemGroup
 from app.extensions import db
+from app.repositories.base_repository import read_only_query
+from app.utils.service_cache import cached
 
 
 class DashboardService:
-    """Service for dashboard metrics and KPIs."""
+    """
+    Service for dashboard metrics and KPIs.
+    
+    Each metric block is a @cached service result tagged with the models
+    it reads, so commits touching them invalidate it.
+    """
     
     def __init__(self):
         """Initialize dashboard service."""
         pass
     
-    def get_dashboard_metrics(self) -> Dict[str, Any]:
+    @read_only_query
+    def get_dashboard_metrics(self, refresh: bool = False) -> Dict[str, Any]:
         """
         Get main dashboard metrics.
         
+        Args:
+            refresh: Recompute every block instead of reading the cache
+        
         Returns:
-            Dictionary with dashboard metrics
+            Dictionary with dashboard metrics and 'computed_at', the time
+            the oldest block was computed
         """
         try:
-            metrics = {
-                'inventory': self._get_inventory_metrics(),
-                'sales': self._get_sales_metrics(),
-                'customers': self._get_customer_metrics(),
-                'alerts': self._get_alerts(),
-                'recent_activity': self._get_recent_activity()
-            }
+            metrics = {}
+            computed = []
+            for name in ('inventory', 'sales', 'customers', 'alerts', 'recent_activity'):
+                block = getattr(DashboardService, f'_{name}_block')
+                metrics[name], computed_at = block.refresh(self) if refresh else block(self)
+                computed.append(computed_at)
+            metrics['computed_at'] = min(computed)
             
             return metrics
             
@@ -64,133 +77,125 @@ class DashboardService:
                     'count': 0,
                     'list': []
                 },
-                'recent_activity': []
+                'recent_activity': [],
+                'computed_at': datetime.now()
             }
     
+    @staticmethod
+    def _timed(value):
+        """Pair a block value with the time it was computed."""
+        return value, datetime.now()
+    
+    @cached(Product, ItemGroup, Movement)
+    def _inventory_block(self):
+        """Inventory block with its computation time."""
+        return self._timed(self._get_inventory_metrics())
+    
+    @cached(SalesOrder)
+    def _sales_block(self):
+        """Sales block with its computation time."""
+        return self._timed(self._get_sales_metrics())
+    
+    @cached(Customer)
+    def _customers_block(self):
+        """Customer block with its computation time."""
+        return self._timed(self._get_customer_metrics())
+    
+    @cached(Product, Movement, SalesOrder, Customer)
+    def _alerts_block(self):
+        """Alerts block with its computation time."""
+        return self._timed(self._get_alerts())
+    
+    @cached(Product, Movement, SalesOrder, Customer)
+    def _recent_activity_block(self):
+        """Recent activity block with its computation time."""
+        return self._timed(self._get_recent_activity())
+    
     def _get_inventory_metrics(self) -> Dict[str, Any]:
-        """Get inventory-related metrics."""
-        try:
-            # Total products
-            total_products = Product.query.filter_by(deleted_at=None).count()
-            
-            # Total stock value
-            products = Product.query.filter_by(deleted_at=None).all()
-            total_value = sum(
-                float(p.stock * p.precio_dolares) for p in products
-            )
-            
-            # Low stock products
-            low_stock_count = Product.query.filter(
-                Product.deleted_at == None,
-                Product.stock <= Product.reorder_point
-            ).count()
-            
-            # Out of stock products
-            out_of_stock = Product.query.filter_by(
-                stock=0,
-                deleted_at=None
-            ).count()
-            
-            # Products by category
-            from app.models import ItemGroup
-            categories = ItemGroup.query.filter_by(deleted_at=None).count()
-            
-            return {
-                'total_products': total_products,
-                'total_value': round(total_value, 2),
-                'low_stock_count': low_stock_count,
-                'out_of_stock': out_of_stock,
-                'categories': categories
-            }
-        except Exception as e:
-            current_app.logger.error(f"Error getting inventory metrics: {str(e)}")
-            return {
-                'total_products': 0,
-                'total_value': 0,
-                'low_stock_count': 0,
-                'out_of_stock': 0,
-                'categories': 0
-            }
+        """Get inventory-related metrics in a single aggregate query."""
+        categories = select(func.count(ItemGroup.id)).where(
+            ItemGroup.deleted_at.is_(None)
+        ).scalar_subquery()
+        
+        row = db.session.execute(
+            select(
+                func.count(Product.id).label('total_products'),
+                func.coalesce(func.sum(Product.stock * Product.precio_dolares), 0).label('total_value'),
+                self._count_where(Product.stock <= Product.reorder_point).label('low_stock_count'),
+                self._count_where(Product.stock == 0).label('out_of_stock'),
+                categories.label('categories')
+            ).where(Product.deleted_at.is_(None))
+        ).one()
+        
+        return {
+            'total_products': row.total_products,
+            'total_value': round(float(row.total_value), 2),
+            'low_stock_count': row.low_stock_count,
+            'out_of_stock': row.out_of_stock,
+            'categories': row.categories
+        }
     
     def _get_sales_metrics(self) -> Dict[str, Any]:
-        """Get sales-related metrics."""
-        # Total orders
-        total_orders = SalesOrder.query.filter_by(deleted_at=None).count()
-        
-        # Orders by status
-        draft_orders = SalesOrder.query.filter_by(
-            status='draft',
-            deleted_at=None
-        ).count()
-        
-        confirmed_orders = SalesOrder.query.filter_by(
-            status='confirmed',
-            deleted_at=None
-        ).count()
-        
-        delivered_orders = SalesOrder.query.filter_by(
-            status='delivered',
-            deleted_at=None
-        ).count()
-        
-        # Total sales amount
-        total_sales = db.session.query(
-            func.sum(SalesOrder.total_amount)
-        ).filter_by(deleted_at=None).scalar() or 0
-        
-        # This month sales
+        """Get sales-related metrics in a single aggregate query."""
         today = date.today()
         first_day = date(today.year, today.month, 1)
-        month_sales = db.session.query(
-            func.sum(SalesOrder.total_amount)
-        ).filter(
-            SalesOrder.order_date >= first_day,
-            SalesOrder.deleted_at == None
-        ).scalar() or 0
         
-        # Pending payment
-        pending_payment = db.session.query(
-            func.sum(SalesOrder.total_amount - SalesOrder.paid_amount)
-        ).filter(
-            SalesOrder.payment_status.in_(['pending', 'partial']),
-            SalesOrder.deleted_at == None
-        ).scalar() or 0
+        row = db.session.execute(
+            select(
+                func.count(SalesOrder.id).label('total_orders'),
+                self._count_where(SalesOrder.status == 'draft').label('draft_orders'),
+                self._count_where(SalesOrder.status == 'confirmed').label('confirmed_orders'),
+                self._count_where(SalesOrder.status == 'delivered').label('delivered_orders'),
+                func.coalesce(func.sum(SalesOrder.total_amount), 0).label('total_sales'),
+                self._sum_where(
+                    SalesOrder.order_date >= first_day, SalesOrder.total_amount
+                ).label('month_sales'),
+                self._sum_where(
+                    SalesOrder.payment_status.in_(['pending', 'partial']),
+                    SalesOrder.total_amount - SalesOrder.paid_amount
+                ).label('pending_payment')
+            ).where(SalesOrder.deleted_at.is_(None))
+        ).one()
         
         return {
-            'total_orders': total_orders,
-            'draft_orders': draft_orders,
-            'confirmed_orders': confirmed_orders,
-            'delivered_orders': delivered_orders,
-            'total_sales': float(total_sales),
-            'month_sales': float(month_sales),
-            'pending_payment': float(pending_payment)
+            'total_orders': row.total_orders,
+            'draft_orders': row.draft_orders,
+            'confirmed_orders': row.confirmed_orders,
+            'delivered_orders': row.delivered_orders,
+            'total_sales': float(row.total_sales),
+            'month_sales': float(row.month_sales),
+            'pending_payment': float(row.pending_payment)
         }
     
     def _get_customer_metrics(self) -> Dict[str, Any]:
-        """Get customer-related metrics."""
-        # Total customers
-        total_customers = Customer.query.filter_by(deleted_at=None).count()
-        
-        # Active customers
-        active_customers = Customer.query.filter_by(
-            is_active=True,
-            deleted_at=None
-        ).count()
-        
-        # New customers this month
+        """Get customer-related metrics in a single aggregate query."""
         today = date.today()
         first_day = datetime(today.year, today.month, 1)
-        new_customers = Customer.query.filter(
-            Customer.created_at >= first_day,
-            Customer.deleted_at == None
-        ).count()
+        
+        row = db.session.execute(
+            select(
+                func.count(Customer.id).label('total_customers'),
+                self._count_where(Customer.is_active.is_(True)).label('active_customers'),
+                self._count_where(Customer.created_at >= first_day).label('new_customers')
+            ).where(Customer.deleted_at.is_(None))
+        ).one()
         
         return {
-            'total_customers': total_customers,
-            'active_customers': active_customers,
-            'new_customers': new_customers
+            'total_customers': row.total_customers,
+            'active_customers': row.active_customers,
+            'new_customers': row.new_customers
         }
     
+    @staticmethod
+    def _count_where(condition):
+        """Conditional COUNT: rows of the aggregate matching a condition."""
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+    
+    @staticmethod
+    def _sum_where(condition, value):
+        """Conditional SUM: total of a value over rows matching a condition."""
+        return func.coalesce(func.sum(case((condition, value), else_=0)), 0)
+    
     def _get_alerts(self) -> Dict[str, Any]:
         """Get system alerts."""
         alerts = []
@@ -227,7 +232,9 @@ class DashboardService:
             })
         
         # Pending orders
-        pending_orders = SalesOrder.query.filter_by(
+        pending_orders = SalesOrder.query.options(
+            joinedload(SalesOrder.customer)
+        ).filter_by(
             status='confirmed',
             deleted_at=None
         ).limit(3).all()
@@ -251,7 +258,9 @@ class DashboardService:
         activities = []
         
         # Recent movements
-        recent_movements = Movement.query.filter_by(
+        recent_movements = Movement.query.options(
+            joinedload(Movement.producto), joinedload(Movement.creator)
+        ).filter_by(
             deleted_at=None
         ).order_by(Movement.created_at.desc()).limit(5).all()
         
@@ -267,7 +276,9 @@ class DashboardService:
             })
         
         # Recent orders
-        recent_orders = SalesOrder.query.filter_by(
+        recent_orders = SalesOrder.query.options(
+            joinedload(SalesOrder.customer), joinedload(SalesOrder.creator)
+        ).filter_by(
             deleted_at=None
         ).order_by(SalesOrder.created_at.desc()).limit(5).all()
         
@@ -291,6 +302,7 @@ class DashboardService:
         
         return activities[:10]  # Return last 10 activities
     
+    @read_only_query
     def get_sales_chart_data(self, days: int = 30) -> Dict[str, Any]:
         """
         Get sales chart data for the last N days.
@@ -328,6 +340,8 @@ class DashboardService:
             'values': values
         }
     
+    @cached(Product, SalesOrder, 'SalesOrderItem')
+    @read_only_query
     def get_top_products(self, limit: int = 10) -> list:
         """
         Get top selling products.
@@ -0,0 +1,124 @@
+"""
+Document Sequence Service - Gapless numbering for sales orders and other documents.
+"""
+from datetime import datetime
+from typing import Callable, Optional
+
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import DocumentSequence
+from app.utils.exceptions import ValidationError, DatabaseError
+from app.extensions import db
+
+
+class DocumentSequenceService:
+    """
+    Service for numbered documents backed by the document_sequences table.
+
+    A number is taken by incrementing the counter row with a single UPDATE
+    in the caller's transaction. Concurrent writers queue on that row, so
+    no number is handed out twice, and a rolled back document gives its
+    number back, so committed numbers have no gaps.
+    """
+
+    def reserve(self, name: str, period: str = '', count: int = 1,
+                seed: Optional[Callable[[], int]] = None) -> range:
+        """
+        Reserve consecutive numbers in the current transaction.
+
+        Args:
+            name: Document type (SO, PO, FAC...)
+            period: Numbering period, e.g. YYYYMMDD for daily numbers
+            count: Numbers to reserve
+            seed: Returns the last number already in use, called once when
+                the counter is created (numbers issued before the table existed)
+
+        Returns:
+            Reserved numbers
+
+        Raises:
+            ValidationError: If count is not positive
+            DatabaseError: If the counter cannot be updated
+        """
+        if count < 1:
+            raise ValidationError("La cantidad de números a reservar debe ser mayor que cero", field='count')
+
+        try:
+            last_value = self._increment(name, period, count)
+            if last_value is None:
+                self._create(name, period, seed() if seed else 0)
+                last_value = self._increment(name, period, count)
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Error al reservar numeración {name} {period}", original_error=e)
+
+        return range(last_value - count + 1, last_value + 1)
+
+    def next_value(self, name: str, period: str = '',
+                   seed: Optional[Callable[[], int]] = None) -> int:
+        """
+        Take the next number in the current transaction.
+
+        Args:
+            name: Document type
+            period: Numbering period
+            seed: See reserve()
+
+        Returns:
+            Next number
+        """
+        return self.reserve(name, period, 1, seed)[0]
+
+    def allocate_block(self, name: str, period: str = '', count: int = 1,
+                       seed: Optional[Callable[[], int]] = None) -> range:
+        """
+        Pre-allocate a block of numbers and commit it right away.
+
+        Meant for bulk creation (imports, batch invoicing) that hands the
+        numbers out later: the counter row is only locked for this short
+        transaction. Numbers of the block that end up unused are skipped.
+
+        Args:
+            name: Document type
+            period: Numbering period
+            count: Size of the block
+            seed: See reserve()
+
+        Returns:
+            Allocated numbers
+        """
+        try:
+            block = self.reserve(name, period, count, seed)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        current_app.logger.info(f"Allocated {name} {period} numbers {block.start}-{block.stop - 1}")
+        return block
+
+    def _increment(self, name: str, period: str, count: int) -> Optional[int]:
+        """Add count to a counter; None if the counter does not exist yet."""
+        return db.session.execute(
+            update(DocumentSequence)
+            .where(DocumentSequence.name == name, DocumentSequence.period == period)
+            .values(last_value=DocumentSequence.last_value + count, updated_at=datetime.utcnow())
+            .returning(DocumentSequence.last_value)
+        ).scalar()
+
+    def _create(self, name: str, period: str, last_value: int) -> None:
+        """Insert a missing counter; a concurrent insert of the same key wins."""
+        if db.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        db.session.execute(
+            dialect_insert(DocumentSequence).values(
+                name=name,
+                period=period,
+                last_value=last_value,
+                updated_at=datetime.utcnow()
+            ).on_conflict_do_nothing(index_elements=['name', 'period'])
+        )
@@ -2,15 +2,23 @@
 Import Service - Business logic for importing inventory from files.
 """
 import pandas as pd
-from typing import Dict, Any, List, Tuple
+from collections import Counter
+from typing import Dict, Any, List, Tuple, Optional, Callable
 from datetime import datetime
+from decimal import Decimal
 from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.utils import secure_filename
 import os
+import uuid
 
 from app.models import Product, ItemGroup
+from app.models.item_group_closure import apply_product_count_deltas
 from app.services import ProductService
-from app.utils.exceptions import ValidationError, BusinessLogicError
+from app.services.inventory_report_service import InventoryReportService
+from app.utils.exceptions import ValidationError, BusinessLogicError, DatabaseError
+from app.utils.service_cache import touch_tags
 from app.utils.code_generator import CodeGenerator
 from app.extensions import db
 
@@ -20,6 +28,9 @@ class ImportService:
     
     ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv'}
     
+    # Rows per upsert statement / code lookup
+    BULK_CHUNK_SIZE = 500
+    
     def __init__(self):
         """Initialize import service."""
         self.product_service = ProductService()
@@ -37,20 +48,21 @@ class ImportService:
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in self.ALLOWED_EXTENSIONS
     
-    def import_from_file(self, file, user_id: int) -> Dict[str, Any]:
+    def save_upload(self, file) -> str:
         """
-        Import products from Excel or CSV file.
+        Validate an uploaded file and store it in the upload folder.
+        
+        The stored name is prefixed with a random token so concurrent
+        imports of files with the same name do not overwrite each other.
         
         Args:
             file: File object from request
-            user_id: ID of user performing import
             
         Returns:
-            Dictionary with import results
+            Path of the stored file
             
         Raises:
             ValidationError: If file format is invalid
-            BusinessLogicError: If import fails
         """
         if not file or file.filename == '':
             raise ValidationError('No se seleccionó ningún archivo')
@@ -58,48 +70,90 @@ class ImportService:
         if not self.allowed_file(file.filename):
             raise ValidationError('Formato de archivo no permitido. Use XLSX, XLS o CSV')
         
-        try:
-            # Save file temporarily
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
+        filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        file.save(filepath)
+        return filepath
+    
+    def import_from_file(self, file, user_id: int,
+                         progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """
+        Import products from Excel or CSV file.
+        
+        Args:
+            file: File object from request
+            user_id: ID of user performing import
+            progress: Optional callback receiving the completed percentage
+            
+        Returns:
+            Dictionary with import results
+            
+        Raises:
+            ValidationError: If file format is invalid
+            BusinessLogicError: If import fails
+        """
+        filepath = self.save_upload(file)
+        return self.import_from_path(filepath, user_id, progress)
+    
+    def import_from_path(self, filepath: str, user_id: int,
+                         progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """
+        Import products from a stored Excel or CSV file and remove it afterwards.
+        
+        Args:
+            filepath: Path returned by save_upload
+            user_id: ID of user performing import
+            progress: Optional callback receiving the completed percentage
+            
+        Returns:
+            Dictionary with import results
             
+        Raises:
+            ValidationError: If the file is empty
+            BusinessLogicError: If import fails
+        """
+        try:
             # Read file based on extension
-            if filename.endswith('.csv'):
+            if filepath.endswith('.csv'):
                 df = pd.read_csv(filepath)
             else:
                 df = pd.read_excel(filepath, header=1)  # Skip first row (headers)
+            self._report_progress(progress, 10)
             
             # Process data
-            results = self._process_dataframe(df, user_id)
-            
-            # Clean up temporary file
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            
-            return results
+            return self._process_dataframe(df, user_id, progress)
             
         except pd.errors.EmptyDataError:
             raise ValidationError('El archivo está vacío')
         except Exception as e:
             current_app.logger.error(f"Error importing file: {str(e)}")
             raise BusinessLogicError(f'Error al importar archivo: {str(e)}')
+        finally:
+            # Clean up temporary file
+            if os.path.exists(filepath):
+                os.remove(filepath)
     
-    def _process_dataframe(self, df: pd.DataFrame, user_id: int) -> Dict[str, Any]:
+    def _process_dataframe(self, df: pd.DataFrame, user_id: int,
+                           progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
         """
         Process dataframe and create/update products with automatic code generation.
         
+        Cleaning and validation run column-wise over the whole dataframe,
+        existing products are prefetched with one query per chunk and all
+        rows are written with chunked upserts inside a single transaction.
+        
         Args:
             df: Pandas dataframe with product data
             user_id: ID of user performing import
+            progress: Optional callback receiving the completed percentage
             
         Returns:
             Dictionary with import statistics
+            
+        Raises:
+            ValidationError: If the description column is missing
+            DatabaseError: If the bulk write fails
         """
-        created = 0
-        updated = 0
-        errors = []
-        
         # Expected columns (flexible matching)
         codigo_col = self._find_column(df, ['codigo', 'code', 'código'])
         desc_col = self._find_column(df, ['descripcion', 'description', 'descripción', 'producto', 'descripcion del articulo'])
@@ -113,75 +167,246 @@ class ImportService:
         # Get all categories for mapping
         categories = {cat.name: cat for cat in ItemGroup.query.filter_by(deleted_at=None).all()}
         
-        for index, row in df.iterrows():
-            try:
-                # Skip empty rows
-                if pd.isna(row[desc_col]) or str(row[desc_col]).strip() == '':
-                    continue
-                
-                descripcion = str(row[desc_col]).strip()
-                
-                # Get category
-                item_group = None
-                if category_col and not pd.isna(row[category_col]):
-                    category_name = str(row[category_col]).strip()
-                    item_group = categories.get(category_name)
-                    
-                    if not item_group:
-                        errors.append(f"Fila {index + 2}: Categoría '{category_name}' no encontrada")
-                        continue
-                
-                # Generate code automatically if category is provided
-                if item_group:
-                    codigo = CodeGenerator.generate_code(item_group.name, descripcion)
-                elif codigo_col and not pd.isna(row[codigo_col]):
-                    # Use provided code if no category
-                    codigo = str(row[codigo_col]).strip()
-                else:
-                    # Generate generic code
-                    codigo = f"GEN-{index + 1:04d}"
-                
-                # Get optional fields
-                stock = int(row[stock_col]) if stock_col and not pd.isna(row[stock_col]) else 0
-                precio = float(row[price_col]) if price_col and not pd.isna(row[price_col]) else 0.0
-                
-                # Check if product exists by code
-                existing_product = Product.query.filter_by(codigo=codigo, deleted_at=None).first()
-                
-                if existing_product:
-                    # Update existing product
-                    data = {
-                        'descripcion': descripcion,
-                        'stock': stock,
-                        'precio_dolares': precio if precio > 0 else existing_product.precio_dolares,
-                        'item_group_id': item_group.id if item_group else existing_product.item_group_id
-                    }
-                    self.product_service.update_product(existing_product.id, data, user_id)
-                    updated += 1
-                else:
-                    # Create new product
-                    data = {
-                        'codigo': codigo,
-                        'descripcion': descripcion,
-                        'stock': stock,
-                        'precio_dolares': precio if precio > 0 else 1.0,
-                        'factor_ajuste': 1.0,
-                        'item_group_id': item_group.id if item_group else None
-                    }
-                    self.product_service.create_product(data, user_id)
-                    created += 1
-                    
-            except Exception as e:
-                errors.append(f"Fila {index + 2}: {str(e)}")
-                current_app.logger.warning(f"Error processing row {index}: {str(e)}")
+        rows, errors = self._clean_dataframe(df, codigo_col, desc_col, stock_col,
+                                             price_col, category_col, categories)
+        self._report_progress(progress, 30)
+        
+        # Generate codes for categorized rows in one batch
+        categorized = rows['categoria'].notna()
+        if categorized.any():
+            rows.loc[categorized, 'codigo'] = CodeGenerator.generate_codes(
+                list(zip(rows.loc[categorized, 'categoria'], rows.loc[categorized, 'descripcion']))
+            )
+        self._report_progress(progress, 50)
+        
+        # Prefetch existing products by code
+        existing = self._fetch_existing(rows['codigo'].unique().tolist())
+        self._report_progress(progress, 60)
+        
+        deleted_codes = rows['codigo'].map(lambda codigo: codigo in existing and existing[codigo].deleted_at is not None)
+        for row_number, codigo in rows.loc[deleted_codes, ['fila', 'codigo']].itertuples(index=False):
+            errors.append((row_number, f"El código {codigo} pertenece a un producto eliminado"))
+        rows = rows[~deleted_codes]
+        
+        # Repeated codes: first occurrence creates (unless it exists), the rest update
+        is_existing = rows['codigo'].isin(existing.keys())
+        first_seen = ~rows['codigo'].duplicated()
+        created = int((first_seen & ~is_existing).sum())
+        updated = len(rows) - created
+        
+        # Later rows win; a missing price or category keeps the previous value
+        merged = rows.groupby('codigo', sort=False).agg(
+            descripcion=('descripcion', 'last'),
+            stock=('stock', 'last'),
+            precio=('precio', 'last'),
+            item_group_id=('item_group_id', 'last')
+        )
+        
+        self._bulk_upsert(merged, existing, user_id)
+        
+        current_app.logger.info(
+            f"Bulk import by user {user_id}: {created} created, {updated} updated, {len(errors)} errors"
+        )
         
         return {
             'created': created,
             'updated': updated,
-            'errors': errors,
+            'errors': [f"Fila {row_number}: {message}" for row_number, message in sorted(errors, key=lambda error: error[0])],
             'total_processed': created + updated
         }
     
+    def _clean_dataframe(self, df: pd.DataFrame, codigo_col: str, desc_col: str,
+                         stock_col: str, price_col: str, category_col: str,
+                         categories: Dict[str, ItemGroup]) -> Tuple[pd.DataFrame, List[Tuple[int, str]]]:
+        """
+        Clean and validate import rows column-wise.
+        
+        Args:
+            df: Raw dataframe read from the file
+            codigo_col: Code column name or None
+            desc_col: Description column name
+            stock_col: Stock column name or None
+            price_col: Price column name or None
+            category_col: Category column name or None
+            categories: Active categories by name
+            
+        Returns:
+            Tuple of (valid rows, list of (row number, error message))
+        """
+        rows = pd.DataFrame({'fila': df.index + 2}, index=df.index)
+        errors: List[Tuple[int, str]] = []
+        
+        def reject(mask: pd.Series, message) -> None:
+            for row_number, value in zip(rows.loc[mask, 'fila'], df.loc[mask].index):
+                errors.append((int(row_number), message(value) if callable(message) else message))
+        
+        # Skip empty rows
+        descripcion = df[desc_col].astype('string').str.strip()
+        keep = descripcion.notna() & (descripcion != '')
+        rows['descripcion'] = descripcion
+        
+        too_long = keep & (descripcion.str.len() > 200)
+        reject(too_long, "La descripción no puede exceder 200 caracteres")
+        keep &= ~too_long
+        
+        # Category lookup
+        rows['categoria'] = None
+        rows['item_group_id'] = None
+        if category_col:
+            category = df[category_col].astype('string').str.strip()
+            has_category = keep & category.notna()
+            unknown = has_category & ~category.isin(categories.keys())
+            reject(unknown, lambda index: f"Categoría '{category[index]}' no encontrada")
+            keep &= ~unknown
+            known = has_category & ~unknown
+            rows.loc[known, 'categoria'] = category[known]
+            rows.loc[known, 'item_group_id'] = category[known].map(lambda name: categories[name].id)
+        
+        # Numeric fields
+        for column, target, invalid, negative in (
+            (stock_col, 'stock', "El stock debe ser un número entero válido", "El stock no puede ser negativo"),
+            (price_col, 'precio', "El precio debe ser un número válido", "El precio no puede ser negativo"),
+        ):
+            if not column:
+                rows[target] = 0.0
+                continue
+            numbers = pd.to_numeric(df[column], errors='coerce')
+            bad = keep & numbers.isna() & df[column].notna()
+            reject(bad, invalid)
+            keep &= ~bad
+            below_zero = keep & (numbers < 0)
+            reject(below_zero, negative)
+            keep &= ~below_zero
+            rows[target] = numbers.fillna(0.0)
+        rows['stock'] = rows['stock'].astype('int64')
+        
+        # Provided code, or a generic one when there is no code nor category
+        generic = pd.Series([f"GEN-{index + 1:04d}" for index in df.index], index=df.index)
+        if codigo_col:
+            codigo = df[codigo_col].astype('string').str.strip().str.upper()
+            codigo = codigo.where(codigo.notna() & (codigo != ''), generic)
+        else:
+            codigo = generic
+        rows['codigo'] = codigo.astype(object)
+        
+        too_long_code = keep & rows['categoria'].isna() & (rows['codigo'].str.len() > 50)
+        reject(too_long_code, "El código no puede exceder 50 caracteres")
+        keep &= ~too_long_code
+        
+        rows = rows[keep].copy()
+        rows['descripcion'] = rows['descripcion'].astype(object).map(
+            self.product_service.validation_service.sanitize_string
+        )
+        rows['precio'] = rows['precio'].where(rows['precio'] > 0)
+        
+        return rows, errors
+    
+    def _fetch_existing(self, codes: List[str]) -> Dict[str, Any]:
+        """
+        Load existing products for a set of codes, soft deleted included.
+        
+        Args:
+            codes: Product codes to look up
+            
+        Returns:
+            Dictionary of code to (id, precio_dolares, item_group_id, deleted_at) row
+        """
+        existing = {}
+        for start in range(0, len(codes), self.BULK_CHUNK_SIZE):
+            chunk = codes[start:start + self.BULK_CHUNK_SIZE]
+            for row in db.session.execute(
+                select(Product.codigo, Product.id, Product.precio_dolares,
+                       Product.item_group_id, Product.deleted_at)
+                .where(Product.codigo.in_(chunk))
+            ):
+                existing[row.codigo] = row
+        return existing
+    
+    def _bulk_upsert(self, merged: pd.DataFrame, existing: Dict[str, Any], user_id: int) -> None:
+        """
+        Write merged rows with chunked INSERT ... ON CONFLICT DO UPDATE.
+        
+        Args:
+            merged: One row per code, indexed by codigo
+            existing: Existing products by code
+            user_id: ID of user performing import
+            
+        Raises:
+            DatabaseError: If the write fails (nothing is written)
+        """
+        now = datetime.utcnow()
+        records = []
+        # Category product count changes; the bulk statements bypass the ORM hooks
+        count_deltas = Counter()
+        for codigo, descripcion, stock, precio, item_group_id in merged.itertuples(name=None):
+            current = existing.get(codigo)
+            if pd.isna(precio):
+                precio = current.precio_dolares if current else 1.0
+            if pd.isna(item_group_id):
+                item_group_id = current.item_group_id if current else None
+            item_group_id = int(item_group_id) if item_group_id is not None else None
+            if current is None or current.deleted_at is None:
+                old_group_id = current.item_group_id if current else None
+                if old_group_id != item_group_id:
+                    if old_group_id:
+                        count_deltas[old_group_id] -= 1
+                    if item_group_id:
+                        count_deltas[item_group_id] += 1
+            records.append({
+                'codigo': codigo,
+                'descripcion': descripcion,
+                'stock': int(stock),
+                'precio_dolares': Decimal(str(precio)),
+                'factor_ajuste': Decimal('1.00'),
+                'item_group_id': item_group_id,
+                'created_by': user_id,
+                'updated_by': user_id,
+                'created_at': now,
+                'updated_at': now
+            })
+        
+        if not records:
+            return
+        
+        stmt = self._upsert_statement()
+        try:
+            for start in range(0, len(records), self.BULK_CHUNK_SIZE):
+                db.session.execute(stmt, records[start:start + self.BULK_CHUNK_SIZE])
+            apply_product_count_deltas(db.session.connection(), count_deltas)
+            touch_tags(db.session, ItemGroup.__name__)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Database error in bulk import: {str(e)}")
+            raise DatabaseError("Error al guardar los productos importados", original_error=e)
+    
+    @staticmethod
+    def _report_progress(progress: Optional[Callable[[int], None]], percent: int) -> None:
+        """Forward a completed percentage to the progress callback, if any."""
+        if progress is not None:
+            progress(percent)
+    
+    def _upsert_statement(self):
+        """Build the dialect specific product upsert statement."""
+        if db.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        
+        stmt = dialect_insert(Product)
+        return stmt.on_conflict_do_update(
+            index_elements=[Product.codigo],
+            set_={
+                'descripcion': stmt.excluded.descripcion,
+                'stock': stmt.excluded.stock,
+                'precio_dolares': stmt.excluded.precio_dolares,
+                'item_group_id': stmt.excluded.item_group_id,
+                'updated_by': stmt.excluded.updated_by,
+                'updated_at': stmt.excluded.updated_at
+            },
+            where=Product.deleted_at.is_(None)
+        )
+    
     def _find_column(self, df: pd.DataFrame, possible_names: List[str]) -> str:
         """
         Find column name from list of possible names (case-insensitive).
@@ -205,6 +430,9 @@ class ImportService:
         """
         Generate inventory report in Art 177 format with prices in Bolivares.
         
+        Delegates to InventoryReportService, which computes every product's
+        balances with a single grouped query.
+        
         Args:
             start_date: Start date for report
             end_date: End date for report
@@ -212,76 +440,4 @@ class ImportService:
         Returns:
             Pandas dataframe with formatted report
         """
-        from app.models import Movement, ExchangeRate
-        
-        # Get current exchange rate
-        current_rate = ExchangeRate.get_current_rate()
-        exchange_rate = float(current_rate.rate) if current_rate else 36.50
-        
-        # Get all products
-        products = Product.query.filter_by(deleted_at=None).order_by(Product.codigo).all()
-        
-        report_data = []
-        
-        for product in products:
-            # Get movements in date range
-            movements = Movement.query.filter(
-                Movement.producto_id == product.id,
-                Movement.fecha >= start_date,
-                Movement.fecha <= end_date,
-                Movement.deleted_at == None
-            ).all()
-            
-            # Calculate initial stock (stock before start_date)
-            initial_movements = Movement.query.filter(
-                Movement.producto_id == product.id,
-                Movement.fecha < start_date,
-                Movement.deleted_at == None
-            ).all()
-            
-            initial_stock = 0
-            for mov in initial_movements:
-                if mov.tipo == 'entrada':
-                    initial_stock += mov.cantidad
-                elif mov.tipo == 'salida':
-                    initial_stock -= mov.cantidad
-            
-            # Calculate entries and exits
-            entries_qty = sum(m.cantidad for m in movements if m.tipo == 'entrada')
-            exits_qty = sum(m.cantidad for m in movements if m.tipo == 'salida')
-            
-            # Calculate price in Bolivares with adjustment factor
-            precio_bs = float(product.precio_dolares) * exchange_rate * float(product.factor_ajuste)
-            
-            # Calculate amounts in Bolivares
-            initial_amount = initial_stock * precio_bs
-            entries_amount = entries_qty * precio_bs
-            exits_amount = exits_qty * precio_bs
-            final_stock = initial_stock + entries_qty - exits_qty
-            final_amount = final_stock * precio_bs
-            
-            report_data.append({
-                'Código': product.codigo,
-                'Descripción': product.descripcion,
-                'Unidad de Medida': 'UND',
-                'Existencia Inicial - Cantidad': initial_stock,
-                'Existencia Inicial - Costo Unitario (Bs)': round(precio_bs, 2),
-                'Existencia Inicial - Monto (Bs)': round(initial_amount, 2),
-                'Entradas - Cantidad': entries_qty,
-                'Entradas - Costo Unitario (Bs)': round(precio_bs, 2),
-                'Entradas - Monto (Bs)': round(entries_amount, 2),
-                'Salidas - Cantidad': exits_qty,
-                'Salidas - Costo Unitario (Bs)': round(precio_bs, 2),
-                'Salidas - Monto (Bs)': round(exits_amount, 2),
-                'Autoconsumos - Cantidad': 0,
-                'Autoconsumos - Costo Unitario (Bs)': 0,
-                'Autoconsumos - Monto (Bs)': 0,
-                'Retiro - Cantidad': 0,
-                'Retiro - Costo Unitario (Bs)': 0,
-                'Retiro - Monto (Bs)': 0,
-                'Inv.final - Cantidad': final_stock,
-                'Inv.final - Costo Unitario (Bs)': round(precio_bs, 2),
-                'Inv.final - Monto (Bs)': round(final_amount, 2)
-            })
-        
-        return pd.DataFrame(report_data)
+        return InventoryReportService().build_report(start_date, end_date)
@@ -0,0 +1,380 @@
+"""
+Inventory Report Service - Set-based Art 177 inventory report engine.
+"""
+import csv
+import io
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union, BinaryIO
+from datetime import datetime, date, timedelta
+
+import pandas as pd
+from openpyxl import Workbook
+from sqlalchemy import func, case, and_, select
+
+from app.models import Product, Movement, StockSnapshot
+from app.services.stock_snapshot_service import StockSnapshotService
+from app.services.pricing_service import PricingService
+from app.extensions import db, read_only
+from app.repositories.base_repository import read_only_query
+
+
+# Report columns in Art 177 order
+REPORT_COLUMNS = [
+    'Código',
+    'Descripción',
+    'Unidad de Medida',
+    'Existencia Inicial - Cantidad',
+    'Existencia Inicial - Costo Unitario (Bs)',
+    'Existencia Inicial - Monto (Bs)',
+    'Entradas - Cantidad',
+    'Entradas - Costo Unitario (Bs)',
+    'Entradas - Monto (Bs)',
+    'Salidas - Cantidad',
+    'Salidas - Costo Unitario (Bs)',
+    'Salidas - Monto (Bs)',
+    'Autoconsumos - Cantidad',
+    'Autoconsumos - Costo Unitario (Bs)',
+    'Autoconsumos - Monto (Bs)',
+    'Retiro - Cantidad',
+    'Retiro - Costo Unitario (Bs)',
+    'Retiro - Monto (Bs)',
+    'Inv.final - Cantidad',
+    'Inv.final - Costo Unitario (Bs)',
+    'Inv.final - Monto (Bs)',
+]
+
+# Rows fetched per round trip when streaming exports
+STREAM_CHUNK_SIZE = 1000
+
+
+def _as_date(value: Union[datetime, date]) -> date:
+    """Normalize datetime/date arguments to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+class InventoryReportService:
+    """
+    Service that computes the Art 177 inventory report with one grouped query.
+
+    Initial stock, entries and exits for every product are obtained with
+    conditional SUMs over movements, instead of two queries per product.
+    Opening balances start from the latest stock snapshot when one exists.
+    """
+
+    def __init__(self):
+        self.pricing_service = PricingService()
+
+    def get_exchange_rate(self, as_of: Optional[Union[datetime, date]] = None) -> float:
+        """
+        Get the exchange rate used to value the report.
+
+        Args:
+            as_of: Value at the rate in force on this date instead of the current one
+
+        Returns:
+            USD to Bs rate, or the default rate if none is configured
+        """
+        if as_of is None:
+            return self.pricing_service.get_current_rate()
+        return self.pricing_service.get_rate_for_date(as_of)
+
+    def build_aggregate_query(self, start_date: Union[datetime, date],
+                              end_date: Union[datetime, date],
+                              snapshot_date: Optional[date] = None):
+        """
+        Build the grouped aggregate statement for the report.
+
+        Movements are matched case-insensitively on ``tipo`` because the
+        current forms store ENTRADA/SALIDA while legacy data uses lowercase.
+
+        When a snapshot date is given, the opening balance is the snapshot's
+        closing quantity moved by the movements after it, instead of a
+        replay of the full movement history. Opening and final quantities
+        follow the last AJUSTE before their date (see
+        StockSnapshotService.movement_balances), so one period's final is
+        the next period's opening.
+
+        Args:
+            start_date: First day of the report period (inclusive)
+            end_date: Last day of the report period (inclusive)
+            snapshot_date: Latest closed day before start_date, if any
+
+        Returns:
+            SQLAlchemy select with one row per active product
+        """
+        start = _as_date(start_date)
+        end = _as_date(end_date)
+
+        tipo = func.lower(Movement.tipo)
+        snapshot_service = StockSnapshotService()
+        snapshot_qty = StockSnapshot.closing_qty if snapshot_date is not None else None
+        opening = snapshot_service.movement_balances(start, snapshot_date)
+        closing = snapshot_service.movement_balances(end + timedelta(days=1), snapshot_date)
+
+        initial_qty = func.max(snapshot_service.balance_from(snapshot_qty, opening))
+        final_qty = func.max(snapshot_service.balance_from(snapshot_qty, closing))
+        entries_qty = func.coalesce(func.sum(case(
+            (tipo == 'entrada', Movement.cantidad),
+            else_=0
+        )), 0)
+        exits_qty = func.coalesce(func.sum(case(
+            (tipo == 'salida', Movement.cantidad),
+            else_=0
+        )), 0)
+
+        stmt = select(
+            Product.id,
+            Product.codigo,
+            Product.descripcion,
+            Product.precio_dolares,
+            Product.factor_ajuste,
+            initial_qty.label('initial_qty'),
+            entries_qty.label('entries_qty'),
+            exits_qty.label('exits_qty'),
+            final_qty.label('final_qty'),
+        ).select_from(Product)
+
+        if snapshot_date is not None:
+            stmt = stmt.outerjoin(
+                StockSnapshot,
+                and_(
+                    StockSnapshot.producto_id == Product.id,
+                    StockSnapshot.fecha == snapshot_date
+                )
+            )
+
+        return stmt.outerjoin(
+            opening, opening.c.producto_id == Product.id
+        ).outerjoin(
+            closing, closing.c.producto_id == Product.id
+        ).outerjoin(
+            Movement,
+            and_(
+                Movement.producto_id == Product.id,
+                Movement.deleted_at.is_(None),
+                Movement.fecha >= start,
+                Movement.fecha <= end
+            )
+        ).where(
+            Product.deleted_at.is_(None)
+        ).group_by(
+            Product.id
+        ).order_by(Product.codigo)
+
+    @read_only_query
+    def fetch_aggregates(self, start_date: Union[datetime, date],
+                         end_date: Union[datetime, date]) -> List[Any]:
+        """
+        Execute the aggregate query.
+
+        Args:
+            start_date: First day of the report period
+            end_date: Last day of the report period
+
+        Returns:
+            List of result rows
+        """
+        snapshot_date = StockSnapshotService().get_latest_snapshot_date(_as_date(start_date))
+        stmt = self.build_aggregate_query(start_date, end_date, snapshot_date)
+        return db.session.execute(stmt).all()
+
+    def iter_aggregates(self, start_date: Union[datetime, date],
+                        end_date: Union[datetime, date],
+                        chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Any]:
+        """
+        Stream aggregate rows from a server-side cursor.
+
+        Args:
+            start_date: First day of the report period
+            end_date: Last day of the report period
+            chunk_size: Rows fetched per round trip
+
+        Yields:
+            Aggregate result rows
+        """
+        snapshot_date = StockSnapshotService().get_latest_snapshot_date(_as_date(start_date))
+        stmt = self.build_aggregate_query(start_date, end_date, snapshot_date)
+        with read_only():
+            result = db.session.execute(
+                stmt.execution_options(stream_results=True, yield_per=chunk_size)
+            )
+        try:
+            for row in result:
+                yield row
+        finally:
+            result.close()
+
+    @staticmethod
+    def format_row(row: Any, exchange_rate: float) -> Dict[str, Any]:
+        """
+        Format one aggregate row as a report record.
+
+        The single definition of the report's amounts and rounding, shared
+        by build_report and the streamed exports.
+
+        Args:
+            row: Aggregate result row
+            exchange_rate: USD to Bs rate
+
+        Returns:
+            Dictionary keyed by report column
+        """
+        precio_bs = float(row.precio_dolares or 0) * exchange_rate * float(row.factor_ajuste or 1)
+        initial_qty = int(row.initial_qty)
+        final_qty = int(row.final_qty)
+        # AJUSTE counts in the period show as the entries or exits that
+        # reconcile the opening balance with the final one
+        adjustment = final_qty - (initial_qty + int(row.entries_qty) - int(row.exits_qty))
+        entries_qty = int(row.entries_qty) + max(adjustment, 0)
+        exits_qty = int(row.exits_qty) + max(-adjustment, 0)
+        unit_cost = round(precio_bs, 2)
+
+        return {
+            'Código': row.codigo,
+            'Descripción': row.descripcion,
+            'Unidad de Medida': 'UND',
+            'Existencia Inicial - Cantidad': initial_qty,
+            'Existencia Inicial - Costo Unitario (Bs)': unit_cost,
+            'Existencia Inicial - Monto (Bs)': round(initial_qty * precio_bs, 2),
+            'Entradas - Cantidad': entries_qty,
+            'Entradas - Costo Unitario (Bs)': unit_cost,
+            'Entradas - Monto (Bs)': round(entries_qty * precio_bs, 2),
+            'Salidas - Cantidad': exits_qty,
+            'Salidas - Costo Unitario (Bs)': unit_cost,
+            'Salidas - Monto (Bs)': round(exits_qty * precio_bs, 2),
+            'Autoconsumos - Cantidad': 0,
+            'Autoconsumos - Costo Unitario (Bs)': 0,
+            'Autoconsumos - Monto (Bs)': 0,
+            'Retiro - Cantidad': 0,
+            'Retiro - Costo Unitario (Bs)': 0,
+            'Retiro - Monto (Bs)': 0,
+            'Inv.final - Cantidad': final_qty,
+            'Inv.final - Costo Unitario (Bs)': unit_cost,
+            'Inv.final - Monto (Bs)': round(final_qty * precio_bs, 2)
+        }
+
+    def iter_report_rows(self, start_date: Union[datetime, date],
+                         end_date: Union[datetime, date]) -> Iterator[List[Any]]:
+        """
+        Stream report rows as value lists in REPORT_COLUMNS order.
+
+        Args:
+            start_date: First day of the report period
+            end_date: Last day of the report period
+
+        Yields:
+            List of cell values per product
+        """
+        exchange_rate = self.get_exchange_rate(as_of=end_date)
+        for row in self.iter_aggregates(start_date, end_date):
+            record = self.format_row(row, exchange_rate)
+            yield [record[column] for column in REPORT_COLUMNS]
+
+    @staticmethod
+    def get_header_lines(start_date: Union[datetime, date],
+                         end_date: Union[datetime, date]) -> List[str]:
+        """Get the company header lines printed above the report table."""
+        return [
+            'EMPRESA: INVERSIONES FERRE-EXITO, C.A',
+            'R.I.F. J31764195-7',
+            'DIRECCION: Calle Bolívar. Palo Negro, Municipio Libertador. Estado Aragua',
+            'TELEFONO: 0412-7434522',
+            '',
+            'Relacion de movimiento de entradas y salidas de los inventarios',
+            'De acuerdo al Reglamento de la ley de I.S.L.R artículo 177.',
+            f'Fecha Desde: {start_date.strftime("%Y-%m-%d")}',
+            f'Fecha Hasta: {end_date.strftime("%Y-%m-%d")}',
+        ]
+
+    @read_only_query
+    def count_products(self) -> int:
+        """Count the active products, i.e. the rows of the report."""
+        return db.session.execute(
+            select(func.count()).select_from(Product).where(Product.deleted_at.is_(None))
+        ).scalar()
+
+    def write_xlsx(self, start_date: Union[datetime, date],
+                   end_date: Union[datetime, date], output: BinaryIO,
+                   progress: Optional[Callable[[int], None]] = None) -> None:
+        """
+        Write the report as XLSX with a write-only workbook.
+
+        Rows go from the streaming cursor straight to the sheet, so memory
+        use does not grow with the number of products.
+
+        Args:
+            start_date: First day of the report period
+            end_date: Last day of the report period
+            output: Seekable binary file object to write to
+            progress: Optional callback receiving the completed percentage,
+                called once per STREAM_CHUNK_SIZE rows
+        """
+        total = self.count_products() if progress is not None else 0
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Inventario')
+
+        for line in self.get_header_lines(start_date, end_date):
+            sheet.append([line])
+        sheet.append(REPORT_COLUMNS)
+
+        for written, values in enumerate(self.iter_report_rows(start_date, end_date), 1):
+            sheet.append(values)
+            if progress is not None and written % STREAM_CHUNK_SIZE == 0:
+                progress(min(90, 90 * written // max(total, 1)))
+
+        if progress is not None:
+            progress(95)
+        workbook.save(output)
+
+    def iter_csv(self, start_date: Union[datetime, date],
+                 end_date: Union[datetime, date],
+                 chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+        """
+        Stream the report as CSV text in chunks.
+
+        Args:
+            start_date: First day of the report period
+            end_date: Last day of the report period
+            chunk_size: Rows per yielded chunk
+
+        Yields:
+            CSV text chunks (the first one starts with a UTF-8 BOM for Excel)
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        buffer.write('\ufeff')
+        writer.writerow(REPORT_COLUMNS)
+
+        pending = 0
+        for values in self.iter_report_rows(start_date, end_date):
+            writer.writerow(values)
+            pending += 1
+            if pending >= chunk_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                pending = 0
+
+        yield buffer.getvalue()
+
+    def build_report(self, start_date: Union[datetime, date],
+                     end_date: Union[datetime, date]) -> pd.DataFrame:
+        """
+        Generate inventory report in Art 177 format with prices in Bolivares.
+
+        Args:
+            start_date: Start date for report
+            end_date: End date for report
+
+        Returns:
+            Pandas dataframe with formatted report
+        """
+        exchange_rate = self.get_exchange_rate(as_of=end_date)
+        # Same per-row formulas as the streamed exports
+        return pd.DataFrame(
+            [self.format_row(row, exchange_rate) for row in self.fetch_aggregates(start_date, end_date)],
+            columns=REPORT_COLUMNS
+        )
@@ -11,6 +11,7 @@ from app.repositories import ItemGroupRepository
 from app.services.validation_service import ValidationService
 from app.utils.exceptions import ValidationError, NotFoundError, DatabaseError, BusinessLogicError
 from app.extensions import db
+from app.utils.service_cache import cached
 
 
 class ItemGroupService:
@@ -111,6 +112,11 @@ class ItemGroupService:
                     parent = self.item_group_repo.get_by_id(parent_id)
                     if not parent:
                         raise ValidationError("La categoría padre no existe", field='parent_id')
+                    if self.item_group_repo.is_descendant(parent_id, group_id):
+                        raise ValidationError(
+                            "Una categoría no puede moverse dentro de una de sus subcategorías",
+                            field='parent_id'
+                        )
                     group.parent_id = parent_id
                 elif parent_id is None:
                     group.parent_id = None
@@ -183,6 +189,7 @@ class ItemGroupService:
             return group
         return None
     
+    @cached(ItemGroup, merge=True)
     def get_all_groups(self):
         """
         Get all active item groups without pagination.
@@ -196,25 +203,84 @@ class ItemGroupService:
             current_app.logger.error(f"Database error getting all item groups: {str(e)}")
             raise DatabaseError(f"Error al obtener categorías: {str(e)}")
     
+    def get_parent_choices(self, group_id: int) -> List[ItemGroup]:
+        """
+        Get the groups a group can be moved under: all but itself and its subcategories.
+        
+        Args:
+            group_id: Group being edited
+            
+        Returns:
+            List of active item groups
+        """
+        excluded = set(self.item_group_repo.get_subtree_ids(group_id))
+        return [group for group in self.get_all_groups() if group.id not in excluded]
+    
     def get_root_groups(self) -> List[ItemGroup]:
         """Get root level groups."""
         return self.item_group_repo.get_root_groups()
     
     def get_group_tree(self) -> List[Dict[str, Any]]:
-        """Get hierarchical tree of all groups."""
-        root_groups = self.get_root_groups()
+        """
+        Get hierarchical tree of all groups.
+        
+        Built in memory from one query; product counts include subcategories
+        and are maintained as products move between groups.
+        """
+        groups = self.get_all_groups()
+        children: Dict[Optional[int], List[ItemGroup]] = {}
+        for group in groups:
+            children.setdefault(group.parent_id, []).append(group)
+        paths = self.get_full_paths(groups)
         
         def build_tree(group: ItemGroup) -> Dict[str, Any]:
-            # Get active children as a list
-            active_children = [c for c in group.children if c.deleted_at is None]
             return {
                 'id': group.id,
                 'name': group.name,
                 'description': group.description,
+                'full_path': paths[group.id],
                 'color': group.color,
                 'icon': group.icon,
-                'product_count': group.get_product_count(),
-                'children': [build_tree(child) for child in active_children]
+                'product_count': group.product_count,
+                'children': [build_tree(child) for child in children.get(group.id, [])]
             }
         
-        return [build_tree(group) for group in root_groups]
+        return [build_tree(group) for group in children.get(None, [])]
+    
+    def serialize_groups(self, groups: List[ItemGroup]) -> List[Dict[str, Any]]:
+        """
+        Convert groups to dictionaries, resolving every path in one query.
+        
+        Args:
+            groups: Item groups to serialize
+            
+        Returns:
+            One ItemGroup.to_dict() per group, in the same order
+        """
+        names = self.item_group_repo.get_ancestor_names([group.id for group in groups])
+        return [group.to_dict(names[group.id]) for group in groups]
+    
+    def get_full_paths(self, groups: Optional[List[ItemGroup]] = None) -> Dict[int, str]:
+        """
+        Get the full path (Padre > Hijo) of every active group.
+        
+        Args:
+            groups: Active groups, already loaded; all of them if None
+            
+        Returns:
+            Full path by group ID
+        """
+        if groups is None:
+            groups = self.get_all_groups()
+        by_id = {group.id: group for group in groups}
+        paths: Dict[int, str] = {}
+        
+        def path(group: ItemGroup) -> str:
+            if group.id not in paths:
+                parent = by_id.get(group.parent_id)
+                paths[group.id] = f"{path(parent)} > {group.name}" if parent else group.name
+            return paths[group.id]
+        
+        for group in groups:
+            path(group)
+        return paths
@@ -0,0 +1,410 @@
+"""
+Job Service - Background jobs for imports and report exports.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, date
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+from sqlalchemy import select, update, delete
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+from app.models import BackgroundJob
+from app.services.import_service import ImportService
+from app.services.inventory_report_service import InventoryReportService
+from app.utils.exceptions import NotFoundError, ValidationError, DatabaseError
+from app.extensions import db
+
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# SQLite busy timeout for progress writes; a reader holding the database
+# (rollback journal mode) skips the update instead of stalling the job
+PROGRESS_BUSY_TIMEOUT_MS = 50
+
+# Per-process thread pool, created on first use
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = Lock()
+
+
+def _get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Get the process-wide job thread pool."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        return _executor
+
+
+def _run_in_app_context(app, job_id: int) -> None:
+    """Thread pool entry point: run a job inside its own app context."""
+    with app.app_context():
+        try:
+            JobService().run_job(job_id)
+        except Exception as e:
+            current_app.logger.error(f"Job {job_id} could not be run: {str(e)}")
+        finally:
+            db.session.remove()
+
+
+class JobService:
+    """
+    Service for background jobs stored in the background_jobs table.
+
+    Jobs are dispatched according to JOB_EXECUTOR: 'thread' runs them in a
+    per-process thread pool, 'process' leaves them for the 'flask run-jobs'
+    worker and 'inline' runs them before the request returns (testing).
+    No broker is needed; the table is the queue.
+    """
+
+    def submit_import(self, file, user_id: int) -> BackgroundJob:
+        """
+        Store an uploaded file and queue its import.
+
+        Args:
+            file: File object from request
+            user_id: ID of user performing import
+
+        Returns:
+            Queued job
+
+        Raises:
+            ValidationError: If file format is invalid
+            DatabaseError: If the job cannot be stored
+        """
+        filepath = ImportService().save_upload(file)
+        try:
+            return self._submit(BackgroundJob.TYPE_IMPORT, {
+                'filepath': filepath,
+                'filename': file.filename
+            }, user_id)
+        except DatabaseError:
+            os.remove(filepath)
+            raise
+
+    def submit_inventory_report(self, start_date: date, end_date: date, user_id: int) -> BackgroundJob:
+        """
+        Queue an XLSX export of the Art 177 inventory report.
+
+        Args:
+            start_date: First day of the report period
+            end_date: Last day of the report period
+            user_id: ID of user requesting the export
+
+        Returns:
+            Queued job
+
+        Raises:
+            ValidationError: If the period is invalid
+            DatabaseError: If the job cannot be stored
+        """
+        if start_date > end_date:
+            raise ValidationError('La fecha inicial no puede ser posterior a la fecha final')
+
+        return self._submit(BackgroundJob.TYPE_INVENTORY_REPORT, {
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat()
+        }, user_id)
+
+    def get_job(self, job_id: int, user=None) -> BackgroundJob:
+        """
+        Get a job, optionally checking that a user may see it.
+
+        Args:
+            job_id: Job ID
+            user: User asking for the job; only its creator or an admin may see it
+
+        Returns:
+            Job
+
+        Raises:
+            NotFoundError: If the job does not exist or belongs to another user
+        """
+        job = db.session.get(BackgroundJob, job_id)
+        if job is None or (user is not None and job.created_by != user.id and not user.is_admin()):
+            raise NotFoundError('Trabajo', job_id)
+        # Thread pool jobs die with their gunicorn worker and no run-jobs
+        # worker sweeps them; fail them here so polling clients stop
+        if self._runs_in_threads() and self._is_stale(job):
+            self.fail_stale_jobs()
+            db.session.refresh(job)
+        return job
+
+    def dispatch(self, job_id: int) -> None:
+        """
+        Hand a pending job to the configured executor.
+
+        Args:
+            job_id: Job ID
+        """
+        executor = current_app.config.get('JOB_EXECUTOR', 'thread')
+        if executor == 'inline':
+            self.run_job(job_id)
+        elif executor == 'thread':
+            app = current_app._get_current_object()
+            _get_executor(current_app.config.get('JOB_WORKERS', 2)).submit(
+                _run_in_app_context, app, job_id
+            )
+        # 'process': the run-jobs worker picks it up from the table
+
+    def claim(self, job_id: int) -> bool:
+        """
+        Atomically move a pending job to running.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            True if this caller claimed the job, False if another worker did
+        """
+        claimed = db.session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.status == BackgroundJob.STATUS_PENDING)
+            .values(status=BackgroundJob.STATUS_RUNNING, started_at=datetime.utcnow())
+        ).rowcount == 1
+        db.session.commit()
+        return claimed
+
+    def claim_next(self) -> Optional[int]:
+        """
+        Claim the oldest pending job.
+
+        Returns:
+            Claimed job ID, or None if the queue is empty
+        """
+        while True:
+            job_id = db.session.execute(
+                select(BackgroundJob.id)
+                .where(BackgroundJob.status == BackgroundJob.STATUS_PENDING)
+                .order_by(BackgroundJob.id)
+                .limit(1)
+            ).scalar()
+            if job_id is None:
+                return None
+            if self.claim(job_id):
+                return job_id
+
+    def run_job(self, job_id: int, claimed: bool = False) -> None:
+        """
+        Run a job and record its outcome.
+
+        Args:
+            job_id: Job ID
+            claimed: Whether the caller already claimed the job
+        """
+        if not claimed and not self.claim(job_id):
+            return
+
+        job = db.session.get(BackgroundJob, job_id)
+        progress = self._progress_callback(job_id)
+        current_app.logger.info(f"Job {job_id} started: {job.job_type}")
+
+        try:
+            if job.job_type == BackgroundJob.TYPE_IMPORT:
+                values = self._run_import(job, progress)
+            else:
+                values = self._run_inventory_report(job, progress)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Job {job_id} failed: {str(e)}")
+            self._finish(job_id, status=BackgroundJob.STATUS_FAILED,
+                         error_message=getattr(e, 'message', str(e)))
+            return
+
+        self._finish(job_id, status=BackgroundJob.STATUS_COMPLETED, progress=100, **values)
+        current_app.logger.info(f"Job {job_id} completed")
+
+    def run_worker(self, interval: float = 2.0, once: bool = False) -> int:
+        """
+        Poll the table for pending jobs and run them one at a time.
+
+        Args:
+            interval: Seconds to sleep when the queue is empty
+            once: Stop when the queue is empty instead of polling
+
+        Returns:
+            Number of jobs run
+        """
+        self.fail_stale_jobs()
+        count = 0
+        while True:
+            job_id = self.claim_next()
+            if job_id is None:
+                if once:
+                    return count
+                time.sleep(interval)
+                continue
+            self.run_job(job_id, claimed=True)
+            db.session.remove()
+            count += 1
+
+    def update_progress(self, job_id: int, percent: int) -> None:
+        """
+        Store a running job's progress on its own connection.
+
+        Progress is advisory: the write is skipped when the database is
+        busy, so it never holds up or breaks the job itself.
+
+        Args:
+            job_id: Job ID
+            percent: Completed percentage (0-100)
+        """
+        stmt = update(BackgroundJob).where(
+            BackgroundJob.id == job_id,
+            BackgroundJob.status == BackgroundJob.STATUS_RUNNING
+        ).values(progress=max(0, min(100, int(percent))))
+
+        with db.engine.connect() as connection:
+            sqlite = connection.dialect.name == 'sqlite'
+            if sqlite:
+                busy_timeout = connection.exec_driver_sql('PRAGMA busy_timeout').scalar()
+                connection.exec_driver_sql(f'PRAGMA busy_timeout = {PROGRESS_BUSY_TIMEOUT_MS}')
+            try:
+                connection.execute(stmt)
+                connection.commit()
+            except OperationalError as e:
+                connection.rollback()
+                current_app.logger.debug(f"Progress of job {job_id} not stored: {str(e)}")
+            finally:
+                if sqlite:
+                    connection.exec_driver_sql(f'PRAGMA busy_timeout = {busy_timeout}')
+
+    def fail_stale_jobs(self) -> int:
+        """
+        Mark jobs left running longer than JOB_TIMEOUT_MINUTES as failed.
+
+        A job stays running if its worker dies mid-way (e.g. a recycled
+        gunicorn worker); this lets clients stop polling it. With the
+        thread executor a job queued in a dead worker's pool stays pending
+        just as long, so pending jobs that old are failed too; the run-jobs
+        worker still picks up pending jobs of the process executor. Runs
+        when the run-jobs worker starts and, with the thread executor, when
+        a job is submitted or a stale one is polled.
+
+        Returns:
+            Number of jobs marked as failed
+        """
+        limit = self._stale_limit()
+        stale = (BackgroundJob.status == BackgroundJob.STATUS_RUNNING) & (BackgroundJob.started_at < limit)
+        if self._runs_in_threads():
+            stale |= (BackgroundJob.status == BackgroundJob.STATUS_PENDING) & (BackgroundJob.created_at < limit)
+        count = db.session.execute(
+            update(BackgroundJob)
+            .where(stale)
+            .values(status=BackgroundJob.STATUS_FAILED, finished_at=datetime.utcnow(),
+                    error_message='El trabajo fue interrumpido')
+        ).rowcount
+        db.session.commit()
+        return count
+
+    def purge_jobs(self, older_than_days: Optional[int] = None) -> int:
+        """
+        Delete finished jobs and their artifacts.
+
+        Args:
+            older_than_days: Age in days, default JOB_RETENTION_DAYS
+
+        Returns:
+            Number of jobs deleted
+        """
+        if older_than_days is None:
+            older_than_days = current_app.config.get('JOB_RETENTION_DAYS', 7)
+        limit = datetime.utcnow() - timedelta(days=older_than_days)
+        finished = BackgroundJob.query.filter(
+            BackgroundJob.status.in_([BackgroundJob.STATUS_COMPLETED, BackgroundJob.STATUS_FAILED]),
+            BackgroundJob.finished_at < limit
+        ).all()
+
+        for job in finished:
+            if job.artifact_path and os.path.exists(job.artifact_path):
+                os.remove(job.artifact_path)
+
+        db.session.execute(delete(BackgroundJob).where(BackgroundJob.id.in_([job.id for job in finished])))
+        db.session.commit()
+        return len(finished)
+
+    def _submit(self, job_type: str, params: Dict[str, Any], user_id: int) -> BackgroundJob:
+        """Store a pending job and dispatch it."""
+        try:
+            if self._runs_in_threads():
+                self.fail_stale_jobs()
+            job = BackgroundJob(job_type=job_type, params=params, created_by=user_id)
+            db.session.add(job)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Database error queuing job: {str(e)}")
+            raise DatabaseError("Error al crear el trabajo", original_error=e)
+
+        current_app.logger.info(f"Job {job.id} queued: {job_type} by user {user_id}")
+        self.dispatch(job.id)
+        db.session.refresh(job)
+        return job
+
+    def _runs_in_threads(self) -> bool:
+        """Whether jobs run in the web workers' thread pools."""
+        return current_app.config.get('JOB_EXECUTOR', 'thread') == 'thread'
+
+    def _stale_limit(self) -> datetime:
+        """Start (or, while pending, creation) time before which a job is considered dead."""
+        return datetime.utcnow() - timedelta(minutes=current_app.config.get('JOB_TIMEOUT_MINUTES', 60))
+
+    def _is_stale(self, job: BackgroundJob) -> bool:
+        """Whether a thread pool job has been running or pending past the limit."""
+        if job.status == BackgroundJob.STATUS_RUNNING:
+            return job.started_at < self._stale_limit()
+        if job.status == BackgroundJob.STATUS_PENDING:
+            return job.created_at < self._stale_limit()
+        return False
+
+    def _run_import(self, job: BackgroundJob, progress: Callable[[int], None]) -> Dict[str, Any]:
+        """Run an import job and return the values to store."""
+        results = ImportService().import_from_path(job.params['filepath'], job.created_by, progress)
+        return {'result': results}
+
+    def _run_inventory_report(self, job: BackgroundJob, progress: Callable[[int], None]) -> Dict[str, Any]:
+        """Write an inventory report job's XLSX artifact and return the values to store."""
+        start_date = date.fromisoformat(job.params['start_date'])
+        end_date = date.fromisoformat(job.params['end_date'])
+        artifact_name = f'inventario_diario_{start_date.isoformat()}_{end_date.isoformat()}.xlsx'
+
+        artifact_dir = os.path.abspath(current_app.config.get('JOB_ARTIFACT_DIR', 'exports'))
+        os.makedirs(artifact_dir, exist_ok=True)
+        artifact_path = os.path.join(artifact_dir, f'job_{job.id}_{artifact_name}')
+
+        try:
+            with open(artifact_path, 'wb') as output:
+                InventoryReportService().write_xlsx(start_date, end_date, output, progress)
+        except Exception:
+            if os.path.exists(artifact_path):
+                os.remove(artifact_path)
+            raise
+
+        return {
+            'artifact_path': artifact_path,
+            'artifact_name': artifact_name,
+            'artifact_mimetype': XLSX_MIMETYPE
+        }
+
+    def _progress_callback(self, job_id: int) -> Callable[[int], None]:
+        """Build a progress callback that only stores increasing percentages."""
+        last = {'percent': 0}
+
+        def progress(percent: int) -> None:
+            if percent > last['percent']:
+                last['percent'] = percent
+                self.update_progress(job_id, percent)
+
+        return progress
+
+    def _finish(self, job_id: int, **values) -> None:
+        """Store a job's final status and outcome."""
+        db.session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id)
+            .values(finished_at=datetime.utcnow(), **values)
+        )
+        db.session.commit()
@@ -2,13 +2,14 @@
 Movement Service - Business logic for inventory movement management.
 """
 from typing import Dict, Any, Optional, List
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from flask import current_app
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.models import Movement, Product
 from app.repositories import MovementRepository, ProductRepository
 from app.services.validation_service import ValidationService
+from app.services.stock_snapshot_service import StockSnapshotService
 from app.utils.exceptions import ValidationError, NotFoundError, DatabaseError, BusinessLogicError
 from app.extensions import db
 
@@ -21,11 +22,16 @@ class MovementService:
         self.movement_repo = MovementRepository()
         self.product_repo = ProductRepository()
         self.validation_service = ValidationService()
+        self.snapshot_service = StockSnapshotService()
     
     def create_movement(self, data: Dict[str, Any], user_id: int) -> Movement:
         """
         Create new movement with stock validation and update.
         
+        The stock change is a conditional UPDATE committed in the same
+        transaction as the movement, so concurrent movements on one
+        product neither lose updates nor oversell.
+        
         Args:
             data: Movement data dictionary
             user_id: ID of user creating the movement
@@ -43,32 +49,10 @@ class MovementService:
             # Validate movement data
             validated_data = self.validation_service.validate_movement_data(data)
             
-            # Get product
             product_id = validated_data['producto_id']
-            product = self.product_repo.get_by_id(product_id)
-            if not product or product.deleted_at is not None:
-                raise NotFoundError("Product", product_id)
-            
-            # Validate stock for SALIDA movements
             tipo = validated_data['tipo'].upper()
             cantidad = validated_data['cantidad']
-            
-            if tipo == 'SALIDA':
-                if product.stock < cantidad:
-                    raise BusinessLogicError(
-                        f"Stock insuficiente. Stock actual: {product.stock}, "
-                        f"cantidad solicitada: {cantidad}"
-                    )
-            
-            # Calculate new stock
-            if tipo == 'ENTRADA':
-                new_stock = product.stock + cantidad
-            elif tipo == 'SALIDA':
-                new_stock = product.stock - cantidad
-            elif tipo == 'AJUSTE':
-                # For AJUSTE, cantidad is the new stock value
-                new_stock = cantidad
-            else:
+            if tipo not in ('ENTRADA', 'SALIDA', 'AJUSTE'):
                 raise ValidationError(f"Tipo de movimiento inválido: {tipo}", field='tipo')
             
             # Set audit fields
@@ -81,26 +65,46 @@ class MovementService:
             if 'fecha' not in validated_data:
                 validated_data['fecha'] = date.today()
             
-            # Create movement
+            # Update stock in the database; SALIDA only applies if enough stock remains
+            if tipo == 'AJUSTE':
+                # For AJUSTE, cantidad is the new stock value
+                new_stock = self.product_repo.set_stock(product_id, cantidad, user_id)
+            else:
+                delta = cantidad if tipo == 'ENTRADA' else -cantidad
+                new_stock = self.product_repo.adjust_stock(product_id, delta, user_id)
+            
+            if new_stock is None:
+                db.session.rollback()
+                product = self.product_repo.get_by_id(product_id)
+                if not product or product.deleted_at is not None:
+                    raise NotFoundError("Product", product_id)
+                raise BusinessLogicError(
+                    f"Stock insuficiente. Stock actual: {product.stock}, "
+                    f"reservado: {product.reserved}, cantidad solicitada: {cantidad}"
+                )
+            
             movement = Movement(**validated_data)
-            created_movement = self.movement_repo.create(movement)
+            db.session.add(movement)
             
-            # Update product stock
-            old_stock = product.stock
-            product.stock = new_stock
-            product.updated_by = user_id
-            product.updated_at = datetime.utcnow()
-            self.product_repo.update(product)
+            # Snapshots from the movement date onward no longer match
+            self.snapshot_service.invalidate_from(movement.fecha)
+            
+            # Movement, stock change and invalidation commit together
+            db.session.commit()
             
             current_app.logger.info(
-                f"Movement created: {tipo} - Product {product.codigo} - "
-                f"Cantidad: {cantidad} - Stock: {old_stock} -> {new_stock} by user {user_id}"
+                f"Movement created: {tipo} - Product {product_id} - "
+                f"Cantidad: {cantidad} - Stock: {new_stock} by user {user_id}"
             )
             
-            return created_movement
+            return movement
             
         except (ValidationError, NotFoundError, BusinessLogicError):
             raise
+        except DatabaseError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Database error creating movement: {e.message}")
+            raise
         except SQLAlchemyError as e:
             db.session.rollback()
             current_app.logger.error(f"Database error creating movement: {str(e)}")
@@ -110,6 +114,133 @@ class MovementService:
             current_app.logger.error(f"Unexpected error creating movement: {str(e)}")
             raise BusinessLogicError(f"Error inesperado al crear el movimiento: {str(e)}")
     
+    def create_movements_batch(self, lines: List[Dict[str, Any]], user_id: int,
+                               fecha: Optional[date] = None,
+                               descripcion: Optional[str] = None) -> List[Movement]:
+        """
+        Register a receiving or dispatch session of many movement lines at once.
+        
+        Every line is validated before anything is written, the referenced
+        products are loaded in one query, stock changes are applied once
+        per product with the lines' net delta, and all movements are
+        inserted in one statement. The batch commits or fails as a whole.
+        
+        Args:
+            lines: Movement lines with tipo, cantidad and producto_id or codigo;
+                each may override the batch fecha and descripcion
+            user_id: ID of user registering the batch
+            fecha: Date for lines without one (default today)
+            descripcion: Description for lines without one
+            
+        Returns:
+            Created movements, in line order
+            
+        Raises:
+            ValidationError: If any line is invalid
+            NotFoundError: If a product does not exist
+            BusinessLogicError: If a product's net stock would go negative
+            DatabaseError: If database operation fails
+        """
+        if not lines:
+            raise ValidationError("El lote no contiene movimientos", field='lineas')
+        
+        max_lines = current_app.config.get('MOVEMENT_BATCH_MAX_LINES', 500)
+        if len(lines) > max_lines:
+            raise ValidationError(f"El lote no puede tener más de {max_lines} movimientos", field='lineas')
+        
+        try:
+            # Validate every line, reporting all errors together
+            validated_lines = []
+            errors = []
+            for number, line in enumerate(lines, start=1):
+                line = dict(line)
+                codigo = str(line.pop('codigo', '') or '').strip()
+                if codigo and not line.get('producto_id'):
+                    line['producto_id'] = -1  # resolved from codigo below
+                line.setdefault('fecha', fecha or date.today())
+                if descripcion and not (line.get('descripcion') or line.get('motivo')):
+                    line['descripcion'] = descripcion
+                try:
+                    validated = self.validation_service.validate_movement_data(line)
+                except ValidationError as e:
+                    errors.append(f"Línea {number}: {e.message}")
+                    continue
+                validated['tipo'] = validated['tipo'].upper()
+                validated_lines.append((number, codigo, validated))
+            
+            if errors:
+                raise ValidationError("; ".join(errors), field='lineas')
+            
+            # Load every referenced product in one query
+            product_ids = {v['producto_id'] for _, codigo, v in validated_lines if not codigo}
+            codigos = {codigo for _, codigo, _ in validated_lines if codigo}
+            products = self.product_repo.get_active_by_keys(product_ids, codigos)
+            by_id = {product.id: product for product in products}
+            by_codigo = {product.codigo: product for product in products}
+            
+            for number, codigo, validated in validated_lines:
+                product = by_codigo.get(codigo) if codigo else by_id.get(validated['producto_id'])
+                if product is None:
+                    raise NotFoundError("Product", codigo or validated['producto_id'])
+                validated['producto_id'] = product.id
+            
+            # Net stock change per product; an AJUSTE resets the running total
+            changes = {}
+            for _, _, validated in validated_lines:
+                counted, delta = changes.get(validated['producto_id'], (None, 0))
+                if validated['tipo'] == 'AJUSTE':
+                    counted, delta = validated['cantidad'], 0
+                elif validated['tipo'] == 'ENTRADA':
+                    delta += validated['cantidad']
+                else:
+                    delta -= validated['cantidad']
+                changes[validated['producto_id']] = (counted, delta)
+            
+            # Apply in id order so concurrent batches lock rows consistently
+            for product_id in sorted(changes):
+                counted, delta = changes[product_id]
+                if counted is not None:
+                    new_stock = counted + delta
+                    ok = new_stock >= 0 and self.product_repo.set_stock(product_id, new_stock, user_id) is not None
+                else:
+                    ok = self.product_repo.adjust_stock(product_id, delta, user_id) is not None
+                if not ok:
+                    db.session.rollback()
+                    product = self.product_repo.get_by_id(product_id)
+                    raise BusinessLogicError(
+                        f"Stock insuficiente para {product.codigo}. Stock actual: {product.stock}, "
+                        f"reservado: {product.reserved}, variación del lote: {delta if counted is None else counted + delta - product.stock}"
+                    )
+            
+            now = datetime.utcnow()
+            movements = self.movement_repo.create_many([
+                dict(validated, created_by=user_id, updated_by=user_id, created_at=now, updated_at=now)
+                for _, _, validated in validated_lines
+            ])
+            
+            # Snapshots from the earliest movement date onward no longer match
+            self.snapshot_service.invalidate_from(min(m.fecha for m in movements))
+            db.session.commit()
+            
+            current_app.logger.info(
+                f"Movement batch created: {len(movements)} movements, "
+                f"{len(changes)} products by user {user_id}"
+            )
+            
+            return movements
+            
+        except (ValidationError, NotFoundError, BusinessLogicError):
+            db.session.rollback()
+            raise
+        except DatabaseError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Database error creating movement batch: {e.message}")
+            raise
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Database error creating movement batch: {str(e)}")
+            raise DatabaseError("Error al registrar el lote de movimientos", original_error=e)
+    
     def get_movement(self, movement_id: int) -> Optional[Movement]:
         """
         Get movement by ID.
@@ -125,7 +256,8 @@ class MovementService:
             return movement
         return None
     
-    def get_movements_by_date(self, fecha: date, page: int = 1, per_page: int = 50):
+    def get_movements_by_date(self, fecha: date, page: int = 1, per_page: int = 50,
+                              cursor: Optional[str] = None, keyset: bool = False):
         """
         Get movements for specific date with pagination.
         
@@ -133,6 +265,8 @@ class MovementService:
             fecha: Date to filter movements
             page: Page number
             per_page: Items per page
+            cursor: Keyset cursor from a previous page
+            keyset: Use keyset pagination instead of page numbers
             
         Returns:
             PaginatedResult with movements
@@ -146,7 +280,9 @@ class MovementService:
                 start_date=fecha,
                 end_date=fecha,
                 page=page,
-                per_page=per_page
+                per_page=per_page,
+                cursor=cursor,
+                keyset=keyset
             )
             
         except Exception as e:
@@ -154,7 +290,8 @@ class MovementService:
             raise BusinessLogicError(f"Error al obtener movimientos: {str(e)}")
     
     def get_movements_by_date_range(self, start_date: date, end_date: date,
-                                    page: int = 1, per_page: int = 50):
+                                    page: int = 1, per_page: int = 50,
+                                    cursor: Optional[str] = None, keyset: bool = False):
         """
         Get movements for date range with pagination.
         
@@ -163,6 +300,8 @@ class MovementService:
             end_date: End date
             page: Page number
             per_page: Items per page
+            cursor: Keyset cursor from a previous page
+            keyset: Use keyset pagination instead of page numbers
             
         Returns:
             PaginatedResult with movements
@@ -179,7 +318,9 @@ class MovementService:
                 start_date=start_date,
                 end_date=end_date,
                 page=page,
-                per_page=per_page
+                per_page=per_page,
+                cursor=cursor,
+                keyset=keyset
             )
             
         except Exception as e:
@@ -205,25 +346,11 @@ class MovementService:
             if not product or product.deleted_at is not None:
                 raise NotFoundError("Product", product_id)
             
-            # Get movements
-            movements = self.movement_repo.get_by_product(product_id)
-            
-            # Filter by date range if provided
-            if start_date or end_date:
-                if start_date and end_date:
-                    self.validation_service.validate_date_range(start_date, end_date)
-                
-                filtered_movements = []
-                for movement in movements:
-                    if start_date and movement.fecha < start_date:
-                        continue
-                    if end_date and movement.fecha > end_date:
-                        continue
-                    filtered_movements.append(movement)
-                
-                return filtered_movements
+            if start_date and end_date:
+                self.validation_service.validate_date_range(start_date, end_date)
             
-            return movements
+            # Date range is applied in SQL
+            return self.movement_repo.get_by_product(product_id, start_date, end_date)
             
         except NotFoundError:
             raise
@@ -231,6 +358,46 @@ class MovementService:
             current_app.logger.error(f"Error getting movement history: {str(e)}")
             raise BusinessLogicError(f"Error al obtener historial de movimientos: {str(e)}")
     
+    def get_product_ledger(self, product_id: int, start_date: Optional[date] = None,
+                           end_date: Optional[date] = None, page: int = 1, per_page: int = 50):
+        """
+        Get a product's movement ledger with running balance, newest first.
+        
+        The balance starts from the stock at the beginning of start_date
+        (latest snapshot moved by later movements), like the inventory
+        report, and restarts at each AJUSTE from its counted quantity.
+        
+        Args:
+            product_id: ID of product
+            start_date: First day; default LEDGER_DEFAULT_DAYS before end_date
+            end_date: Last day; default today
+            page: Page number
+            per_page: Items per page
+            
+        Returns:
+            Tuple of (PaginatedResult of (movement, saldo) rows, opening balance,
+            start date, end date)
+            
+        Raises:
+            NotFoundError: If product not found
+            ValidationError: If the date range is invalid
+        """
+        product = self.product_repo.get_by_id(product_id)
+        if not product or product.deleted_at is not None:
+            raise NotFoundError("Product", product_id)
+        
+        end_date = end_date or date.today()
+        if start_date is None:
+            start_date = end_date - timedelta(days=current_app.config.get('LEDGER_DEFAULT_DAYS', 90))
+        self.validation_service.validate_date_range(start_date, end_date)
+        page, per_page = self.validation_service.validate_pagination(page, per_page)
+        
+        opening = self.snapshot_service.get_opening_balance(product_id, start_date)
+        ledger = self.movement_repo.get_ledger(
+            product_id, start_date, end_date, opening, page=page, per_page=per_page
+        )
+        return ledger, opening, start_date, end_date
+    
     def get_today_movements(self, page: int = 1, per_page: int = 50):
         """
         Get today's movements with pagination.
@@ -0,0 +1,277 @@
+"""
+Pricing Service - Exchange rates and USD/Bs price calculation.
+"""
+import threading
+import time
+import weakref
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import ExchangeRate, AuditLog
+from app.repositories import ProductRepository, ItemGroupRepository
+from app.utils.exceptions import ValidationError, NotFoundError, DatabaseError
+from app.extensions import db
+from app.utils.metrics import record_cache_lookup
+from app.utils.service_cache import tag_versions
+
+
+# Rate used while no exchange rate has been configured
+DEFAULT_EXCHANGE_RATE = 36.50
+
+# Scopes accepted by apply_factor
+FACTOR_SCOPES = ('all', 'category', 'products')
+
+# Rate history cached in process memory per database engine:
+# (tag version, dates, rates, loaded_at), oldest first
+_rate_history = weakref.WeakKeyDictionary()
+_rate_history_lock = threading.Lock()
+
+
+class PricingService:
+    """
+    Service for exchange rates and product prices in Bolivares.
+
+    The whole rate history (one row per day) is kept in process memory
+    under the ExchangeRate tag version of the service cache (see
+    app.utils.service_cache): a commit that writes exchange rates replaces
+    the version, so the history is reloaded on the next read. Processes
+    that cannot see the version (per-process cache) reload it after
+    EXCHANGE_RATE_CACHE_TIMEOUT seconds.
+    """
+
+    def get_current_rate(self) -> float:
+        """
+        Get the most recent USD to Bs rate.
+
+        Returns:
+            Current rate, or DEFAULT_EXCHANGE_RATE if none is configured
+        """
+        _, rates = self._history()
+        return rates[-1] if rates else DEFAULT_EXCHANGE_RATE
+
+    def get_rate_for_date(self, target_date: Union[date, datetime]) -> float:
+        """
+        Get the rate in force on a date: the latest one set on or before it.
+
+        Args:
+            target_date: Date to value prices at
+
+        Returns:
+            Rate for the date; the earliest known rate if the date is older
+            than the history, DEFAULT_EXCHANGE_RATE if there is none
+        """
+        if isinstance(target_date, datetime):
+            target_date = target_date.date()
+        dates, rates = self._history()
+        if not rates:
+            return DEFAULT_EXCHANGE_RATE
+        position = bisect_right(dates, target_date)
+        return rates[position - 1] if position else rates[0]
+
+    def get_rate_history(self, start_date: Optional[date] = None,
+                         end_date: Optional[date] = None) -> List[Tuple[date, float]]:
+        """
+        Get the rates set within a date range.
+
+        Args:
+            start_date: First day (inclusive), unbounded if None
+            end_date: Last day (inclusive), unbounded if None
+
+        Returns:
+            (date, rate) pairs, oldest first
+        """
+        dates, rates = self._history()
+        first = bisect_left(dates, start_date) if start_date else 0
+        last = bisect_right(dates, end_date) if end_date else len(dates)
+        return list(zip(dates[first:last], rates[first:last]))
+
+    def set_rate(self, rate: Union[float, Decimal], user_id: int,
+                 rate_date: Optional[date] = None) -> ExchangeRate:
+        """
+        Set the rate for a day (today by default), replacing any rate already set.
+
+        Args:
+            rate: USD to Bs rate
+            user_id: ID of user setting the rate
+            rate_date: Day the rate applies to
+
+        Returns:
+            Saved exchange rate
+
+        Raises:
+            ValidationError: If rate is not positive
+            DatabaseError: If the rate cannot be saved
+        """
+        if not rate or rate <= 0:
+            raise ValidationError("La tasa de cambio debe ser mayor que cero", field='rate')
+
+        rate_date = rate_date or date.today()
+        try:
+            exchange_rate = ExchangeRate.query.filter_by(date=rate_date).first()
+            if exchange_rate is None:
+                exchange_rate = ExchangeRate(date=rate_date)
+                db.session.add(exchange_rate)
+            exchange_rate.rate = Decimal(str(rate))
+            exchange_rate.created_by = user_id
+            exchange_rate.created_at = datetime.utcnow()
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise DatabaseError("Error al actualizar la tasa de cambio", original_error=e)
+
+        current_app.logger.info(f"Exchange rate for {rate_date} set to {rate} by user {user_id}")
+        return exchange_rate
+
+    def apply_factor(self, factor: Union[float, Decimal], user_id: int, scope: str = 'all',
+                     category_id: Optional[int] = None,
+                     product_ids: Optional[Sequence[int]] = None) -> int:
+        """
+        Set the adjustment factor of many products with one set-based UPDATE.
+
+        One summarised audit entry records the scope, the new factor and how
+        many products had each previous factor.
+
+        Args:
+            factor: New adjustment factor
+            user_id: ID of user applying the factor
+            scope: 'all' products, a 'category' with its subcategories, or
+                explicit 'products'
+            category_id: Root category for the 'category' scope
+            product_ids: Product IDs for the 'products' scope
+
+        Returns:
+            Number of products updated
+
+        Raises:
+            ValidationError: If factor or scope are invalid
+            NotFoundError: If the category does not exist
+            DatabaseError: If the update fails
+        """
+        if not factor or factor <= 0:
+            raise ValidationError("El factor de ajuste debe ser mayor que cero", field='factor')
+        if scope not in FACTOR_SCOPES:
+            raise ValidationError(f"Alcance inválido: {scope}", field='apply_to')
+
+        item_group_ids = ids = None
+        if scope == 'category':
+            if not category_id:
+                raise ValidationError("La categoría es requerida", field='target_id')
+            item_group_ids = ItemGroupRepository().get_subtree_ids(category_id)
+            if not item_group_ids:
+                raise NotFoundError("ItemGroup", category_id)
+        elif scope == 'products':
+            ids = sorted({int(product_id) for product_id in product_ids or ()})
+            if not ids:
+                raise ValidationError("Debe indicar al menos un producto", field='target_id')
+
+        factor = Decimal(str(factor))
+        product_repo = ProductRepository()
+        try:
+            previous = product_repo.count_factors(item_group_ids, ids)
+            updated = product_repo.apply_factor(factor, user_id, item_group_ids, ids)
+            db.session.add(AuditLog(
+                user_id=user_id,
+                action='BULK_UPDATE',
+                entity_type='Product',
+                entity_id=category_id if scope == 'category' else 0,
+                old_values={'factor_ajuste': previous},
+                new_values={
+                    'factor_ajuste': f'{factor:.2f}',
+                    'scope': scope,
+                    'category_ids': item_group_ids,
+                    'product_ids': ids,
+                    'updated': updated
+                }
+            ))
+            db.session.commit()
+        except (DatabaseError, SQLAlchemyError) as e:
+            db.session.rollback()
+            raise DatabaseError("Error al aplicar el factor de ajuste", original_error=e)
+
+        current_app.logger.info(
+            f"Adjustment factor {factor} applied to {updated} products ({scope}) by user {user_id}"
+        )
+        return updated
+
+    @staticmethod
+    def calculate_prices(precio_dolares: Union[Sequence[Any], np.ndarray],
+                         factor_ajuste: Union[Sequence[Any], np.ndarray, float, None] = None,
+                         rate: float = DEFAULT_EXCHANGE_RATE) -> Dict[str, np.ndarray]:
+        """
+        Compute USD, Bs and adjusted Bs prices for many products at once.
+
+        Missing prices count as 0 and missing factors as 1, as in the
+        product model defaults.
+
+        Args:
+            precio_dolares: USD prices
+            factor_ajuste: Adjustment factors, one per price or a single value
+            rate: USD to Bs rate
+
+        Returns:
+            Arrays 'precio_dolares', 'precio_bs' and 'precio_final_bs',
+            rounded to cents
+        """
+        usd = np.nan_to_num(np.asarray(precio_dolares, dtype=float), nan=0.0)
+        factor = np.asarray(1.0 if factor_ajuste is None else factor_ajuste, dtype=float)
+        factor = np.where(np.isnan(factor), 1.0, factor)
+
+        precio_bs = usd * float(rate)
+        return {
+            'precio_dolares': usd.round(2),
+            'precio_bs': precio_bs.round(2),
+            'precio_final_bs': (precio_bs * factor).round(2),
+        }
+
+    def price_products(self, products: Iterable[Any], rate: Optional[float] = None) -> List[Dict[str, float]]:
+        """
+        Price a list of products (models or rows with precio_dolares and factor_ajuste).
+
+        Args:
+            products: Products to price
+            rate: USD to Bs rate, the current rate if None
+
+        Returns:
+            One dict of prices per product, in input order
+        """
+        products = list(products)
+        prices = self.calculate_prices(
+            [float(p.precio_dolares) if p.precio_dolares is not None else np.nan for p in products],
+            [float(p.factor_ajuste) if p.factor_ajuste is not None else np.nan for p in products],
+            self.get_current_rate() if rate is None else rate
+        )
+        return [
+            {key: float(values[index]) for key, values in prices.items()}
+            for index in range(len(products))
+        ]
+
+    def _history(self) -> Tuple[Tuple[date, ...], Tuple[float, ...]]:
+        """Get the cached rate history, loading it if stale or expired."""
+        # Read before loading: a rate committed during the load bumps it again
+        version = tag_versions([ExchangeRate.__name__])[0]
+        timeout = current_app.config.get('EXCHANGE_RATE_CACHE_TIMEOUT', 60)
+        engine = db.engine
+        history = _rate_history.get(engine)
+        fresh = (history is not None and history[0] == version
+                 and time.monotonic() - history[3] <= timeout)
+        record_cache_lookup('exchange_rate', fresh)
+        if not fresh:
+            rows = db.session.execute(
+                select(ExchangeRate.date, ExchangeRate.rate).order_by(ExchangeRate.date)
+            ).all()
+            history = (
+                version,
+                tuple(row.date for row in rows),
+                tuple(float(row.rate) for row in rows),
+                time.monotonic()
+            )
+            with _rate_history_lock:
+                _rate_history[engine] = history
+        return history[1], history[2]
@@ -9,6 +9,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from app.models import Product, Supplier
 from app.repositories import ProductRepository, SupplierRepository
 from app.services.validation_service import ValidationService
+from app.utils.code_generator import CodeGenerator
 from app.utils.exceptions import ValidationError, NotFoundError, DatabaseError, BusinessLogicError
 from app.extensions import db
 
@@ -288,28 +289,9 @@ class ProductService:
         Returns:
             Generated product code in format X-XX-NN
         """
-        # Get next number for this rubro-iniciales combination
-        prefix = f"{rubro}-{iniciales}"
-        
-        # Find highest number for this prefix
-        products = Product.query.filter(
-            Product.codigo.like(f"{prefix}-%")
-        ).all()
-        
-        max_num = 0
-        for product in products:
-            try:
-                parts = product.codigo.split('-')
-                if len(parts) == 3:
-                    num = int(parts[2])
-                    if num > max_num:
-                        max_num = num
-            except (ValueError, IndexError):
-                continue
-        
-        # Generate next code
-        next_num = max_num + 1
-        return f"{prefix}-{next_num:02d}"
+        # Take the next number from the counter for this rubro-iniciales combination
+        next_num = CodeGenerator.get_next_sequence(rubro, iniciales)
+        return f"{rubro}-{iniciales}-{next_num:02d}"
 
     def get_products_by_category(self, category_id: int, page: int = 1, per_page: int = 20):
         """
@@ -10,6 +10,8 @@ from sqlalchemy.exc import SQLAlchemyError
 from app.models import SalesOrder, SalesOrderItem, Product, Customer
 from app.repositories import SalesOrderRepository, ProductRepository, CustomerRepository
 from app.services.validation_service import ValidationService
+from app.services.document_sequence_service import DocumentSequenceService
+from app.services.stock_reservation_service import StockReservationService
 from app.utils.exceptions import ValidationError, NotFoundError, DatabaseError, BusinessLogicError
 from app.extensions import db
 
@@ -23,6 +25,8 @@ class SalesOrderService:
         self.product_repo = ProductRepository()
         self.customer_repo = CustomerRepository()
         self.validation_service = ValidationService()
+        self.sequence_service = DocumentSequenceService()
+        self.reservation_service = StockReservationService()
     
     def create_sales_order(self, data: Dict[str, Any], user_id: int) -> SalesOrder:
         """
@@ -54,8 +58,8 @@ class SalesOrderService:
             if not items_data:
                 raise ValidationError("La orden debe tener al menos un producto", field='items')
             
-            # Generate order number
-            order_number = self.sales_order_repo.generate_order_number()
+            # Take the order number; it is given back if the order is not saved
+            order_number = self._generate_order_number()
             
             # Prepare order data
             order_data = {
@@ -101,7 +105,8 @@ class SalesOrderService:
             
             return created_order
             
-        except ValidationError:
+        except (ValidationError, DatabaseError):
+            db.session.rollback()
             raise
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -112,6 +117,20 @@ class SalesOrderService:
             current_app.logger.error(f"Unexpected error creating sales order: {str(e)}")
             raise BusinessLogicError(f"Error inesperado al crear la orden: {str(e)}")
     
+    def _generate_order_number(self) -> str:
+        """
+        Take the next order number in the current transaction.
+        
+        Returns:
+            Order number in format SO-YYYYMMDD-NNNN
+        """
+        period = datetime.now().strftime('%Y%m%d')
+        prefix = f"SO-{period}"
+        sequence = self.sequence_service.next_value(
+            'SO', period, seed=lambda: self.sales_order_repo.get_last_order_sequence(prefix)
+        )
+        return f"{prefix}-{sequence:04d}"
+    
     def _create_order_item(self, sales_order: SalesOrder, item_data: Dict[str, Any]) -> SalesOrderItem:
         """Create sales order item."""
         # Validate product
@@ -204,7 +223,10 @@ class SalesOrderService:
     
     def confirm_order(self, order_id: int, user_id: int) -> SalesOrder:
         """
-        Confirm order and reduce stock.
+        Confirm order and reserve its stock.
+        
+        The quantities stay in on-hand stock but are no longer available to
+        other orders or counter sales until the order ships or is cancelled.
         
         Args:
             order_id: Order ID
@@ -214,7 +236,7 @@ class SalesOrderService:
             Updated order
             
         Raises:
-            BusinessLogicError: If stock is insufficient
+            BusinessLogicError: If available stock is insufficient
         """
         try:
             order = self.sales_order_repo.get_by_id(order_id)
@@ -224,39 +246,29 @@ class SalesOrderService:
             if not order.can_be_confirmed():
                 raise BusinessLogicError("La orden no puede ser confirmada")
             
-            # Check stock for all items
-            for item in order.items:
-                product = item.product
-                if product.stock < item.quantity:
-                    raise BusinessLogicError(
-                        f"Stock insuficiente para {product.descripcion}. "
-                        f"Stock actual: {product.stock}, requerido: {item.quantity}"
-                    )
-            
-            # Reduce stock
-            for item in order.items:
-                product = item.product
-                product.stock -= item.quantity
-                product.updated_by = user_id
-                product.updated_at = datetime.utcnow()
-                self.product_repo.update(product)
-            
-            # Update order status
-            order.status = 'confirmed'
-            order.updated_by = user_id
-            order.updated_at = datetime.utcnow()
+            # Status change and reservations commit together; another
+            # worker confirming the same order loses the status race
+            if not self.sales_order_repo.transition_status(order_id, ['draft'], 'confirmed', user_id):
+                db.session.rollback()
+                raise BusinessLogicError("La orden no puede ser confirmada")
             
-            updated_order = self.sales_order_repo.update(order)
+            try:
+                self.reservation_service.reserve_order(order, user_id)
+            except BusinessLogicError:
+                db.session.rollback()
+                raise
+            
+            db.session.commit()
             
             current_app.logger.info(
-                f"Sales order confirmed: {updated_order.order_number} by user {user_id}"
+                f"Sales order confirmed: {order.order_number} by user {user_id}"
             )
             
-            return updated_order
+            return order
             
         except (NotFoundError, BusinessLogicError):
             raise
-        except SQLAlchemyError as e:
+        except (SQLAlchemyError, DatabaseError) as e:
             db.session.rollback()
             current_app.logger.error(f"Database error confirming order: {str(e)}")
             raise DatabaseError("Error al confirmar la orden", original_error=e)
@@ -266,7 +278,7 @@ class SalesOrderService:
             raise BusinessLogicError(f"Error inesperado al confirmar la orden: {str(e)}")
     
     def cancel_order(self, order_id: int, user_id: int) -> SalesOrder:
-        """Cancel order and restore stock if confirmed."""
+        """Cancel order and release its reserved stock if confirmed."""
         try:
             order = self.sales_order_repo.get_by_id(order_id)
             if not order or order.deleted_at is not None:
@@ -275,31 +287,28 @@ class SalesOrderService:
             if not order.can_be_cancelled():
                 raise BusinessLogicError("La orden no puede ser cancelada")
             
-            # Restore stock if order was confirmed
-            if order.status == 'confirmed':
-                for item in order.items:
-                    product = item.product
-                    product.stock += item.quantity
-                    product.updated_by = user_id
-                    product.updated_at = datetime.utcnow()
-                    self.product_repo.update(product)
-            
-            # Update order status
-            order.status = 'cancelled'
-            order.updated_by = user_id
-            order.updated_at = datetime.utcnow()
+            # Release reservations if order was confirmed; the status transition
+            # decides it, not the status read above, which may be stale
+            if self.sales_order_repo.transition_status(order_id, ['confirmed'], 'cancelled', user_id):
+                if not self.reservation_service.release_order(order_id):
+                    # Confirmed before reservations existed: stock was deducted
+                    for item in order.items:
+                        self.product_repo.adjust_stock(item.product_id, item.quantity, user_id)
+            elif not self.sales_order_repo.transition_status(order_id, ['draft'], 'cancelled', user_id):
+                db.session.rollback()
+                raise BusinessLogicError("La orden no puede ser cancelada")
             
-            updated_order = self.sales_order_repo.update(order)
+            db.session.commit()
             
             current_app.logger.info(
-                f"Sales order cancelled: {updated_order.order_number} by user {user_id}"
+                f"Sales order cancelled: {order.order_number} by user {user_id}"
             )
             
-            return updated_order
+            return order
             
         except (NotFoundError, BusinessLogicError):
             raise
-        except SQLAlchemyError as e:
+        except (SQLAlchemyError, DatabaseError) as e:
             db.session.rollback()
             current_app.logger.error(f"Database error cancelling order: {str(e)}")
             raise DatabaseError("Error al cancelar la orden", original_error=e)
@@ -309,7 +318,13 @@ class SalesOrderService:
             raise BusinessLogicError(f"Error inesperado al cancelar la orden: {str(e)}")
     
     def update_order_status(self, order_id: int, new_status: str, user_id: int) -> SalesOrder:
-        """Update order status."""
+        """
+        Update order status.
+        
+        Confirming and cancelling go through confirm_order and cancel_order
+        so stock is reserved or released; shipping or delivering a confirmed
+        order takes its reserved quantities out of stock.
+        """
         try:
             order = self.sales_order_repo.get_by_id(order_id)
             if not order or order.deleted_at is not None:
@@ -319,6 +334,18 @@ class SalesOrderService:
             if new_status not in valid_statuses:
                 raise ValidationError(f"Estado inválido: {new_status}", field='status')
             
+            if new_status == 'confirmed' and order.status == 'draft':
+                return self.confirm_order(order_id, user_id)
+            if new_status == 'cancelled':
+                return self.cancel_order(order_id, user_id)
+            
+            if new_status in ('shipped', 'delivered'):
+                try:
+                    self.reservation_service.fulfill_order(order_id)
+                except BusinessLogicError:
+                    db.session.rollback()
+                    raise
+            
             order.status = new_status
             order.updated_by = user_id
             order.updated_at = datetime.utcnow()
@@ -331,9 +358,9 @@ class SalesOrderService:
             
             return updated_order
             
-        except (NotFoundError, ValidationError):
+        except (NotFoundError, ValidationError, BusinessLogicError):
             raise
-        except SQLAlchemyError as e:
+        except (SQLAlchemyError, DatabaseError) as e:
             db.session.rollback()
             current_app.logger.error(f"Database error updating order status: {str(e)}")
             raise DatabaseError("Error al actualizar el estado", original_error=e)
@@ -0,0 +1,174 @@
+"""
+Stock Reservation Service - Holds stock for confirmed sales orders.
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import Product, SalesOrder, StockReservation
+from app.utils.exceptions import BusinessLogicError, DatabaseError
+from app.extensions import db
+
+
+class StockReservationService:
+    """
+    Service for stock reservations.
+
+    Confirming an order reserves its quantities (products.reserved) instead
+    of taking them out of on-hand stock; shipping turns the reservation into
+    a stock deduction and cancelling releases it. Every method works in the
+    caller's transaction and never commits, so the reservation and the order
+    status change are saved together.
+    """
+
+    def reserve_order(self, order: SalesOrder, user_id: int) -> List[StockReservation]:
+        """
+        Reserve the quantities of every line of an order.
+
+        Each product is reserved with one conditional UPDATE, in id order so
+        concurrent confirmations lock rows consistently. Lines of the same
+        product are added up first.
+
+        Args:
+            order: Sales order with items
+            user_id: ID of user confirming the order
+
+        Returns:
+            Created reservations
+
+        Raises:
+            BusinessLogicError: If a product does not have enough available
+                stock; the caller must roll back
+            DatabaseError: If the reservation cannot be saved
+        """
+        quantities = Counter()
+        for item in order.items:
+            quantities[item.product_id] += item.quantity
+
+        now = datetime.utcnow()
+        try:
+            for product_id in sorted(quantities):
+                quantity = quantities[product_id]
+                available = db.session.execute(
+                    update(Product)
+                    .where(
+                        Product.id == product_id,
+                        Product.deleted_at.is_(None),
+                        Product.stock - Product.reserved >= quantity
+                    )
+                    .values(reserved=Product.reserved + quantity)
+                    .returning(Product.stock - Product.reserved)
+                ).scalar()
+                if available is None:
+                    product = db.session.get(Product, product_id)
+                    raise BusinessLogicError(
+                        f"Stock insuficiente para {product.descripcion}. "
+                        f"Disponible: {product.available}, requerido: {quantity}"
+                    )
+
+            return list(db.session.scalars(
+                insert(StockReservation).returning(StockReservation),
+                [
+                    {
+                        'sales_order_id': order.id,
+                        'product_id': product_id,
+                        'quantity': quantities[product_id],
+                        'status': StockReservation.STATUS_ACTIVE,
+                        'created_at': now,
+                        'created_by': user_id
+                    }
+                    for product_id in sorted(quantities)
+                ]
+            ))
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Error al reservar stock para la orden {order.id}", original_error=e)
+
+    def release_order(self, order_id: int) -> int:
+        """
+        Release the active reservations of an order (order cancelled).
+
+        Args:
+            order_id: Sales order ID
+
+        Returns:
+            Number of reservations released; 0 if the order had none
+        """
+        return len(self._close(order_id, StockReservation.STATUS_RELEASED, deduct_stock=False))
+
+    def fulfill_order(self, order_id: int) -> int:
+        """
+        Turn the active reservations of an order into stock deductions (order shipped).
+
+        Args:
+            order_id: Sales order ID
+
+        Returns:
+            Number of reservations fulfilled; 0 if the order had none
+
+        Raises:
+            BusinessLogicError: If on-hand stock was counted below the reserved
+                quantity in the meantime; the caller must roll back
+        """
+        return len(self._close(order_id, StockReservation.STATUS_FULFILLED, deduct_stock=True))
+
+    def get_available(self, product_ids: Iterable[int]) -> Dict[int, int]:
+        """
+        Available-to-promise quantities (stock minus reserved).
+
+        Args:
+            product_ids: Product IDs
+
+        Returns:
+            Available quantity by product ID; unknown products are left out
+        """
+        rows = db.session.execute(
+            select(Product.id, Product.stock - Product.reserved)
+            .where(Product.id.in_(list(product_ids)))
+        )
+        return {product_id: available for product_id, available in rows}
+
+    def _close(self, order_id: int, status: str, deduct_stock: bool) -> List[tuple]:
+        """
+        Close the active reservations of an order and take them off products.reserved.
+
+        The status UPDATE claims the rows, so two workers closing the same
+        order cannot both give the quantities back.
+        """
+        try:
+            closed = db.session.execute(
+                update(StockReservation)
+                .where(
+                    StockReservation.sales_order_id == order_id,
+                    StockReservation.status == StockReservation.STATUS_ACTIVE
+                )
+                .values(status=status, closed_at=datetime.utcnow())
+                .returning(StockReservation.product_id, StockReservation.quantity)
+            ).all()
+
+            quantities = Counter()
+            for product_id, quantity in closed:
+                quantities[product_id] += quantity
+
+            for product_id in sorted(quantities):
+                quantity = quantities[product_id]
+                values = {'reserved': Product.reserved - quantity}
+                conditions = [Product.id == product_id]
+                if deduct_stock:
+                    values['stock'] = Product.stock - quantity
+                    conditions.append(Product.stock >= quantity)
+                applied = db.session.execute(
+                    update(Product).where(*conditions).values(**values).returning(Product.id)
+                ).scalar()
+                if applied is None:
+                    product = db.session.get(Product, product_id)
+                    raise BusinessLogicError(
+                        f"Stock insuficiente para {product.descripcion}. "
+                        f"Stock actual: {product.stock}, reservado: {quantity}"
+                    )
+
+            return closed
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Error al actualizar las reservas de la orden {order_id}", original_error=e)
@@ -0,0 +1,318 @@
+"""
+Stock Snapshot Service - Daily closing balances for constant-time opening stock.
+"""
+from typing import Optional, Dict, Any
+from datetime import datetime, date, timedelta
+from flask import current_app
+from sqlalchemy import func, and_, case, select, insert, delete, literal
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import Product, Movement, StockSnapshot, CierreDia
+from app.utils.exceptions import BusinessLogicError, DatabaseError
+from app.extensions import db
+
+
+class StockSnapshotService:
+    """
+    Service for the stock snapshot ledger.
+
+    Closing a day stores the closing quantity and value of every active
+    product. Opening balances for a period are then read from the latest
+    snapshot plus the movements recorded after it.
+    """
+
+    def get_latest_snapshot_date(self, before: date) -> Optional[date]:
+        """
+        Get the most recent snapshot date strictly before a date.
+
+        Args:
+            before: Upper bound (exclusive)
+
+        Returns:
+            Snapshot date or None if there is no snapshot before it
+        """
+        return db.session.execute(
+            select(func.max(StockSnapshot.fecha)).where(StockSnapshot.fecha < before)
+        ).scalar()
+
+    def movement_balances(self, before: date, after: Optional[date] = None,
+                          producto_id: Optional[int] = None):
+        """
+        Per-product stock change of the movements in a date range.
+
+        An AJUSTE sets the stock to its cantidad, so only the last AJUSTE
+        and the movements after it (in fecha, id order) count, and the
+        starting balance is replaced rather than added to.
+
+        Args:
+            before: Upper bound (exclusive)
+            after: Lower bound (exclusive), e.g. the previous snapshot date
+            producto_id: Restrict to one product
+
+        Returns:
+            Subquery of (producto_id, quantity, reset) where reset is 1 if
+            the range has an AJUSTE; see balance_from
+        """
+        adjustment = case((Movement.is_adjustment(), 1), else_=0)
+        # AJUSTE rows after each movement: a later one overrides it
+        later_resets = func.sum(adjustment).over(
+            partition_by=Movement.producto_id,
+            order_by=(Movement.fecha.desc(), Movement.id.desc()), rows=(None, -1)
+        )
+        movement_filter = [Movement.deleted_at.is_(None), Movement.fecha < before]
+        if after is not None:
+            movement_filter.append(Movement.fecha > after)
+        if producto_id is not None:
+            movement_filter.append(Movement.producto_id == producto_id)
+
+        rows = select(
+            Movement.producto_id,
+            Movement.balance_quantity().label('quantity'),
+            adjustment.label('adjustment'),
+            func.coalesce(later_resets, 0).label('later_resets')
+        ).where(*movement_filter).subquery()
+
+        return select(
+            rows.c.producto_id,
+            func.sum(case((rows.c.later_resets == 0, rows.c.quantity), else_=0)).label('quantity'),
+            func.max(rows.c.adjustment).label('reset')
+        ).group_by(rows.c.producto_id).subquery()
+
+    @staticmethod
+    def balance_from(start, balances):
+        """
+        SQL expression for a starting balance moved by movement_balances.
+
+        Args:
+            start: Balance before the range (e.g. a snapshot's closing_qty)
+            balances: Subquery from movement_balances, outer joined
+
+        Returns:
+            Balance at the end of the range
+        """
+        return case(
+            (balances.c.reset == 1, balances.c.quantity),
+            else_=func.coalesce(start, 0) + func.coalesce(balances.c.quantity, 0)
+        )
+
+    def get_opening_balance(self, producto_id: int, fecha: date) -> int:
+        """
+        Get a product's stock at the start of a day.
+
+        Args:
+            producto_id: Product ID
+            fecha: Day whose opening balance is wanted
+
+        Returns:
+            Latest snapshot before the day moved by the movements after it
+        """
+        previous = self.get_latest_snapshot_date(fecha)
+
+        opening = 0
+        if previous is not None:
+            opening = db.session.execute(
+                select(StockSnapshot.closing_qty).where(
+                    StockSnapshot.producto_id == producto_id,
+                    StockSnapshot.fecha == previous
+                )
+            ).scalar() or 0
+
+        balances = self.movement_balances(fecha, previous, producto_id)
+        row = db.session.execute(select(balances.c.quantity, balances.c.reset)).first()
+        if row is None:
+            return opening
+        return row.quantity if row.reset else opening + row.quantity
+
+    def is_closed(self, fecha: date) -> bool:
+        """Check if a day has already been closed."""
+        return db.session.query(
+            db.session.query(CierreDia).filter_by(fecha=fecha).exists()
+        ).scalar()
+
+    def close_day(self, fecha: date, user_id: Optional[int] = None) -> CierreDia:
+        """
+        Close a day and store the closing balance of every active product.
+
+        Args:
+            fecha: Day to close
+            user_id: ID of user closing the day
+
+        Returns:
+            Created day close record
+
+        Raises:
+            BusinessLogicError: If the day is already closed or is in the future
+            DatabaseError: If database operation fails
+        """
+        if fecha > date.today():
+            raise BusinessLogicError("No se puede cerrar un día futuro")
+        if self.is_closed(fecha):
+            raise BusinessLogicError(f"El día {fecha.isoformat()} ya está cerrado")
+
+        try:
+            count = self._write_snapshots(fecha)
+            cierre = CierreDia(
+                fecha=fecha,
+                cerrado_en=datetime.utcnow(),
+                cerrado_por=user_id,
+                productos=count
+            )
+            db.session.add(cierre)
+            db.session.commit()
+
+            current_app.logger.info(
+                f"Day closed: {fecha.isoformat()} - {count} snapshots by user {user_id}"
+            )
+
+            return cierre
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Database error closing day: {str(e)}")
+            raise DatabaseError("Error al cerrar el día", original_error=e)
+
+    def rebuild(self, start_date: Optional[date] = None,
+                end_date: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Rebuild snapshots from movements for every day in a range.
+
+        Existing snapshots from start_date onward are replaced and each
+        rebuilt day is recorded as closed.
+
+        Args:
+            start_date: First day to rebuild (default: first movement date)
+            end_date: Last day to rebuild (default: yesterday)
+
+        Returns:
+            Dictionary with rebuilt days and snapshot count
+        """
+        if start_date is None:
+            start_date = db.session.execute(
+                select(func.min(Movement.fecha)).where(Movement.deleted_at.is_(None))
+            ).scalar()
+        if end_date is None:
+            end_date = date.today() - timedelta(days=1)
+
+        if start_date is None or start_date > end_date:
+            return {'days': 0, 'snapshots': 0}
+
+        try:
+            db.session.execute(
+                delete(StockSnapshot).where(StockSnapshot.fecha >= start_date)
+            )
+            closed_days = set(db.session.execute(
+                select(CierreDia.fecha).where(
+                    CierreDia.fecha >= start_date,
+                    CierreDia.fecha <= end_date
+                )
+            ).scalars())
+
+            days = 0
+            snapshots = 0
+            day = start_date
+            while day <= end_date:
+                count = self._write_snapshots(day)
+                if day not in closed_days:
+                    db.session.add(CierreDia(fecha=day, cerrado_en=datetime.utcnow(), productos=count))
+                else:
+                    db.session.query(CierreDia).filter_by(fecha=day).update({'productos': count})
+                days += 1
+                snapshots += count
+                day += timedelta(days=1)
+
+            db.session.commit()
+
+            current_app.logger.info(
+                f"Stock snapshots rebuilt: {days} days, {snapshots} snapshots"
+            )
+
+            return {'days': days, 'snapshots': snapshots}
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Database error rebuilding snapshots: {str(e)}")
+            raise DatabaseError("Error al reconstruir el historial de existencias", original_error=e)
+
+    def invalidate_from(self, fecha: date) -> int:
+        """
+        Drop snapshots from a date onward after a backdated movement.
+
+        The day closes from that date are deleted with them, so the days
+        can be closed again. Later reports fall back to the previous
+        snapshot plus movements, so the ledger stays correct until the
+        days are closed or rebuilt. Only flushes: the caller commits, so
+        the movement and the invalidation are saved or discarded together.
+
+        Args:
+            fecha: Date of the backdated movement
+
+        Returns:
+            Number of deleted snapshots
+
+        Raises:
+            DatabaseError: If database operation fails
+        """
+        try:
+            stale = db.session.query(
+                db.session.query(CierreDia).filter(CierreDia.fecha >= fecha).exists()
+                | db.session.query(StockSnapshot).filter(StockSnapshot.fecha >= fecha).exists()
+            ).scalar()
+            if not stale:
+                return 0
+
+            result = db.session.execute(
+                delete(StockSnapshot).where(StockSnapshot.fecha >= fecha)
+            )
+            reopened = db.session.execute(
+                delete(CierreDia).where(CierreDia.fecha >= fecha)
+            )
+            current_app.logger.warning(
+                f"Stock snapshots invalidated from {fecha.isoformat()}: {result.rowcount} rows, "
+                f"{reopened.rowcount} days reopened"
+            )
+            return result.rowcount
+        except SQLAlchemyError as e:
+            raise DatabaseError("Error al invalidar el historial de existencias", original_error=e)
+
+    def _write_snapshots(self, fecha: date) -> int:
+        """
+        Insert the snapshots of one day with a single INSERT ... SELECT.
+
+        The closing quantity is the previous snapshot moved by the
+        movements recorded after it, up to and including fecha.
+
+        Args:
+            fecha: Day to snapshot
+
+        Returns:
+            Number of snapshots written
+        """
+        previous = self.get_latest_snapshot_date(fecha)
+        balances = self.movement_balances(fecha + timedelta(days=1), previous)
+        closing_qty = self.balance_from(StockSnapshot.closing_qty, balances)
+
+        source = select(
+            Product.id,
+            literal(fecha, db.Date),
+            closing_qty,
+            closing_qty * Product.precio_dolares,
+            literal(datetime.utcnow(), db.DateTime)
+        ).select_from(Product).outerjoin(
+            StockSnapshot,
+            and_(
+                StockSnapshot.producto_id == Product.id,
+                StockSnapshot.fecha == previous
+            )
+        ).outerjoin(
+            balances, balances.c.producto_id == Product.id
+        ).where(
+            Product.deleted_at.is_(None)
+        )
+
+        result = db.session.execute(
+            insert(StockSnapshot).from_select(
+                ['producto_id', 'fecha', 'closing_qty', 'closing_value', 'created_at'],
+                source
+            )
+        )
+        return result.rowcount
@@ -11,6 +11,7 @@ from app.repositories import SupplierRepository
 from app.services.validation_service import ValidationService
 from app.utils.exceptions import ValidationError, NotFoundError, DatabaseError, BusinessLogicError
 from app.extensions import db
+from app.utils.service_cache import cached
 
 
 class SupplierService:
@@ -237,6 +238,7 @@ class SupplierService:
             current_app.logger.error(f"Error listing suppliers: {str(e)}")
             raise BusinessLogicError(f"Error al listar proveedores: {str(e)}")
     
+    @cached(Supplier, merge=True)
     def get_all_suppliers(self):
         """
         Get all active suppliers without pagination.
@@ -2,8 +2,11 @@
 Code Generator utility for automatic product code generation.
 """
 import re
-from typing import Optional
-from app.models import Product, ItemGroup
+from collections import Counter
+from datetime import datetime
+from typing import Optional, List, Tuple, Dict
+from sqlalchemy import select, update
+from app.models import Product, ItemGroup, CodeSequence
 from app.extensions import db
 
 
@@ -78,43 +81,129 @@ class CodeGenerator:
         
         return f"{first_initials}-{second_initials}"
     
+    @staticmethod
+    def split_code(codigo: str) -> Optional[Tuple[str, str, int]]:
+        """
+        Split a product code into its sequence key and number.
+        
+        Args:
+            codigo: Product code (E-SO-PO-03, A-BC-01, ...)
+            
+        Returns:
+            Tuple of (prefix, initials, sequence) or None if the code has no sequence
+        """
+        base, _, number = codigo.rpartition('-')
+        prefix, _, initials = base.partition('-')
+        if not prefix or not initials or not number.isdigit():
+            return None
+        return prefix, initials, int(number)
+    
+    @staticmethod
+    def reserve_sequences(category_prefix: str, description_initials: str, count: int = 1) -> int:
+        """
+        Reserve a block of consecutive sequence numbers for a prefix and initials.
+        
+        The counter row is incremented with a single UPDATE in the caller's
+        transaction, so concurrent workers never get the same number and a
+        rolled back creation gives its numbers back. A key seen for the first
+        time is seeded from the highest existing code.
+        
+        Args:
+            category_prefix: Category prefix (E, P, A, etc.)
+            description_initials: Description initials (SO-PO, CO-GA, etc.)
+            count: Number of sequence numbers to reserve
+            
+        Returns:
+            First reserved sequence number
+        """
+        key = (CodeSequence.prefix == category_prefix) & (CodeSequence.initials == description_initials)
+        
+        if db.session.execute(select(CodeSequence.id).where(key)).scalar() is None:
+            CodeGenerator._create_sequence(category_prefix, description_initials)
+        
+        db.session.execute(
+            update(CodeSequence)
+            .where(key)
+            .values(last_value=CodeSequence.last_value + count, updated_at=datetime.utcnow())
+        )
+        last_value = db.session.execute(select(CodeSequence.last_value).where(key)).scalar()
+        
+        return last_value - count + 1
+    
     @staticmethod
     def get_next_sequence(category_prefix: str, description_initials: str) -> int:
         """
-        Get next sequence number for a given prefix and initials.
+        Allocate the next sequence number for a given prefix and initials.
         
         Args:
             category_prefix: Category prefix (E, P, A, etc.)
             description_initials: Description initials (SO-PO, CO-GA, etc.)
             
         Returns:
-            Next sequence number
-        """
-        # Build pattern to search for existing codes
-        pattern = f"{category_prefix}-{description_initials}-%"
-        
-        # Find all products with similar codes
-        existing_products = Product.query.filter(
-            Product.codigo.like(pattern),
-            Product.deleted_at == None
-        ).all()
-        
-        if not existing_products:
-            return 1
-        
-        # Extract sequence numbers
-        max_sequence = 0
-        for product in existing_products:
-            # Extract number from code (e.g., "E-SO-PO-03" -> 3)
-            parts = product.codigo.split('-')
-            if len(parts) >= 4:
-                try:
-                    sequence = int(parts[3])
-                    max_sequence = max(max_sequence, sequence)
-                except ValueError:
-                    continue
-        
-        return max_sequence + 1
+            Next sequence number (reserved, it is not handed out again)
+        """
+        return CodeGenerator.reserve_sequences(category_prefix, description_initials, 1)
+    
+    @staticmethod
+    def backfill_sequences() -> int:
+        """
+        Raise every counter to the highest code number already in use.
+        
+        Reads all product codes once (soft deleted included, since codigo
+        is unique). Counters are never lowered.
+        
+        Returns:
+            Number of counters created or raised
+        """
+        highest: Dict[Tuple[str, str], int] = {}
+        for (codigo,) in db.session.execute(
+            select(Product.codigo).execution_options(yield_per=1000)
+        ):
+            parts = CodeGenerator.split_code(codigo)
+            if parts:
+                prefix, initials, number = parts
+                highest[(prefix, initials)] = max(highest.get((prefix, initials), 0), number)
+        
+        sequences = {(seq.prefix, seq.initials): seq for seq in CodeSequence.query.all()}
+        changed = 0
+        for (prefix, initials), number in highest.items():
+            sequence = sequences.get((prefix, initials))
+            if sequence is None:
+                db.session.add(CodeSequence(prefix=prefix, initials=initials, last_value=number))
+                changed += 1
+            elif sequence.last_value < number:
+                sequence.last_value = number
+                sequence.updated_at = datetime.utcnow()
+                changed += 1
+        
+        db.session.commit()
+        return changed
+    
+    @staticmethod
+    def _create_sequence(category_prefix: str, description_initials: str) -> None:
+        """Insert a missing counter row seeded from the highest existing code."""
+        base = f"{category_prefix}-{description_initials}"
+        last_value = 0
+        for (codigo,) in db.session.execute(
+            select(Product.codigo).where(Product.codigo.like(f"{base}-%"))
+        ):
+            parts = CodeGenerator.split_code(codigo)
+            if parts and parts[:2] == (category_prefix, description_initials):
+                last_value = max(last_value, parts[2])
+        
+        if db.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        
+        db.session.execute(
+            dialect_insert(CodeSequence).values(
+                prefix=category_prefix,
+                initials=description_initials,
+                last_value=last_value,
+                updated_at=datetime.utcnow()
+            ).on_conflict_do_nothing(index_elements=['prefix', 'initials'])
+        )
     
     @staticmethod
     def generate_code(category_name: str, description: str) -> str:
@@ -145,6 +234,39 @@ class CodeGenerator:
         
         return code
     
+    @staticmethod
+    def generate_codes(items: List[Tuple[str, str]]) -> List[str]:
+        """
+        Generate codes for many products, reserving one block per key.
+
+        Each distinct prefix and initials pair reserves all the numbers it
+        needs with one counter update, and numbers are handed out in order,
+        so codes within the batch never collide.
+
+        Args:
+            items: List of (category_name, description) tuples
+
+        Returns:
+            Generated product codes in the same order as items
+        """
+        keys = [
+            (CodeGenerator.CATEGORY_PREFIXES.get(category_name, 'X'),
+             CodeGenerator.get_description_initials(description))
+            for category_name, description in items
+        ]
+
+        next_sequence: Dict[Tuple[str, str], int] = {}
+        for key, count in Counter(keys).items():
+            next_sequence[key] = CodeGenerator.reserve_sequences(*key, count=count)
+
+        codes = []
+        for prefix, initials in keys:
+            sequence = next_sequence[(prefix, initials)]
+            next_sequence[(prefix, initials)] = sequence + 1
+            codes.append(f"{prefix}-{initials}-{sequence:02d}")
+
+        return codes
+
     @staticmethod
     def generate_code_from_item_group_id(item_group_id: int, description: str) -> str:
         """
@@ -0,0 +1,57 @@
+"""
+Prometheus metrics shared by the request middleware and the services.
+
+With PROMETHEUS_MULTIPROC_DIR set before the first import, every gunicorn
+worker writes its samples to that directory and /metrics aggregates them.
+"""
+from flask import has_request_context, request
+from prometheus_client import Counter, Gauge, Histogram
+
+# Seconds; the shop floor pages are expected well under one second
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Statements per request
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests handled',
+    ['endpoint', 'method', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency',
+    ['endpoint', 'method'], buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'HTTP requests being handled',
+    ['endpoint'], multiprocess_mode='livesum'
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL statements run per HTTP request',
+    ['endpoint'], buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = Counter(
+    'http_request_db_seconds', 'Time spent in SQL statements by HTTP requests',
+    ['endpoint']
+)
+CACHE_LOOKUPS = Counter(
+    'cache_lookups_total', 'Cache lookups by result (hit ratio = hit / all)',
+    ['cache', 'endpoint', 'result']
+)
+
+
+def endpoint_label() -> str:
+    """Flask endpoint of the current request ('unmatched' for 404s, 'none' outside requests)."""
+    if not has_request_context():
+        return 'none'
+    return request.endpoint or 'unmatched'
+
+
+def record_cache_lookup(cache_name: str, hit: bool) -> None:
+    """
+    Count one cache lookup.
+
+    Args:
+        cache_name: Cache being read (dashboard, count, exchange_rate...)
+        hit: Whether the value was found
+    """
+    CACHE_LOOKUPS.labels(cache_name, endpoint_label(), 'hit' if hit else 'miss').inc()
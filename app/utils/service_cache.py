@@ -0,0 +1,161 @@
+"""
+Caching of service results, invalidated by entity type.
+
+    @cached(ItemGroup)
+    def get_all_groups(self): ...
+
+Each entry is stored under the current version of its tags (model class
+names). Committing a transaction that wrote any row of a model replaces
+that model's tag version, so every entry that read it is missed from
+then on, in every process sharing the cache. SERVICE_CACHE_TIMEOUT
+bounds staleness from writes the session cannot see (raw SQL, other
+processes with a per-process cache).
+
+Lookups are counted in the cache_lookups_total metric, labelled with the
+cached function (e.g. cache="ItemGroupService.get_all_groups"), and
+served at /metrics.
+"""
+import hashlib
+import inspect
+import uuid
+from functools import wraps
+from typing import Iterable
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.extensions import db, cache
+from app.utils.metrics import record_cache_lookup
+
+CACHE_KEY_PREFIX = 'service:'
+TAG_KEY_PREFIX = 'service-tag:'
+
+
+def tag_versions(tags) -> list:
+    """Current version of each tag; a missing tag gets a fresh one."""
+    keys = [TAG_KEY_PREFIX + tag for tag in tags]
+    versions = list(cache.get_many(*keys))
+    for index, version in enumerate(versions):
+        if version is None:
+            # Never reuse an old version, or evicted entries could come back
+            versions[index] = uuid.uuid4().hex[:12]
+            cache.set(keys[index], versions[index], timeout=0)
+    return versions
+
+
+def invalidate_tags(tags: Iterable[str]) -> None:
+    """
+    Make every cached entry tagged with any of the tags stale.
+
+    Args:
+        tags: Entity types (model class names)
+    """
+    if not has_app_context():
+        return
+    # Not delete_many: it stops at the first key that is not cached
+    for tag in set(tags):
+        cache.delete(TAG_KEY_PREFIX + tag)
+
+
+def touch_tags(session, *tags: str) -> None:
+    """
+    Mark tags as written by the session's transaction.
+
+    For writes the session events do not see, such as Core statements run
+    on session.connection(). The tags are invalidated on commit.
+
+    Args:
+        session: Session running the transaction
+        tags: Entity types (model class names)
+    """
+    session.info.setdefault('cache_tags', set()).update(tags)
+
+
+def cached(*tags, timeout: int = None, merge: bool = False):
+    """
+    Cache a function's result until a write to any of the tagged models.
+
+    The key is the function's qualified name and its arguments (without
+    self). Results must be picklable. The decorated function's refresh()
+    attribute recomputes an entry without reading it, e.g.
+    Service.method.refresh(service, *args).
+
+    Args:
+        tags: Models (or model class names) the result is read from
+        timeout: Seconds an entry lives at most (default SERVICE_CACHE_TIMEOUT)
+        merge: The result is an ORM instance or a list of them; cached
+            copies are merged into the current session without a query
+
+    Returns:
+        Decorator
+    """
+    tags = tuple(tag if isinstance(tag, str) else tag.__name__ for tag in tags)
+
+    def decorator(func):
+        name = func.__qualname__
+        skip_self = next(iter(inspect.signature(func).parameters), None) in ('self', 'cls')
+
+        def call(args, kwargs, refresh):
+            if not has_app_context():
+                return func(*args, **kwargs)
+
+            arguments = repr((args[1:] if skip_self else args, sorted(kwargs.items())))
+            key = ':'.join([CACHE_KEY_PREFIX + name, *tag_versions(tags),
+                            hashlib.sha1(arguments.encode()).hexdigest()])
+            entry = None
+            if not refresh:
+                entry = cache.get(key)
+                record_cache_lookup(name, entry is not None)
+            if entry is None:
+                entry = {'value': func(*args, **kwargs)}
+                cache.set(key, entry, timeout=timeout if timeout is not None
+                          else current_app.config.get('SERVICE_CACHE_TIMEOUT', 300))
+            elif merge:
+                return _merge(entry['value'])
+            return entry['value']
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return call(args, kwargs, refresh=False)
+
+        def refresh(*args, **kwargs):
+            """Recompute the result and replace the cached entry."""
+            return call(args, kwargs, refresh=True)
+
+        wrapper.cache_tags = tags
+        wrapper.refresh = refresh
+        return wrapper
+    return decorator
+
+
+def _merge(value):
+    """Attach cached ORM instances to the current session."""
+    if isinstance(value, list):
+        return [db.session.merge(item, load=False) for item in value]
+    if value is not None:
+        return db.session.merge(value, load=False)
+    return value
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flushed_changes(session, flush_context):
+    touch_tags(session, *{type(obj).__name__ for obj in
+                          list(session.new) + list(session.dirty) + list(session.deleted)})
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_changes(orm_execute_state):
+    # Bulk insert/update/delete statements skip the flush
+    if not orm_execute_state.is_select and orm_execute_state.bind_mapper is not None:
+        touch_tags(orm_execute_state.session, orm_execute_state.bind_mapper.class_.__name__)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_changes(session):
+    invalidate_tags(session.info.pop('cache_tags', ()))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_changes(session):
+    session.info.pop('cache_tags', None)
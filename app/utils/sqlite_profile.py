@@ -0,0 +1,124 @@
+"""
+Database engine tuning.
+
+SQLite runs in WAL mode so gunicorn workers can read while one of them
+writes, and waits on locks (busy_timeout) instead of failing with
+"database is locked". The pragmas are applied to every new connection
+because most of them are per connection; journal_mode=WAL is stored in
+the database file.
+"""
+import logging
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+SYNCHRONOUS_MODES = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+TEMP_STORES = {'DEFAULT', 'FILE', 'MEMORY'}
+
+
+def _is_memory_database(url) -> bool:
+    url = make_url(url)
+    return url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+
+
+def engine_options(config) -> Dict[str, Any]:
+    """
+    Pool settings for the configured database.
+
+    In-memory SQLite keeps Flask-SQLAlchemy's single shared connection.
+    Options already present in SQLALCHEMY_ENGINE_OPTIONS take precedence.
+
+    Args:
+        config: Application config
+
+    Returns:
+        Engine options for SQLALCHEMY_ENGINE_OPTIONS
+    """
+    options = {}
+    if not _is_memory_database(config['SQLALCHEMY_DATABASE_URI']):
+        options.update(
+            pool_size=config.get('DB_POOL_SIZE', 5),
+            max_overflow=config.get('DB_MAX_OVERFLOW', 10),
+            pool_timeout=config.get('DB_POOL_TIMEOUT', 30),
+            pool_recycle=config.get('DB_POOL_RECYCLE', 3600),
+        )
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+
+def sqlite_pragmas(config) -> Dict[str, Any]:
+    """
+    Pragmas of the SQLite performance profile, in the order they are set.
+
+    Args:
+        config: Application config
+
+    Returns:
+        Pragma name -> value
+
+    Raises:
+        ValueError: If a mode is not one SQLite accepts
+    """
+    journal_mode = str(config.get('SQLITE_JOURNAL_MODE', 'WAL')).upper()
+    synchronous = str(config.get('SQLITE_SYNCHRONOUS', 'NORMAL')).upper()
+    temp_store = str(config.get('SQLITE_TEMP_STORE', 'MEMORY')).upper()
+    for name, value, allowed in (('SQLITE_JOURNAL_MODE', journal_mode, JOURNAL_MODES),
+                                 ('SQLITE_SYNCHRONOUS', synchronous, SYNCHRONOUS_MODES),
+                                 ('SQLITE_TEMP_STORE', temp_store, TEMP_STORES)):
+        if value not in allowed:
+            raise ValueError(f"{name} must be one of {', '.join(sorted(allowed))}, got {value!r}")
+
+    return {
+        'journal_mode': journal_mode,
+        'synchronous': synchronous,
+        'busy_timeout': int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': int(config.get('SQLITE_MMAP_SIZE', 0)),
+        # Negative: size in KiB rather than pages
+        'cache_size': -int(config.get('SQLITE_CACHE_SIZE_KB', 2000)),
+        'temp_store': temp_store,
+        'foreign_keys': 'ON' if config.get('SQLITE_FOREIGN_KEYS', True) else 'OFF',
+    }
+
+
+def setup_sqlite_profile(app):
+    """
+    Apply the SQLite pragmas to every new connection of the app's engines.
+
+    Does nothing when SQLITE_PROFILE_ENABLED is off or for other databases.
+
+    Args:
+        app: Flask application instance
+    """
+    if not app.config.get('SQLITE_PROFILE_ENABLED', True):
+        return
+    from app.extensions import db, REPLICA_BIND_KEY
+
+    def pragma_setter(pragmas):
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for name, value in pragmas.items():
+                    cursor.execute(f'PRAGMA {name} = {value}')
+                if 'journal_mode' in pragmas:
+                    mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+                    if mode.upper() != pragmas['journal_mode']:
+                        # In-memory databases only support MEMORY/OFF
+                        logger.debug(f"SQLite journal_mode is {mode}, not {pragmas['journal_mode']}")
+            finally:
+                cursor.close()
+        return set_pragmas
+
+    pragmas = sqlite_pragmas(app.config)
+    # The read-only bind cannot change the journal mode and must never write
+    replica_pragmas = {name: value for name, value in pragmas.items() if name != 'journal_mode'}
+    replica_pragmas['query_only'] = 'ON'
+
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if engine.dialect.name == 'sqlite':
+                listener = pragma_setter(replica_pragmas if key == REPLICA_BIND_KEY else pragmas)
+                event.listen(engine, 'connect', listener)
@@ -0,0 +1,157 @@
+"""
+Benchmark del reporte de inventario Art 177.
+
+Compara el motor agregado (InventoryReportService) con el recorrido anterior
+de dos consultas por producto, variando la cantidad de productos (SKU) y el
+volumen de movimientos. Usa una base SQLite temporal, no toca la base real.
+
+Uso:
+    python benchmark_inventory_report.py
+    python benchmark_inventory_report.py --skus 500 2000 5000 --movements 5 20
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, insert
+
+from app import create_app
+from app.extensions import db
+from app.models import Product, Movement
+from app.services import InventoryReportService
+
+
+START_DATE = datetime(2026, 2, 1)
+END_DATE = datetime(2026, 2, 28)
+
+
+def seed(num_skus, movements_per_sku):
+    """Insert products and movements spread over the previous 120 days."""
+    db.drop_all()
+    db.create_all()
+
+    db.session.execute(insert(Product), [
+        {
+            'codigo': f'B-{i:06d}',
+            'descripcion': f'Producto benchmark {i}',
+            'stock': 0,
+            'precio_dolares': round(random.uniform(0.5, 50), 2),
+            'factor_ajuste': 1.0,
+        }
+        for i in range(1, num_skus + 1)
+    ])
+
+    first_day = END_DATE.date() - timedelta(days=120)
+    rows = []
+    for product_id in range(1, num_skus + 1):
+        for _ in range(movements_per_sku):
+            rows.append({
+                'producto_id': product_id,
+                'tipo': random.choice(['ENTRADA', 'ENTRADA', 'SALIDA']),
+                'cantidad': random.randint(1, 20),
+                'fecha': first_day + timedelta(days=random.randint(0, 120)),
+            })
+            if len(rows) >= 10000:
+                db.session.execute(insert(Movement), rows)
+                rows = []
+    if rows:
+        db.session.execute(insert(Movement), rows)
+    db.session.commit()
+
+
+def legacy_report(start_date, end_date):
+    """Per-product loop used before the aggregate engine (baseline)."""
+    products = Product.query.filter_by(deleted_at=None).order_by(Product.codigo).all()
+    result = []
+    for product in products:
+        movements = Movement.query.filter(
+            Movement.producto_id == product.id,
+            Movement.fecha >= start_date,
+            Movement.fecha <= end_date,
+            Movement.deleted_at == None
+        ).all()
+        initial_movements = Movement.query.filter(
+            Movement.producto_id == product.id,
+            Movement.fecha < start_date,
+            Movement.deleted_at == None
+        ).all()
+        initial = sum(m.cantidad if m.tipo.lower() == 'entrada' else -m.cantidad
+                      for m in initial_movements if m.tipo.lower() in ('entrada', 'salida'))
+        entries = sum(m.cantidad for m in movements if m.tipo.lower() == 'entrada')
+        exits = sum(m.cantidad for m in movements if m.tipo.lower() == 'salida')
+        result.append((product.codigo, initial, entries, exits))
+    return result
+
+
+def measure(fn):
+    """Run fn and return (seconds, executed statements)."""
+    counter = {'queries': 0}
+
+    def count(*args, **kwargs):
+        counter['queries'] += 1
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        db.session.expire_all()
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return elapsed, counter['queries']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del reporte Art 177')
+    parser.add_argument('--skus', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--movements', type=int, nargs='+', default=[5, 20],
+                        help='Movimientos por producto')
+    parser.add_argument('--legacy-max-skus', type=int, default=2000,
+                        help='No ejecutar el recorrido anterior por encima de este tamaño')
+    args = parser.parse_args()
+
+    random.seed(177)
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_file.name}'
+
+    app = create_app('development')
+    app.config['SQLALCHEMY_ECHO'] = False
+
+    service = InventoryReportService()
+
+    print(f"{'SKUs':>8} {'Mov/SKU':>8} {'Movs':>9} | {'Motor (s)':>10} {'Consultas':>9} | "
+          f"{'Anterior (s)':>12} {'Consultas':>9} | {'Mejora':>7}")
+    print('-' * 90)
+
+    try:
+        with app.app_context():
+            db.engine.echo = False
+            for num_skus in args.skus:
+                for per_sku in args.movements:
+                    seed(num_skus, per_sku)
+                    engine_time, engine_queries = measure(
+                        lambda: service.build_report(START_DATE, END_DATE)
+                    )
+                    if num_skus <= args.legacy_max_skus:
+                        legacy_time, legacy_queries = measure(
+                            lambda: legacy_report(START_DATE, END_DATE)
+                        )
+                        legacy_cols = f'{legacy_time:>12.3f} {legacy_queries:>9}'
+                        speedup = f'{legacy_time / engine_time:>6.1f}x'
+                    else:
+                        legacy_cols = f"{'-':>12} {'-':>9}"
+                        speedup = f"{'-':>7}"
+                    print(f'{num_skus:>8} {per_sku:>8} {num_skus * per_sku:>9} | '
+                          f'{engine_time:>10.3f} {engine_queries:>9} | {legacy_cols} | {speedup}')
+            db.session.remove()
+    finally:
+        os.remove(db_file.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark del perfil SQLite (WAL, pragmas y pool de conexiones).
+
+Lanza varios procesos, cada uno con su propia aplicación y conexión como un
+worker sync de gunicorn, que durante unos segundos mezclan lecturas (página
+del listado de productos) y escrituras (entrada de stock con su movimiento).
+Compara el perfil desactivado (journal de rollback) con el perfil activo.
+Usa una base SQLite temporal, no toca la base real.
+
+Uso:
+    python benchmark_sqlite_profile.py
+    python benchmark_sqlite_profile.py --workers 1 4 8 --seconds 10 --write-ratio 0.3
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.config import DevelopmentConfig
+from app.extensions import db
+from app.models import Movement, Product
+
+
+def seed(db_path, num_products):
+    """Create a fresh database with num_products products."""
+    DevelopmentConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+    DevelopmentConfig.SQLALCHEMY_ECHO = False
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Product), [
+            {
+                'codigo': f'B-{i:06d}',
+                'descripcion': f'Producto benchmark {i}',
+                'stock': 100,
+                'precio_dolares': round(random.uniform(0.5, 50), 2),
+                'factor_ajuste': 1.0,
+            }
+            for i in range(1, num_products + 1)
+        ])
+        db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+
+
+def worker(db_path, profile, seconds, write_ratio, num_products, seed_value, results):
+    """Mix reads and writes until the time is up; report (reads, writes, errors)."""
+    DevelopmentConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+    DevelopmentConfig.SQLALCHEMY_ECHO = False
+    DevelopmentConfig.SQLITE_PROFILE_ENABLED = profile
+    random.seed(seed_value)
+    app = create_app('development')
+    reads = writes = errors = 0
+
+    with app.app_context():
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            try:
+                if random.random() < write_ratio:
+                    product = db.session.get(Product, random.randint(1, num_products))
+                    product.stock += 1
+                    db.session.add(Movement(producto_id=product.id, tipo='entrada', cantidad=1,
+                                            fecha=date.today(), descripcion='benchmark'))
+                    db.session.commit()
+                    writes += 1
+                else:
+                    query = Product.query.filter_by(deleted_at=None)
+                    query.count()
+                    query.order_by(Product.codigo).offset(random.randint(0, num_products - 20)).limit(20).all()
+                    db.session.rollback()
+                    reads += 1
+            except OperationalError:
+                # "database is locked"
+                db.session.rollback()
+                errors += 1
+        db.session.remove()
+    results.put((reads, writes, errors))
+
+
+def run(profile, workers, seconds, write_ratio, num_products):
+    """Run one configuration on a fresh database and return the totals."""
+    db_dir = tempfile.mkdtemp()
+    db_path = os.path.join(db_dir, 'benchmark.db')
+    seed(db_path, num_products)
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(db_path, profile, seconds, write_ratio,
+                                                     num_products, i, results))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    totals = [sum(values) for values in zip(*(results.get() for _ in processes))]
+    for process in processes:
+        process.join()
+
+    for name in os.listdir(db_dir):
+        os.remove(os.path.join(db_dir, name))
+    os.rmdir(db_dir)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del perfil SQLite')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Procesos concurrentes (workers de gunicorn)')
+    parser.add_argument('--seconds', type=float, default=5, help='Duración de cada corrida')
+    parser.add_argument('--write-ratio', type=float, default=0.2,
+                        help='Fracción de operaciones que escriben')
+    parser.add_argument('--products', type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(177)
+    print(f"{'Workers':>8} | {'Sin perfil: lect/s':>18} {'escr/s':>8} {'bloqueos':>8} | "
+          f"{'Perfil: lect/s':>14} {'escr/s':>8} {'bloqueos':>8} | {'Mejora':>7}")
+    print('-' * 96)
+
+    for workers in args.workers:
+        before = run(False, workers, args.seconds, args.write_ratio, args.products)
+        after = run(True, workers, args.seconds, args.write_ratio, args.products)
+        before_ops = (before[0] + before[1]) / args.seconds
+        after_ops = (after[0] + after[1]) / args.seconds
+        speedup = f'{after_ops / before_ops:>6.1f}x' if before_ops else f"{'-':>7}"
+        print(f'{workers:>8} | {before[0] / args.seconds:>18.0f} {before[1] / args.seconds:>8.0f} '
+              f'{before[2]:>8} | {after[0] / args.seconds:>14.0f} {after[1] / args.seconds:>8.0f} '
+              f'{after[2]:>8} | {speedup}')
+
+
+if __name__ == '__main__':
+    main()
@@ -42,3 +42,23 @@ tmp_upload_dir = None
 limit_request_line = 4094
 limit_request_fields = 100
 limit_request_field_size = 8190
+
+# Prometheus metrics: workers write their samples here and /metrics sums them.
+# Set before any worker imports the app; emptied on every start.
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.abspath(os.environ.get('METRICS_DIR', 'metrics'))
+)
+
+
+def on_starting(server):
+    """Clear samples left by a previous run."""
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        if name.endswith('.db'):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited (max_requests restarts)."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -97,6 +97,12 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            # Batch migrations copy and drop tables; with the profile's
+            # foreign_keys=ON the drop would cascade into child tables
+            connection.exec_driver_sql('PRAGMA foreign_keys = OFF')
+            connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
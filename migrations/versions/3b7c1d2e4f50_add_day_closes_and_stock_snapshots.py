@@ -0,0 +1,55 @@
+"""Add day closes and stock snapshots
+
+Revision ID: 3b7c1d2e4f50
+Revises: 0f5723c68fcb
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7c1d2e4f50'
+down_revision = '0f5723c68fcb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cierres_dia',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('cerrado_en', sa.DateTime(), nullable=False),
+    sa.Column('cerrado_por', sa.Integer(), nullable=True),
+    sa.Column('productos', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['cerrado_por'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('cierres_dia', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_cierres_dia_fecha'), ['fecha'], unique=True)
+
+    op.create_table('stock_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('producto_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('closing_qty', sa.Integer(), nullable=False),
+    sa.Column('closing_value', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['producto_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('producto_id', 'fecha', name='uq_snapshot_product_date')
+    )
+    with op.batch_alter_table('stock_snapshots', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_stock_snapshots_fecha'), ['fecha'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stock_snapshots', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_stock_snapshots_fecha'))
+
+    op.drop_table('stock_snapshots')
+    with op.batch_alter_table('cierres_dia', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cierres_dia_fecha'))
+
+    op.drop_table('cierres_dia')
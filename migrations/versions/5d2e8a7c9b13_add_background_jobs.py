@@ -0,0 +1,49 @@
+"""Add background jobs
+
+Revision ID: 5d2e8a7c9b13
+Revises: 3b7c1d2e4f50
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8a7c9b13'
+down_revision = '3b7c1d2e4f50'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('background_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_type', sa.String(length=30), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('progress', sa.Integer(), nullable=False),
+    sa.Column('params', sa.JSON(), nullable=True),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('artifact_path', sa.String(length=500), nullable=True),
+    sa.Column('artifact_name', sa.String(length=255), nullable=True),
+    sa.Column('artifact_mimetype', sa.String(length=100), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint("job_type IN ('IMPORT', 'INVENTORY_REPORT')", name='check_job_type_valid'),
+    sa.CheckConstraint("status IN ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED')", name='check_job_status_valid'),
+    sa.CheckConstraint('progress >= 0 AND progress <= 100', name='check_job_progress_range'),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('background_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_background_jobs_status'), ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('background_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_background_jobs_status'))
+
+    op.drop_table('background_jobs')
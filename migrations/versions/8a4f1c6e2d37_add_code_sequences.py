@@ -0,0 +1,33 @@
+"""Add code sequences
+
+Revision ID: 8a4f1c6e2d37
+Revises: 5d2e8a7c9b13
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4f1c6e2d37'
+down_revision = '5d2e8a7c9b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('code_sequences',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('prefix', sa.String(length=10), nullable=False),
+    sa.Column('initials', sa.String(length=20), nullable=False),
+    sa.Column('last_value', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.CheckConstraint('last_value >= 0', name='check_code_sequence_positive'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('prefix', 'initials', name='uq_code_sequence_key')
+    )
+
+
+def downgrade():
+    op.drop_table('code_sequences')
@@ -0,0 +1,47 @@
+"""Add partial indexes for active (not soft-deleted) rows
+
+Revision ID: a9c4e1f7d302
+Revises: f2b8d4a6c913
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c4e1f7d302'
+down_revision = 'f2b8d4a6c913'
+branch_labels = None
+depends_on = None
+
+ACTIVE = 'deleted_at IS NULL'
+
+# (table, index, columns, extra condition)
+INDEXES = [
+    ('products', 'idx_product_active_codigo', ['codigo'], None),
+    ('products', 'idx_product_active_group_codigo', ['item_group_id', 'codigo'], None),
+    ('products', 'idx_product_active_stock', ['stock'], None),
+    ('products', 'idx_product_reorder', ['stock'], 'stock <= reorder_point'),
+    ('movimientos', 'idx_movement_active_created', ['created_at'], None),
+    ('sales_orders', 'idx_sales_order_active_status_date', ['status', 'order_date'], None),
+    ('sales_orders', 'idx_sales_order_active_customer_date', ['customer_id', 'order_date'], None),
+    ('sales_orders', 'idx_sales_order_active_date', ['order_date'], None),
+    ('sales_orders', 'idx_sales_order_active_created', ['created_at'], None),
+    ('customers', 'idx_customer_active_name', ['is_active', 'name'], None),
+]
+
+
+def upgrade():
+    for table, name, columns, extra in INDEXES:
+        condition = sa.text(f'{ACTIVE} AND {extra}' if extra else ACTIVE)
+        op.create_index(name, table, columns, unique=False,
+                        sqlite_where=condition, postgresql_where=condition)
+
+    # Row counts of the new indexes, so the planner prefers the small ones
+    op.execute('ANALYZE')
+
+
+def downgrade():
+    for table, name, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,72 @@
+"""Add products full-text search index
+
+Revision ID: b6e3d9a1f4c2
+Revises: 8a4f1c6e2d37
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e3d9a1f4c2'
+down_revision = '8a4f1c6e2d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 is SQLite only; other databases keep the ILIKE search
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("""
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        codigo, descripcion, categoria,
+        tokenize = "unicode61 remove_diacritics 2"
+    )
+    """)
+    op.execute("""
+    CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, codigo, descripcion, categoria)
+        VALUES (new.id, new.codigo, new.descripcion,
+                (SELECT name FROM item_groups WHERE id = new.item_group_id));
+    END
+    """)
+    op.execute("""
+    CREATE TRIGGER products_fts_update
+    AFTER UPDATE OF codigo, descripcion, item_group_id ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+        INSERT INTO products_fts (rowid, codigo, descripcion, categoria)
+        VALUES (new.id, new.codigo, new.descripcion,
+                (SELECT name FROM item_groups WHERE id = new.item_group_id));
+    END
+    """)
+    op.execute("""
+    CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+    END
+    """)
+    op.execute("""
+    CREATE TRIGGER products_fts_category_rename
+    AFTER UPDATE OF name ON item_groups BEGIN
+        UPDATE products_fts SET categoria = new.name
+        WHERE rowid IN (SELECT id FROM products WHERE item_group_id = new.id);
+    END
+    """)
+    op.execute("""
+    INSERT INTO products_fts (rowid, codigo, descripcion, categoria)
+    SELECT products.id, products.codigo, products.descripcion, item_groups.name
+    FROM products LEFT JOIN item_groups ON item_groups.id = products.item_group_id
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS products_fts_category_rename")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_insert")
+    op.execute("DROP TABLE IF EXISTS products_fts")
@@ -0,0 +1,33 @@
+"""Add document sequences
+
+Revision ID: d41f7b2c8e05
+Revises: b6e3d9a1f4c2
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41f7b2c8e05'
+down_revision = 'b6e3d9a1f4c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('document_sequences',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=20), nullable=False),
+    sa.Column('period', sa.String(length=20), nullable=False),
+    sa.Column('last_value', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.CheckConstraint('last_value >= 0', name='check_document_sequence_positive'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name', 'period', name='uq_document_sequence_key')
+    )
+
+
+def downgrade():
+    op.drop_table('document_sequences')
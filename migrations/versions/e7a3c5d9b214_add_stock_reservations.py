@@ -0,0 +1,73 @@
+"""Add stock reservations
+
+Revision ID: e7a3c5d9b214
+Revises: d41f7b2c8e05
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3c5d9b214'
+down_revision = 'd41f7b2c8e05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ALTER TABLE: a batch rebuild of products (needed on SQLite to
+    # add the CHECK) fails on, and drops, the products_fts_* triggers. The
+    # check_reserved_positive constraint is enforced by the model's table
+    # args on databases created from the models
+    op.add_column('products', sa.Column('reserved', sa.Integer(), server_default='0', nullable=False))
+
+    op.create_table('stock_reservations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sales_order_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('closed_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint('quantity > 0', name='check_reservation_quantity_positive'),
+    sa.CheckConstraint("status IN ('ACTIVE', 'RELEASED', 'FULFILLED')", name='check_reservation_status_valid'),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['sales_order_id'], ['sales_orders.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.create_index('idx_reservation_order_status', ['sales_order_id', 'status'], unique=False)
+        batch_op.create_index('idx_reservation_product_status', ['product_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.drop_index('idx_reservation_product_status')
+        batch_op.drop_index('idx_reservation_order_status')
+
+    op.drop_table('stock_reservations')
+
+    bind = op.get_bind()
+    products_sql = bind.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'products'"
+    ).scalar() if bind.dialect.name == 'sqlite' else None
+    if not products_sql or 'check_reserved_positive' not in products_sql:
+        op.drop_column('products', 'reserved')
+        return
+
+    # Created from the models, with the CHECK: SQLite can only drop the
+    # column by rebuilding products, which the FTS triggers would break
+    triggers = bind.exec_driver_sql(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'products_fts_%'"
+    ).all()
+    for name, _ in triggers:
+        op.execute(f'DROP TRIGGER {name}')
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_constraint('check_reserved_positive', type_='check')
+        batch_op.drop_column('reserved')
+    for _, sql in triggers:
+        op.execute(sql)
@@ -0,0 +1,63 @@
+"""Add item group closure table and product counts
+
+Revision ID: f2b8d4a6c913
+Revises: e7a3c5d9b214
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8d4a6c913'
+down_revision = 'e7a3c5d9b214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('item_group_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['item_groups.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['item_groups.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    with op.batch_alter_table('item_group_closure', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_item_group_closure_descendant_id'), ['descendant_id'], unique=False)
+
+    # Plain ALTER TABLE: a batch rebuild of item_groups would fail on (and
+    # drop) the products_fts_category_rename trigger
+    op.add_column('item_groups', sa.Column('product_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the parent_id hierarchy
+    op.execute("""
+        INSERT INTO item_group_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE paths(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM item_groups
+            UNION ALL
+            SELECT paths.ancestor_id, item_groups.id, paths.depth + 1
+            FROM paths JOIN item_groups ON item_groups.parent_id = paths.descendant_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM paths
+    """)
+    op.execute("""
+        UPDATE item_groups SET product_count = (
+            SELECT COUNT(*)
+            FROM item_group_closure
+            JOIN products ON products.item_group_id = item_group_closure.descendant_id
+            WHERE item_group_closure.ancestor_id = item_groups.id
+              AND products.deleted_at IS NULL
+        )
+    """)
+
+
+def downgrade():
+    op.drop_column('item_groups', 'product_count')
+
+    with op.batch_alter_table('item_group_closure', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_item_group_closure_descendant_id'))
+
+    op.drop_table('item_group_closure')
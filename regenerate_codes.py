@@ -29,48 +29,36 @@ def regenerate_codes():
         created = 0
         errors = []
         
-        # Track codes to avoid duplicates
-        used_codes = set()
-        
+        # Collect valid rows first
+        valid_rows = []
         for idx, row in df.iterrows():
+            # Get data from Excel
+            categoria = str(row.get('Categoria', '')).strip()
+            descripcion = str(row.get('Descripcion del Articulo', '')).strip()
+            
+            # Skip if no description
+            if not descripcion or descripcion == 'nan':
+                continue
+            
+            # Skip if no category or invalid category
+            if not categoria or categoria == 'nan' or categoria not in categories:
+                errors.append(f"Fila {idx+3}: Categoría inválida '{categoria}' para '{descripcion}'")
+                continue
+            
+            valid_rows.append((idx, row, categoria, descripcion))
+        
+        # Reserve new codes in blocks (one counter update per prefix)
+        new_codes = CodeGenerator.generate_codes(
+            [(categoria, descripcion) for _, _, categoria, descripcion in valid_rows]
+        )
+        
+        for (idx, row, categoria, descripcion), new_codigo in zip(valid_rows, new_codes):
             try:
-                # Get data from Excel
                 old_codigo = str(row.get('Codigo', '')).strip()
-                categoria = str(row.get('Categoria', '')).strip()
-                descripcion = str(row.get('Descripcion del Articulo', '')).strip()
-                
-                # Skip if no description
-                if not descripcion or descripcion == 'nan':
-                    continue
-                
-                # Skip if no category or invalid category
-                if not categoria or categoria == 'nan' or categoria not in categories:
-                    errors.append(f"Fila {idx+3}: Categoría inválida '{categoria}' para '{descripcion}'")
-                    continue
                 
                 # Get category
                 item_group = categories[categoria]
                 
-                # Generate new code
-                new_codigo = CodeGenerator.generate_code(categoria, descripcion)
-                
-                # Handle duplicates
-                original_code = new_codigo
-                counter = 1
-                while new_codigo in used_codes:
-                    # Extract parts and increment sequence
-                    parts = original_code.split('-')
-                    if len(parts) >= 4:
-                        base_sequence = int(parts[3])
-                        new_sequence = base_sequence + counter
-                        parts[3] = f"{new_sequence:02d}"
-                        new_codigo = '-'.join(parts)
-                        counter += 1
-                    else:
-                        break
-                
-                used_codes.add(new_codigo)
-                
                 # Get other data
                 stock = row.get('Cantidad Unid/kg', 0)
                 if pd.isna(stock):
@@ -0,0 +1,58 @@
+"""
+Fixtures for integration tests against the application factory.
+"""
+import pytest
+
+from app import create_app
+from app.extensions import db as _db
+
+
+@pytest.fixture
+def app():
+    """Application configured for testing with a fresh in-memory database."""
+    app = create_app('testing')
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """
+    Application on a SQLite file with the 'tester' user.
+
+    Every thread and process gets its own connection, as gunicorn workers
+    do, so concurrency tests use this instead of the in-memory database.
+    """
+    from app.config import TestingConfig
+    from app.models import User
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'app.db'}")
+    app = create_app('testing')
+    with app.app_context():
+        _db.create_all()
+        user = User(username='tester', email='tester@example.com', role='admin')
+        user.set_password('secret')
+        _db.session.add(user)
+        _db.session.commit()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def db(app):
+    """Database extension bound to the testing application."""
+    return _db
+
+
+@pytest.fixture
+def user(db):
+    """Persisted user to own audit fields."""
+    from app.models import User
+    user = User(username='tester', email='tester@example.com', role='admin')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
@@ -0,0 +1,106 @@
+"""
+Integration tests for the in-process catalogue behind form dropdowns.
+"""
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.models import Customer, ItemGroup, Product, Supplier
+from app.services import CatalogueService
+
+
+def _statements(db, run):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        result = run()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return result, statements
+
+
+def _seed(db):
+    supplier = Supplier(nombre='Ferrecentro', rif='J-12345678-9')
+    group = ItemGroup(name='Herramientas')
+    db.session.add_all([supplier, group, Customer(name='Juan Pérez', tax_id='V-1234567')])
+    db.session.flush()
+    db.session.add(Product(codigo='H-1', descripcion='Martillo', precio_dolares=Decimal('5'),
+                           stock=3, reserved=1, proveedor_id=supplier.id, item_group_id=group.id))
+    db.session.commit()
+
+
+def test_sections_are_served_from_memory_until_a_commit(db):
+    _seed(db)
+    catalogue = CatalogueService()
+    assert [supplier.nombre for supplier in catalogue.get_suppliers()] == ['Ferrecentro']
+
+    suppliers, statements = _statements(db, catalogue.get_suppliers)
+    assert statements == []
+    assert [(supplier.nombre, supplier.rif) for supplier in suppliers] == [('Ferrecentro', 'J-12345678-9')]
+
+    db.session.add(Supplier(nombre='Aceros del Sur'))
+    db.session.commit()
+    assert [supplier.nombre for supplier in catalogue.get_suppliers()] == ['Aceros del Sur', 'Ferrecentro']
+    # Other sections keep their snapshot
+    catalogue.get_item_groups()
+    _, statements = _statements(db, catalogue.get_item_groups)
+    assert statements == []
+
+
+def test_uncommitted_rows_are_not_shared(db):
+    _seed(db)
+    catalogue = CatalogueService()
+    catalogue.get_products()
+
+    product = db.session.query(Product).one()
+    product.stock = 10
+    db.session.flush()
+    assert [option.available for option in catalogue.get_products()] == [9]
+
+    db.session.rollback()
+    assert [option.available for option in catalogue.get_products()] == [2]
+
+
+def test_snapshot_expires_after_max_age(app, db):
+    _seed(db)
+    catalogue = CatalogueService()
+    catalogue.get_customers()
+
+    app.config['CATALOGUE_SNAPSHOT_MAX_AGE'] = -1
+    _, statements = _statements(db, catalogue.get_customers)
+    assert len(statements) == 1
+
+
+def test_records_are_read_only(db):
+    _seed(db)
+    product = CatalogueService().get_products()[0]
+
+    # Reserved units are not offered
+    assert (product.codigo, product.descripcion, product.precio_dolares, product.available) == \
+        ('H-1', 'Martillo', Decimal('5.00'), 2)
+    with pytest.raises(AttributeError):
+        product.available = 0
+    with pytest.raises(AttributeError):
+        product.extra = 'x'
+
+
+def test_forms_render_without_catalogue_queries(app, user):
+    from app.extensions import db
+    _seed(db)
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+
+    for path in ('/products/create', '/orders/create'):
+        assert client.get(path).status_code == 200
+        response, statements = _statements(db, lambda: client.get(path))
+        assert response.status_code == 200
+        assert not any(table in statement for statement in statements
+                       for table in ('FROM proveedores', 'FROM item_groups', 'FROM customers', 'FROM products'))
+    page = client.get('/orders/create').get_data(as_text=True)
+    assert 'Juan Pérez' in page and 'Martillo' in page
+    assert 'data-stock="2"' in page and '(Disponible: 2)' in page
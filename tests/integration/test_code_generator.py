@@ -0,0 +1,44 @@
+"""
+Integration tests for the counter based product code allocator.
+"""
+from decimal import Decimal
+
+from app.models import Product, CodeSequence
+from app.utils.code_generator import CodeGenerator
+
+
+def _product(db, codigo):
+    db.session.add(Product(codigo=codigo, descripcion=f'Producto {codigo}', precio_dolares=Decimal('1.00')))
+
+
+def test_reserve_seeds_from_existing_codes_and_hands_out_blocks(db):
+    _product(db, 'E-SO-PO-07')
+    _product(db, 'E-SO-PO-XX')
+    db.session.commit()
+
+    assert CodeGenerator.reserve_sequences('E', 'SO-PO', count=5) == 8
+    assert CodeGenerator.get_next_sequence('E', 'SO-PO') == 13
+    assert CodeGenerator.get_next_sequence('P', 'TU-BO') == 1
+    assert CodeSequence.query.filter_by(prefix='E', initials='SO-PO').one().last_value == 13
+
+
+def test_generate_codes_reserves_one_block_per_key(db):
+    codes = CodeGenerator.generate_codes([
+        ('Electricidad', 'Socates Porcelana'),
+        ('Plomeria', 'Tubo PVC'),
+        ('Electricidad', 'Socates Porcelana grande'),
+    ])
+
+    assert codes == ['E-SO-PO-01', 'P-TU-PV-01', 'E-SO-PO-02']
+    assert CodeGenerator.generate_codes([('Electricidad', 'Socates Porcelana')]) == ['E-SO-PO-03']
+
+
+def test_backfill_only_raises_counters(db):
+    for codigo in ['E-SO-PO-04', 'E-SO-PO-09', 'A-BC-03', 'GEN-0001']:
+        _product(db, codigo)
+    db.session.add(CodeSequence(prefix='A', initials='BC', last_value=10))
+    db.session.commit()
+
+    assert CodeGenerator.backfill_sequences() == 1
+    sequences = {(s.prefix, s.initials): s.last_value for s in CodeSequence.query.all()}
+    assert sequences == {('E', 'SO-PO'): 9, ('A', 'BC'): 10}
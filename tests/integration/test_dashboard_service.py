@@ -0,0 +1,115 @@
+"""
+Integration tests for the dashboard metrics queries.
+"""
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import event, text, update
+
+from app.models import Product, Customer, SalesOrder, Movimiento, ItemGroup
+from app.services import DashboardService
+
+# Statements allowed for one /dashboard render (login user load included)
+DASHBOARD_QUERY_BUDGET = 12
+
+
+def _seed(db, user):
+    group = ItemGroup(name='Herramientas')
+    db.session.add(group)
+    db.session.flush()
+    products = [
+        Product(codigo='D-1', descripcion='Martillo', stock=4, precio_dolares=Decimal('2.50'),
+                reorder_point=5, item_group_id=group.id),
+        Product(codigo='D-2', descripcion='Clavos', stock=0, precio_dolares=Decimal('1.00')),
+        Product(codigo='D-3', descripcion='Taladro', stock=20, precio_dolares=Decimal('10.00')),
+    ]
+    customer = Customer(name='Ferreteria Central', created_by=user.id)
+    db.session.add_all(products + [customer])
+    db.session.flush()
+    for status, total, paid in (('draft', '10.00', '0'), ('confirmed', '30.00', '10.00')):
+        db.session.add(SalesOrder(order_number=f'SO-{status}', customer_id=customer.id, status=status,
+                                  order_date=date.today(), total_amount=Decimal(total),
+                                  paid_amount=Decimal(paid), payment_status='partial',
+                                  created_by=user.id))
+    db.session.add(Movimiento(producto_id=products[0].id, tipo='entrada', cantidad=4,
+                              fecha=date.today(), created_by=user.id))
+    db.session.commit()
+
+
+def test_metric_blocks_are_aggregated_in_sql(db, user):
+    _seed(db, user)
+
+    metrics = DashboardService().get_dashboard_metrics()
+
+    assert metrics['inventory'] == {
+        'total_products': 3,
+        'total_value': 210.0,
+        'low_stock_count': 2,
+        'out_of_stock': 1,
+        'categories': 1
+    }
+    assert metrics['sales']['total_orders'] == 2
+    assert metrics['sales']['draft_orders'] == 1
+    assert metrics['sales']['confirmed_orders'] == 1
+    assert metrics['sales']['month_sales'] == 40.0
+    assert metrics['sales']['pending_payment'] == 30.0
+    assert metrics['customers'] == {'total_customers': 1, 'active_customers': 1, 'new_customers': 1}
+
+
+def test_dashboard_stays_within_query_budget(app, db, user):
+    _seed(db, user)
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        response = client.get('/dashboard')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert response.status_code == 200
+    assert b'Martillo' in response.data
+    assert len(statements) <= DASHBOARD_QUERY_BUDGET, statements
+
+
+def test_metric_blocks_are_cached_until_a_commit_invalidates_them(db, user):
+    _seed(db, user)
+    service = DashboardService()
+    first = service.get_dashboard_metrics()
+
+    # Rows changed behind the session's back stay cached
+    db.session.execute(text("UPDATE customers SET is_active = 0"))
+    db.session.connection().exec_driver_sql("DELETE FROM sales_orders WHERE status = 'draft'")
+    cached = service.get_dashboard_metrics()
+    assert cached['customers']['active_customers'] == 1
+    assert cached['computed_at'] == first['computed_at']
+    db.session.rollback()
+
+    # An ORM commit on Product drops only the blocks that read products
+    product = Product.query.filter_by(codigo='D-3').one()
+    product.stock = 0
+    db.session.commit()
+    metrics = service.get_dashboard_metrics()
+
+    assert metrics['inventory']['out_of_stock'] == 2
+    assert metrics['sales'] == first['sales']
+
+
+def test_bulk_update_invalidates_and_refresh_recomputes(db, user):
+    _seed(db, user)
+    service = DashboardService()
+    service.get_dashboard_metrics()
+
+    db.session.execute(update(Customer).values(is_active=False))
+    db.session.commit()
+    assert service.get_dashboard_metrics()['customers']['active_customers'] == 0
+
+    db.session.execute(text("UPDATE sales_orders SET status = 'delivered'"))
+    db.session.commit()
+    assert service.get_dashboard_metrics()['sales']['delivered_orders'] == 0
+    assert service.get_dashboard_metrics(refresh=True)['sales']['delivered_orders'] == 2
@@ -0,0 +1,94 @@
+"""
+Integration tests for document numbering.
+"""
+import multiprocessing
+import threading
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app import create_app
+from app.extensions import db as _db
+from app.models import Customer, Product, SalesOrder
+from app.services import DocumentSequenceService, SalesOrderService
+from app.utils.exceptions import ValidationError
+
+WORKERS = 4
+NUMBERS_PER_WORKER = 15
+
+
+def _take_numbers(app, results, fail_every=0):
+    """Take numbers one transaction at a time, rolling back every fail_every-th."""
+    with app.app_context():
+        service = DocumentSequenceService()
+        for i in range(1, NUMBERS_PER_WORKER + 1):
+            value = service.next_value('FAC', '2026')
+            if fail_every and i % fail_every == 0:
+                _db.session.rollback()
+            else:
+                _db.session.commit()
+                results.append(value)
+        _db.session.remove()
+
+
+def _take_numbers_in_process(queue):
+    results = []
+    _take_numbers(create_app('testing'), results, fail_every=4)
+    queue.put(results)
+
+
+def test_numbers_are_unique_and_gapless_across_threads(file_app):
+    results = []
+    threads = [threading.Thread(target=_take_numbers, args=(file_app, results, 3)) for _ in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Rolled back numbers are handed out again
+    assert sorted(results) == list(range(1, len(results) + 1))
+    assert len(results) == WORKERS * (NUMBERS_PER_WORKER - NUMBERS_PER_WORKER // 3)
+
+
+def test_numbers_are_unique_and_gapless_across_processes(file_app):
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    processes = [context.Process(target=_take_numbers_in_process, args=(queue,)) for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    results = [value for _ in processes for value in queue.get(timeout=60)]
+    for process in processes:
+        process.join()
+
+    assert sorted(results) == list(range(1, len(results) + 1))
+
+
+def test_blocks_are_preallocated_and_counters_seeded(db):
+    service = DocumentSequenceService()
+
+    assert service.allocate_block('PO', count=10, seed=lambda: 41) == range(42, 52)
+    assert service.next_value('PO') == 52
+    assert service.next_value('PO', '2027') == 1
+    with pytest.raises(ValidationError):
+        service.reserve('PO', count=0)
+
+
+def test_sales_orders_continue_after_legacy_numbers(db, user):
+    customer = Customer(name='Cliente', created_by=user.id)
+    product = Product(codigo='V-1', descripcion='Pala', stock=5, precio_dolares=Decimal('3.00'))
+    db.session.add_all([customer, product])
+    db.session.flush()
+    prefix = f"SO-{datetime.now().strftime('%Y%m%d')}"
+    db.session.add(SalesOrder(order_number=f'{prefix}-0007', customer_id=customer.id, created_by=user.id))
+    db.session.commit()
+
+    service = SalesOrderService()
+    data = {'customer_id': customer.id, 'items': [{'product_id': product.id, 'quantity': 1}]}
+    first = service.create_sales_order(data, user.id)
+    with pytest.raises(ValidationError):
+        service.create_sales_order({'customer_id': customer.id, 'items': [{'product_id': 999, 'quantity': 1}]},
+                                   user.id)
+    second = service.create_sales_order(data, user.id)
+
+    assert (first.order_number, second.order_number) == (f'{prefix}-0008', f'{prefix}-0009')
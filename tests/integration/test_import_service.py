@@ -0,0 +1,88 @@
+"""
+Integration tests for the bulk product import pipeline.
+"""
+from datetime import datetime
+from decimal import Decimal
+
+import pandas as pd
+from sqlalchemy import event
+
+from app.models import Product, ItemGroup
+from app.services import ImportService
+
+
+def _product(db, codigo, **kwargs):
+    kwargs.setdefault('precio_dolares', Decimal('5.00'))
+    product = Product(codigo=codigo, descripcion=f'Producto {codigo}', **kwargs)
+    db.session.add(product)
+    return product
+
+
+def test_bulk_import_creates_updates_and_reports_errors(db, user):
+    electricidad = ItemGroup(name='Electricidad')
+    db.session.add(electricidad)
+    _product(db, 'E-SO-PO-01')
+    _product(db, 'A-BC-01', stock=3, item_group=electricidad)
+    _product(db, 'Z-ZZ-99', deleted_at=datetime.utcnow())
+    db.session.commit()
+
+    df = pd.DataFrame({
+        'Codigo': [None, None, 'a-bc-01', None, 'Z-ZZ-99', 'NEW-1', 'NEW-1', None, 'X-1'],
+        'Descripcion': ['Socates Porcelana', 'Socates Porcelana', 'Producto actualizado', ' ',
+                        'Eliminado', 'Nuevo', 'Nuevo v2', 'Sin categoria', 'Negativo'],
+        'Stock': [10, 4, 7, 1, 1, 2, 6, 'abc', -1],
+        'Precio': [2.5, None, 0, 1, 1, 3, None, 1, 1],
+        'Categoria': ['Electricidad', 'Electricidad', None, None, None, None, None, 'Inexistente', None],
+    })
+
+    results = ImportService()._process_dataframe(df, user.id)
+
+    assert results['created'] == 3
+    assert results['updated'] == 2
+    assert results['total_processed'] == 5
+    assert results['errors'] == [
+        "Fila 6: El código Z-ZZ-99 pertenece a un producto eliminado",
+        "Fila 9: Categoría 'Inexistente' no encontrada",
+        "Fila 10: El stock no puede ser negativo",
+    ]
+
+    generated = Product.query.filter(Product.codigo.like('E-SO-PO-%')).order_by(Product.codigo).all()
+    assert [(p.codigo, p.stock, p.precio_dolares) for p in generated] == [
+        ('E-SO-PO-01', 0, Decimal('5.00')),
+        ('E-SO-PO-02', 10, Decimal('2.50')),
+        ('E-SO-PO-03', 4, Decimal('1.00')),
+    ]
+    assert all(p.item_group_id == electricidad.id for p in generated[1:])
+
+    existing = Product.query.filter_by(codigo='A-BC-01').one()
+    assert existing.descripcion == 'Producto actualizado'
+    assert existing.stock == 7
+    assert existing.precio_dolares == Decimal('5.00')
+    assert existing.item_group_id == electricidad.id
+    assert existing.updated_by == user.id
+
+    repeated = Product.query.filter_by(codigo='NEW-1').one()
+    assert (repeated.descripcion, repeated.stock, repeated.precio_dolares) == ('Nuevo v2', 6, Decimal('3.00'))
+
+
+def test_bulk_import_writes_in_one_transaction(db, user):
+    rows = 1200
+    df = pd.DataFrame({
+        'Codigo': [f'C-{i:05d}' for i in range(rows)],
+        'Descripcion': [f'Producto {i}' for i in range(rows)],
+        'Stock': [i % 7 for i in range(rows)],
+    })
+
+    statements = []
+    engine = db.engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        results = ImportService()._process_dataframe(df, user.id)
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+
+    assert results['created'] == rows
+    assert results['errors'] == []
+    assert Product.query.count() == rows
+    assert len(statements) < 20
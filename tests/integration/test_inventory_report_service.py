@@ -0,0 +1,139 @@
+"""
+Integration tests for the set-based Art 177 inventory report engine.
+"""
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal
+
+from openpyxl import load_workbook
+
+from app.models import Product, Movement, ExchangeRate
+from app.services import InventoryReportService, ImportService
+from app.services.inventory_report_service import REPORT_COLUMNS
+
+
+def _product(db, codigo, precio='2.00', factor='1.00', **kwargs):
+    product = Product(codigo=codigo, descripcion=f'Producto {codigo}',
+                      precio_dolares=Decimal(precio), factor_ajuste=Decimal(factor), **kwargs)
+    db.session.add(product)
+    db.session.flush()
+    return product
+
+
+def _movement(db, product, tipo, cantidad, fecha, **kwargs):
+    db.session.add(Movement(producto_id=product.id, tipo=tipo, cantidad=cantidad,
+                            fecha=fecha, **kwargs))
+
+
+def test_report_aggregates_initial_entries_exits_and_final(db):
+    db.session.add(ExchangeRate(date=date(2026, 1, 1), rate=Decimal('10.00')))
+    a = _product(db, 'A-01', precio='2.00', factor='1.50')
+    b = _product(db, 'B-01', precio='1.00')
+    _product(db, 'C-01', deleted_at=datetime.utcnow())
+
+    _movement(db, a, 'ENTRADA', 10, date(2026, 1, 15))
+    _movement(db, a, 'salida', 3, date(2026, 1, 20))
+    _movement(db, a, 'entrada', 5, date(2026, 2, 1))
+    _movement(db, a, 'SALIDA', 2, date(2026, 2, 28))
+    _movement(db, a, 'ENTRADA', 100, date(2026, 3, 1))
+    _movement(db, a, 'ENTRADA', 50, date(2026, 2, 10), deleted_at=datetime.utcnow())
+    _movement(db, b, 'AJUSTE', 7, date(2026, 2, 5))
+    db.session.commit()
+
+    df = InventoryReportService().build_report(datetime(2026, 2, 1), datetime(2026, 2, 28))
+
+    assert list(df.columns) == REPORT_COLUMNS
+    assert list(df['Código']) == ['A-01', 'B-01']
+
+    row = df.iloc[0]
+    assert row['Existencia Inicial - Cantidad'] == 7
+    assert row['Entradas - Cantidad'] == 5
+    assert row['Salidas - Cantidad'] == 2
+    assert row['Inv.final - Cantidad'] == 10
+    assert row['Inv.final - Costo Unitario (Bs)'] == 30.0
+    assert row['Inv.final - Monto (Bs)'] == 300.0
+
+    # An AJUSTE in the period sets the final stock; the count shows as an entry
+    counted = df.iloc[1]
+    assert counted['Existencia Inicial - Cantidad'] == 0
+    assert counted['Entradas - Cantidad'] == 7
+    assert counted['Inv.final - Cantidad'] == 7
+
+
+def test_adjustment_before_the_period_sets_the_opening_balance(db):
+    from app.services import StockSnapshotService
+    a = _product(db, 'A-01')
+    _movement(db, a, 'ENTRADA', 10, date(2026, 1, 5))
+    _movement(db, a, 'AJUSTE', 8, date(2026, 1, 10))
+    _movement(db, a, 'SALIDA', 3, date(2026, 1, 20))
+    db.session.commit()
+    service = InventoryReportService()
+
+    replayed = service.build_report(date(2026, 2, 1), date(2026, 2, 28))
+    StockSnapshotService().close_day(date(2026, 1, 15))
+    from_snapshot = service.build_report(date(2026, 2, 1), date(2026, 2, 28))
+
+    assert replayed.iloc[0]['Existencia Inicial - Cantidad'] == 5
+    assert from_snapshot.equals(replayed)
+
+
+def test_consecutive_periods_chain_across_an_adjustment(db):
+    a = _product(db, 'A-01')
+    _movement(db, a, 'ENTRADA', 10, date(2026, 1, 5))
+    _movement(db, a, 'AJUSTE', 3, date(2026, 1, 20))
+    _movement(db, a, 'ENTRADA', 2, date(2026, 1, 25))
+    _movement(db, a, 'SALIDA', 1, date(2026, 2, 3))
+    db.session.commit()
+    service = InventoryReportService()
+
+    january = service.build_report(date(2026, 1, 1), date(2026, 1, 31)).iloc[0]
+    february = service.build_report(date(2026, 2, 1), date(2026, 2, 28)).iloc[0]
+
+    assert january['Inv.final - Cantidad'] == 5
+    assert (january['Entradas - Cantidad'], january['Salidas - Cantidad']) == (12, 7)
+    assert february['Existencia Inicial - Cantidad'] == january['Inv.final - Cantidad']
+    assert february['Inv.final - Cantidad'] == 4
+
+
+def test_report_without_products_keeps_columns(db):
+    df = InventoryReportService().build_report(date(2026, 2, 1), date(2026, 2, 28))
+
+    assert df.empty
+    assert list(df.columns) == REPORT_COLUMNS
+
+
+def test_import_service_delegates_to_report_engine(db):
+    _product(db, 'A-01')
+    db.session.commit()
+
+    df = ImportService().export_inventory_report(datetime(2026, 2, 1), datetime(2026, 2, 28))
+
+    assert list(df['Código']) == ['A-01']
+
+
+def test_streamed_exports_match_dataframe_report(db):
+    db.session.add(ExchangeRate(date=date(2026, 1, 1), rate=Decimal('10.00')))
+    a = _product(db, 'A-01', precio='2.00', factor='1.50')
+    _product(db, 'B-01', precio='1.00')
+    _movement(db, a, 'ENTRADA', 10, date(2026, 1, 15))
+    _movement(db, a, 'SALIDA', 2, date(2026, 2, 28))
+    db.session.commit()
+
+    service = InventoryReportService()
+    start, end = datetime(2026, 2, 1), datetime(2026, 2, 28)
+    expected = service.build_report(start, end).values.tolist()
+
+    output = io.BytesIO()
+    service.write_xlsx(start, end, output)
+    output.seek(0)
+    rows = list(load_workbook(output).active.iter_rows(values_only=True))
+    assert rows[0][0] == 'EMPRESA: INVERSIONES FERRE-EXITO, C.A'
+    assert list(rows[9]) == REPORT_COLUMNS
+    assert [list(row) for row in rows[10:]] == expected
+
+    text = ''.join(service.iter_csv(start, end, chunk_size=1))
+    records = list(csv.reader(io.StringIO(text.lstrip('\ufeff'))))
+    assert records[0] == REPORT_COLUMNS
+    assert [r[0] for r in records[1:]] == ['A-01', 'B-01']
+    assert records[1][REPORT_COLUMNS.index('Inv.final - Monto (Bs)')] == '240.0'
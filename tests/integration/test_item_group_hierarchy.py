@@ -0,0 +1,121 @@
+"""
+Integration tests for the item group closure table and product counts.
+"""
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.models import ItemGroup, Product
+from app.services import ItemGroupService
+from app.utils.exceptions import ValidationError
+
+
+@pytest.fixture
+def groups(db, user):
+    """Herramientas > Manuales > Llaves, and Pinturas."""
+    tools = ItemGroup(name='Herramientas')
+    db.session.add(tools)
+    db.session.flush()
+    hand = ItemGroup(name='Manuales', parent_id=tools.id)
+    paint = ItemGroup(name='Pinturas')
+    db.session.add_all([hand, paint])
+    db.session.flush()
+    wrenches = ItemGroup(name='Llaves', parent=hand)
+    db.session.add(wrenches)
+    db.session.commit()
+    return tools, hand, wrenches, paint
+
+
+def _product(codigo, group, **kwargs):
+    return Product(codigo=codigo, descripcion=codigo, precio_dolares=Decimal('1'), item_group_id=group.id, **kwargs)
+
+
+def _counts(db, groups):
+    for group in groups:
+        db.session.refresh(group)
+    return [group.product_count for group in groups]
+
+
+def test_product_counts_follow_products_between_groups(db, groups):
+    tools, hand, wrenches, paint = groups
+    db.session.add_all([_product('P-1', wrenches), _product('P-2', hand), _product('P-3', paint),
+                        _product('P-4', tools, deleted_at=datetime.utcnow())])
+    db.session.commit()
+    assert _counts(db, groups) == [2, 2, 1, 1]
+
+    moved = Product.query.filter_by(codigo='P-1').one()
+    moved.item_group_id = paint.id
+    Product.query.filter_by(codigo='P-2').one().deleted_at = datetime.utcnow()
+    db.session.commit()
+    assert _counts(db, groups) == [0, 0, 0, 2]
+
+    db.session.delete(moved)
+    Product.query.filter_by(codigo='P-4').one().deleted_at = None
+    db.session.commit()
+    assert _counts(db, groups) == [1, 0, 0, 1]
+
+
+def test_moving_a_subtree_updates_paths_and_counts(db, user, groups):
+    tools, hand, wrenches, paint = groups
+    db.session.add_all([_product('P-1', wrenches), _product('P-2', hand)])
+    db.session.commit()
+    service = ItemGroupService()
+
+    service.update_item_group(hand.id, {'parent_id': paint.id}, user.id)
+
+    assert _counts(db, groups) == [0, 2, 1, 2]
+    assert wrenches.get_full_path() == 'Pinturas > Manuales > Llaves'
+    assert [group.name for group in paint.get_all_children()] == ['Manuales', 'Llaves']
+    with pytest.raises(ValidationError):
+        service.update_item_group(paint.id, {'parent_id': wrenches.id}, user.id)
+    assert [group.name for group in service.get_parent_choices(hand.id)] == ['Herramientas', 'Pinturas']
+
+
+def test_group_tree_is_built_from_one_query(db, groups):
+    tools, hand, wrenches, paint = groups
+    db.session.add_all([_product('P-1', wrenches), _product('P-2', paint)])
+    db.session.commit()
+    db.session.expire_all()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        tree = ItemGroupService().get_group_tree()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert len(statements) == 1
+    assert [(node['name'], node['product_count']) for node in tree] == [('Herramientas', 1), ('Pinturas', 1)]
+    llaves = tree[0]['children'][0]['children'][0]
+    assert (llaves['full_path'], llaves['product_count']) == ('Herramientas > Manuales > Llaves', 1)
+
+
+def test_groups_are_serialized_from_one_query(db, groups):
+    db.session.expire_all()
+    loaded = ItemGroup.query.order_by(ItemGroup.id).all()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        data = ItemGroupService().serialize_groups(loaded)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert len(statements) == 1
+    assert [(item['parent_name'], item['full_path']) for item in data] == [
+        (None, 'Herramientas'),
+        ('Herramientas', 'Herramientas > Manuales'),
+        (None, 'Pinturas'),
+        ('Manuales', 'Herramientas > Manuales > Llaves'),
+    ]
+    assert data == [group.to_dict() for group in loaded]
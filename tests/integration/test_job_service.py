@@ -0,0 +1,117 @@
+"""
+Integration tests for background import and report export jobs.
+"""
+import io
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from openpyxl import load_workbook
+from werkzeug.datastructures import FileStorage
+
+from app.models import Product, BackgroundJob
+from app.services import JobService
+from app.services.inventory_report_service import REPORT_COLUMNS
+
+
+@pytest.fixture
+def job_dirs(app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    app.config['JOB_ARTIFACT_DIR'] = str(tmp_path / 'exports')
+    (tmp_path / 'uploads').mkdir()
+    return tmp_path
+
+
+def _upload(content, filename='productos.csv'):
+    return FileStorage(stream=io.BytesIO(content.encode('utf-8')), filename=filename)
+
+
+def test_import_job_runs_and_stores_results(db, user, job_dirs):
+    job = JobService().submit_import(
+        _upload('Codigo,Descripcion,Stock,Precio\nA-1,Martillo,5,2.5\nA-2,Clavos,-1,1\n'), user.id
+    )
+
+    assert job.status == BackgroundJob.STATUS_COMPLETED
+    assert job.progress == 100
+    assert job.result['created'] == 1
+    assert job.result['errors'] == ['Fila 3: El stock no puede ser negativo']
+    assert Product.query.filter_by(codigo='A-1').one().stock == 5
+    assert list((job_dirs / 'uploads').iterdir()) == []
+
+
+def test_failed_import_job_records_error(db, user, job_dirs):
+    job = JobService().submit_import(_upload('Codigo,Stock\nA-1,5\n'), user.id)
+
+    assert job.status == BackgroundJob.STATUS_FAILED
+    assert 'Descripción' in job.error_message
+    assert job.finished_at is not None
+
+
+def test_report_job_writes_downloadable_artifact(app, db, user, job_dirs):
+    db.session.add(Product(codigo='B-1', descripcion='Tornillo', precio_dolares=Decimal('1.00')))
+    db.session.commit()
+
+    job = JobService().submit_inventory_report(date(2026, 1, 1), date(2026, 1, 31), user.id)
+
+    assert job.status == BackgroundJob.STATUS_COMPLETED
+    assert job.has_artifact
+    assert job.artifact_name == 'inventario_diario_2026-01-01_2026-01-31.xlsx'
+    rows = list(load_workbook(job.artifact_path, read_only=True).active.values)
+    assert list(rows[9]) == REPORT_COLUMNS
+    assert rows[10][0] == 'B-1'
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+    status = client.get(f'/jobs/{job.id}').get_json()
+    assert status['status'] == 'COMPLETED'
+    assert status['download_url'] == f'/jobs/{job.id}/download'
+    assert client.get(status['download_url']).data[:2] == b'PK'
+
+
+def test_worker_claims_each_pending_job_once(app, db, user, job_dirs):
+    app.config['JOB_EXECUTOR'] = 'process'
+    service = JobService()
+    job = service.submit_inventory_report(date(2026, 1, 1), date(2026, 1, 31), user.id)
+    job_id = job.id
+    assert job.status == BackgroundJob.STATUS_PENDING
+
+    assert service.run_worker(once=True) == 1
+    assert not service.claim(job_id)
+    assert db.session.get(BackgroundJob, job_id).status == BackgroundJob.STATUS_COMPLETED
+    assert service.run_worker(once=True) == 0
+
+
+@pytest.mark.parametrize('executor, status', [
+    ('thread', BackgroundJob.STATUS_FAILED),
+    ('process', BackgroundJob.STATUS_RUNNING),
+])
+def test_thread_jobs_of_dead_workers_fail_when_polled(app, db, user, executor, status):
+    app.config['JOB_EXECUTOR'] = executor
+    stale = BackgroundJob(job_type=BackgroundJob.TYPE_INVENTORY_REPORT, params={}, created_by=user.id,
+                          status=BackgroundJob.STATUS_RUNNING,
+                          started_at=datetime.utcnow() - timedelta(hours=2))
+    recent = BackgroundJob(job_type=BackgroundJob.TYPE_INVENTORY_REPORT, params={}, created_by=user.id,
+                           status=BackgroundJob.STATUS_RUNNING, started_at=datetime.utcnow())
+    db.session.add_all([stale, recent])
+    db.session.commit()
+
+    # Only the run-jobs worker sweeps stale jobs of the process executor
+    assert JobService().get_job(stale.id).status == status
+    assert JobService().get_job(recent.id).status == BackgroundJob.STATUS_RUNNING
+
+
+@pytest.mark.parametrize('executor, status', [
+    ('thread', BackgroundJob.STATUS_FAILED),
+    ('process', BackgroundJob.STATUS_PENDING),
+])
+def test_thread_jobs_queued_in_dead_workers_fail_when_polled(app, db, user, executor, status):
+    app.config['JOB_EXECUTOR'] = executor
+    stale = BackgroundJob(job_type=BackgroundJob.TYPE_INVENTORY_REPORT, params={}, created_by=user.id,
+                          created_at=datetime.utcnow() - timedelta(hours=2))
+    recent = BackgroundJob(job_type=BackgroundJob.TYPE_INVENTORY_REPORT, params={}, created_by=user.id)
+    db.session.add_all([stale, recent])
+    db.session.commit()
+
+    # Pending jobs of the process executor wait for the run-jobs worker
+    assert JobService().get_job(stale.id).status == status
+    assert JobService().get_job(recent.id).status == BackgroundJob.STATUS_PENDING
@@ -0,0 +1,74 @@
+"""
+Integration tests for keyset (cursor) pagination in the repositories.
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models import Product, Movimiento
+from app.repositories import MovementRepository, ProductRepository
+from app.utils.exceptions import ValidationError
+
+
+@pytest.fixture
+def movements(db, user):
+    product = Product(codigo='M-1', descripcion='Martillo', precio_dolares=Decimal('1.00'))
+    db.session.add(product)
+    db.session.flush()
+    # Two dates with repeated values so the id tie-breaker matters
+    for day in (1, 1, 1, 2, 2, 2, 2):
+        db.session.add(Movimiento(producto_id=product.id, tipo='entrada', cantidad=1,
+                                  fecha=date(2026, 3, day), created_by=user.id))
+    db.session.commit()
+    return Movimiento.query.order_by(Movimiento.fecha.desc(), Movimiento.id.desc()).all()
+
+
+def _range(repo, cursor=None):
+    return repo.get_by_date_range(date(2026, 3, 1), date(2026, 3, 2), per_page=3,
+                                  cursor=cursor, keyset=True)
+
+
+def test_cursor_walks_forward_and_back(movements):
+    repo = MovementRepository()
+
+    first = _range(repo)
+    assert first.is_keyset and first.page == 1
+    assert not first.has_prev and first.has_next
+    assert first.total == 7
+
+    second = _range(repo, first.next_cursor)
+    third = _range(repo, second.next_cursor)
+    walked = first.items + second.items + third.items
+    assert [m.id for m in walked] == [m.id for m in movements]
+    assert third.page == 3 and not third.has_next
+
+    back = _range(repo, third.prev_cursor)
+    assert [m.id for m in back.items] == [m.id for m in second.items]
+    assert back.page == 2
+    assert _range(repo, back.prev_cursor).prev_cursor is None
+
+
+def test_offset_pagination_is_unchanged(movements):
+    result = MovementRepository().get_by_date_range(date(2026, 3, 1), date(2026, 3, 2), page=2, per_page=3)
+
+    assert not result.is_keyset
+    assert result.total == 7 and result.pages == 3
+    assert len(result.items) == 3
+
+
+def test_product_search_keyset_orders_by_codigo(db):
+    for codigo in ('C-3', 'C-1', 'C-2'):
+        db.session.add(Product(codigo=codigo, descripcion='Clavo', precio_dolares=Decimal('1.00')))
+    db.session.commit()
+    repo = ProductRepository()
+
+    first = repo.search_products('clavo', per_page=2, keyset=True)
+    second = repo.search_products('clavo', per_page=2, cursor=first.next_cursor)
+
+    assert [p.codigo for p in first.items + second.items] == ['C-1', 'C-2', 'C-3']
+
+
+def test_invalid_cursor_is_rejected(movements):
+    with pytest.raises(ValidationError):
+        _range(MovementRepository(), 'no-es-un-cursor')
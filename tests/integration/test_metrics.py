@@ -0,0 +1,85 @@
+"""
+Integration tests for the Prometheus metrics endpoint.
+"""
+import os
+import subprocess
+import sys
+import textwrap
+
+from prometheus_client.parser import text_string_to_metric_families
+
+
+def _samples(response):
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.get_data(as_text=True))
+        for sample in family.samples
+    }
+
+
+def _value(samples, name, **labels):
+    return samples.get((name, tuple(sorted(labels.items()))), 0.0)
+
+
+def test_requests_are_measured_per_endpoint(app, user):
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+    before = _samples(client.get('/metrics'))
+
+    assert client.get('/products/').status_code == 200
+    after = _samples(client.get('/metrics'))
+
+    requests = ('http_requests_total', {'endpoint': 'products.index', 'method': 'GET', 'status': '200'})
+    assert _value(after, requests[0], **requests[1]) == _value(before, requests[0], **requests[1]) + 1
+    assert _value(after, 'http_request_duration_seconds_count', endpoint='products.index', method='GET') >= 1
+    assert _value(after, 'http_request_db_queries_sum', endpoint='products.index') > \
+        _value(before, 'http_request_db_queries_sum', endpoint='products.index')
+    assert _value(after, 'http_requests_in_progress', endpoint='products.index') == 0
+    # The scrape endpoint does not measure itself
+    assert not any(labels and ('endpoint', 'metrics') in labels for _, labels in after)
+
+
+def test_cache_lookups_are_counted_by_result(app, user):
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+    before = _samples(client.get('/metrics'))
+
+    client.get('/dashboard')
+    client.get('/dashboard')
+    after = _samples(client.get('/metrics'))
+
+    labels = {'cache': 'DashboardService._inventory_block', 'endpoint': 'main.dashboard'}
+    assert _value(after, 'cache_lookups_total', result='miss', **labels) > \
+        _value(before, 'cache_lookups_total', result='miss', **labels)
+    assert _value(after, 'cache_lookups_total', result='hit', **labels) > \
+        _value(before, 'cache_lookups_total', result='hit', **labels)
+
+
+WORKER = textwrap.dedent('''
+    from app import create_app
+    app = create_app('testing')
+    client = app.test_client()
+    for _ in range(3):
+        client.get('/login')
+    if {scrape}:
+        print(client.get('/metrics').get_data(as_text=True))
+''')
+
+
+def test_samples_are_aggregated_across_worker_processes(tmp_path):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    def worker(scrape):
+        return subprocess.run([sys.executable, '-c', WORKER.format(scrape=scrape)], env=env, cwd=root,
+                              capture_output=True, text=True, check=True).stdout
+
+    worker(False)
+    output = worker(True)
+
+    samples = {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(output)
+        for sample in family.samples
+    }
+    assert _value(samples, 'http_requests_total', endpoint='main.login', method='GET', status='200') == 6
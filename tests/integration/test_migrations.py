@@ -0,0 +1,69 @@
+"""
+Integration tests for the Alembic migrations on SQLite.
+"""
+import logging.config
+import os
+from decimal import Decimal
+
+import pytest
+from flask_migrate import downgrade, stamp, upgrade
+from sqlalchemy import text
+
+from app import create_app
+from app.config import TestingConfig
+from app.extensions import db
+from app.models import Product
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'migrations')
+FTS_TRIGGERS = {
+    'products_fts_insert', 'products_fts_update', 'products_fts_delete', 'products_fts_category_rename'
+}
+
+
+@pytest.fixture
+def migrated_app(tmp_path, monkeypatch):
+    """
+    Application on a SQLite file at revision 0f5723c68fcb.
+
+    The first migrations expect the legacy tables, so the schema is built
+    at head and the later migrations are downgraded.
+    """
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'migrated.db'}")
+    # env.py's fileConfig would disable the app loggers for the tests that follow
+    monkeypatch.setattr(logging.config, 'fileConfig', lambda *args, **kwargs: None)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        stamp(MIGRATIONS_DIR, revision='head')
+        downgrade(MIGRATIONS_DIR, revision='0f5723c68fcb')
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _triggers():
+    return set(db.session.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+    ).scalars())
+
+
+def test_upgrade_to_head_keeps_the_fts_triggers(migrated_app):
+    upgrade(MIGRATIONS_DIR, revision='head')
+
+    assert FTS_TRIGGERS <= _triggers()
+    product = Product(codigo='T-1', descripcion='Taladro percutor', precio_dolares=Decimal('10'))
+    db.session.add(product)
+    db.session.flush()
+    assert db.session.execute(text(
+        "SELECT rowid FROM products_fts WHERE products_fts MATCH 'taladro'"
+    )).scalars().all() == [product.id]
+    db.session.rollback()
+
+
+def test_reservations_downgrade_keeps_the_fts_triggers(migrated_app):
+    upgrade(MIGRATIONS_DIR, revision='head')
+    downgrade(MIGRATIONS_DIR, revision='d41f7b2c8e05')
+
+    assert FTS_TRIGGERS <= _triggers()
+    columns = [row[1] for row in db.session.execute(text('PRAGMA table_info(products)'))]
+    assert 'reserved' not in columns
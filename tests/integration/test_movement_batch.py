@@ -0,0 +1,86 @@
+"""
+Integration tests for batch movement registration.
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.models import Product, Movimiento
+from app.services import MovementService
+from app.utils.exceptions import BusinessLogicError, NotFoundError, ValidationError
+
+
+@pytest.fixture
+def products(db):
+    items = [
+        Product(codigo='L-1', descripcion='Cemento', stock=10, precio_dolares=Decimal('8.00')),
+        Product(codigo='L-2', descripcion='Cabilla', stock=2, precio_dolares=Decimal('5.00')),
+    ]
+    db.session.add_all(items)
+    db.session.commit()
+    return items
+
+
+def test_batch_nets_deltas_per_product_in_one_transaction(db, user, products):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        movements = MovementService().create_movements_batch([
+            {'codigo': 'L-1', 'tipo': 'ENTRADA', 'cantidad': 5},
+            {'producto_id': products[1].id, 'tipo': 'ENTRADA', 'cantidad': 3},
+            {'codigo': 'L-1', 'tipo': 'SALIDA', 'cantidad': 12},
+            {'codigo': 'L-2', 'tipo': 'SALIDA', 'cantidad': 4, 'descripcion': 'Obra'},
+        ], user.id, fecha=date(2026, 2, 1), descripcion='Factura 123')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert [m.cantidad for m in movements] == [5, 3, 12, 4]
+    assert [m.descripcion for m in movements] == ['Factura 123'] * 3 + ['Obra']
+    assert {m.fecha for m in movements} == {date(2026, 2, 1)}
+    assert [db.session.get(Product, p.id).stock for p in products] == [3, 1]
+    # One insert for every movement
+    assert sum(s.lstrip().upper().startswith('INSERT INTO MOVIMIENTOS') for s in statements) == 1
+
+
+def test_batch_rolls_back_entirely_when_one_product_runs_short(db, user, products):
+    with pytest.raises(BusinessLogicError, match='L-2'):
+        MovementService().create_movements_batch([
+            {'codigo': 'L-1', 'tipo': 'SALIDA', 'cantidad': 1},
+            {'codigo': 'L-2', 'tipo': 'SALIDA', 'cantidad': 3},
+        ], user.id)
+
+    assert Movimiento.query.count() == 0
+    assert [db.session.get(Product, p.id).stock for p in products] == [10, 2]
+
+
+def test_batch_reports_every_invalid_line_and_unknown_products(db, user, products):
+    with pytest.raises(ValidationError) as error:
+        MovementService().create_movements_batch([
+            {'codigo': 'L-1', 'tipo': 'ENTRADA', 'cantidad': 0},
+            {'codigo': 'L-1', 'tipo': 'ENTRADA', 'cantidad': 1},
+            {'codigo': 'L-2', 'tipo': 'REGALO', 'cantidad': 1},
+        ], user.id)
+    assert 'Línea 1' in error.value.message and 'Línea 3' in error.value.message
+
+    with pytest.raises(NotFoundError):
+        MovementService().create_movements_batch([{'codigo': 'NO-1', 'tipo': 'ENTRADA', 'cantidad': 1}], user.id)
+
+
+def test_batch_endpoint_accepts_json(app, db, user, products):
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+
+    response = client.post('/movements/batch', json={
+        'fecha': '2026-02-01',
+        'lineas': [{'codigo': 'L-1', 'tipo': 'AJUSTE', 'cantidad': 7},
+                   {'codigo': 'L-1', 'tipo': 'SALIDA', 'cantidad': 2}]
+    })
+    assert response.status_code == 201
+    assert response.get_json()['created'] == 2
+    assert db.session.get(Product, products[0].id).stock == 5
+
+    response = client.post('/movements/batch', json={'lineas': [{'codigo': 'L-2', 'tipo': 'SALIDA', 'cantidad': 9}]})
+    assert response.status_code == 422
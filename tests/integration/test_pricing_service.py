@@ -0,0 +1,165 @@
+"""
+Integration tests for the exchange rate cache and price calculator.
+"""
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from sqlalchemy import event, select, text
+
+from app.models import AuditLog, ExchangeRate, ItemGroup, Product
+from app.services import PricingService
+from app.services.pricing_service import DEFAULT_EXCHANGE_RATE
+from app.utils.exceptions import NotFoundError, ValidationError
+from app.utils.service_cache import invalidate_tags
+
+
+def _statements(db):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    return statements, lambda: event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def test_current_rate_is_served_from_memory_until_a_rate_is_saved(db, user):
+    service = PricingService()
+    assert service.get_current_rate() == DEFAULT_EXCHANGE_RATE
+    assert service.get_rate_for_date(date(2026, 3, 1)) == DEFAULT_EXCHANGE_RATE
+
+    service.set_rate(40.0, user.id, rate_date=date(2026, 3, 1))
+    assert service.get_current_rate() == 40.0
+
+    statements, stop = _statements(db)
+    try:
+        for _ in range(5):
+            service.get_current_rate()
+    finally:
+        stop()
+    assert statements == []
+
+    # Writes that bypass the ORM are only seen after the cache expires
+    db.session.execute(text("UPDATE exchange_rates SET rate = 41"))
+    db.session.commit()
+    assert service.get_current_rate() == 40.0
+
+    # ...or when a commit elsewhere replaces the shared ExchangeRate tag version
+    invalidate_tags(['ExchangeRate'])
+    assert service.get_current_rate() == 41.0
+
+    service.set_rate(42.5, user.id, rate_date=date(2026, 3, 1))
+    assert service.get_current_rate() == 42.5
+    assert ExchangeRate.query.count() == 1
+
+
+def test_rate_history_by_date(db, user):
+    for day, rate in ((1, '10.00'), (5, '12.00'), (9, '15.00')):
+        db.session.add(ExchangeRate(date=date(2026, 1, day), rate=Decimal(rate)))
+    db.session.commit()
+    service = PricingService()
+
+    assert service.get_rate_for_date(date(2026, 1, 4)) == 10.0
+    assert service.get_rate_for_date(date(2026, 1, 5)) == 12.0
+    assert service.get_rate_for_date(date(2026, 2, 1)) == 15.0
+    # Before the first rate: valued at the earliest one, not today's
+    assert service.get_rate_for_date(date(2025, 12, 31)) == 10.0
+    assert service.get_rate_history(date(2026, 1, 5), date(2026, 1, 9)) == [
+        (date(2026, 1, 5), 12.0), (date(2026, 1, 9), 15.0)
+    ]
+
+
+def test_prices_are_computed_for_the_whole_list_at_once(db):
+    prices = PricingService.calculate_prices(
+        np.array([2.5, 10.0, np.nan]), np.array([1.0, 1.25, np.nan]), rate=40.0
+    )
+
+    assert prices['precio_dolares'].tolist() == [2.5, 10.0, 0.0]
+    assert prices['precio_bs'].tolist() == [100.0, 400.0, 0.0]
+    assert prices['precio_final_bs'].tolist() == [100.0, 500.0, 0.0]
+
+    products = [
+        Product(codigo='P-1', descripcion='Llave', precio_dolares=Decimal('1.20'), factor_ajuste=Decimal('1.10')),
+        Product(codigo='P-2', descripcion='Lija', precio_dolares=Decimal('0.05'), factor_ajuste=Decimal('2.00')),
+    ]
+    assert PricingService().price_products(products, rate=36.5) == [
+        {'precio_dolares': 1.2, 'precio_bs': 43.8, 'precio_final_bs': 48.18},
+        {'precio_dolares': 0.05, 'precio_bs': 1.83, 'precio_final_bs': 3.65},
+    ]
+
+
+def _catalogue(db):
+    tools = ItemGroup(name='Herramientas')
+    db.session.add(tools)
+    db.session.flush()
+    hand = ItemGroup(name='Manuales', parent_id=tools.id)
+    paint = ItemGroup(name='Pinturas')
+    db.session.add_all([hand, paint])
+    db.session.flush()
+    products = [
+        Product(codigo='F-1', descripcion='Taladro', precio_dolares=Decimal('50'), item_group_id=tools.id),
+        Product(codigo='F-2', descripcion='Alicate', precio_dolares=Decimal('5'), item_group_id=hand.id,
+                factor_ajuste=Decimal('1.10')),
+        Product(codigo='F-3', descripcion='Esmalte', precio_dolares=Decimal('8'), item_group_id=paint.id),
+    ]
+    db.session.add_all(products)
+    db.session.commit()
+    return tools, products
+
+
+def _factors(db):
+    return dict(db.session.execute(select(Product.codigo, Product.factor_ajuste)).all())
+
+
+def test_apply_factor_to_a_category_subtree_in_one_update(db, user):
+    tools, _ = _catalogue(db)
+    statements, stop = _statements(db)
+    try:
+        updated = PricingService().apply_factor(1.3, user.id, 'category', category_id=tools.id)
+    finally:
+        stop()
+
+    assert updated == 2
+    assert _factors(db) == {'F-1': Decimal('1.30'), 'F-2': Decimal('1.30'), 'F-3': Decimal('1.00')}
+    assert sum(statement.lstrip().upper().startswith('UPDATE') for statement in statements) == 1
+
+    audit = AuditLog.query.one()
+    assert (audit.action, audit.entity_type, audit.entity_id) == ('BULK_UPDATE', 'Product', tools.id)
+    assert audit.old_values == {'factor_ajuste': {'1.00': 1, '1.10': 1}}
+    assert audit.new_values['updated'] == 2
+
+
+def test_apply_factor_to_all_and_to_explicit_ids(db, user):
+    _, products = _catalogue(db)
+    service = PricingService()
+
+    assert service.apply_factor(1.5, user.id, 'products', product_ids=[products[2].id]) == 1
+    assert service.apply_factor(2, user.id) == 3
+    assert set(_factors(db).values()) == {Decimal('2.00')}
+    assert AuditLog.query.count() == 2
+
+    with pytest.raises(ValidationError):
+        service.apply_factor(0, user.id)
+    with pytest.raises(NotFoundError):
+        service.apply_factor(1.2, user.id, 'category', category_id=999)
+
+
+def test_apply_factor_route_reads_only_the_chosen_scope(app, db, user):
+    tools, products = _catalogue(db)
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+
+    # The category select keeps its value after switching to the product picker
+    client.post('/pricing/apply-factor', data={
+        'factor': '1.5', 'apply_to': 'product',
+        'category_id': str(products[0].id), 'product_id': str(products[1].id),
+    })
+    assert _factors(db) == {'F-1': Decimal('1.00'), 'F-2': Decimal('1.50'), 'F-3': Decimal('1.00')}
+
+    client.post('/pricing/apply-factor', data={
+        'factor': '1.2', 'apply_to': 'category',
+        'category_id': str(tools.id), 'product_id': str(products[2].id),
+    })
+    assert _factors(db) == {'F-1': Decimal('1.20'), 'F-2': Decimal('1.20'), 'F-3': Decimal('1.00')}
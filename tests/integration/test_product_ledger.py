@@ -0,0 +1,80 @@
+"""
+Integration tests for the paginated product movement ledger.
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models import Product, Movement
+from app.services import MovementService, StockSnapshotService
+
+
+@pytest.fixture
+def product(db, user):
+    product = Product(codigo='T-1', descripcion='Tornillo', precio_dolares=Decimal('0.10'))
+    db.session.add(product)
+    db.session.flush()
+    for day, tipo, cantidad in ((5, 'ENTRADA', 100), (10, 'SALIDA', 30), (20, 'ENTRADA', 50),
+                                (20, 'SALIDA', 5), (25, 'AJUSTE', 112), (28, 'SALIDA', 15)):
+        db.session.add(Movement(producto_id=product.id, tipo=tipo, cantidad=cantidad,
+                                fecha=date(2026, 1, day), created_by=user.id))
+    db.session.commit()
+    return product
+
+
+def test_ledger_pages_newest_first_with_running_balance(product):
+    ledger, opening, _, _ = MovementService().get_product_ledger(
+        product.id, date(2026, 1, 1), date(2026, 1, 31), per_page=4
+    )
+
+    assert opening == 0
+    assert ledger.total == 6 and ledger.pages == 2
+    # The AJUSTE sets the balance to the counted stock
+    assert [(m.fecha.day, saldo) for m, saldo in ledger.items] == [(28, 97), (25, 112), (20, 115), (20, 120)]
+
+    second, _, _, _ = MovementService().get_product_ledger(
+        product.id, date(2026, 1, 1), date(2026, 1, 31), page=2, per_page=4
+    )
+    assert [saldo for _, saldo in second.items] == [70, 100]
+
+
+def test_ledger_opens_from_snapshot_and_earlier_movements(db, product):
+    StockSnapshotService().close_day(date(2026, 1, 8))
+
+    ledger, opening, _, _ = MovementService().get_product_ledger(
+        product.id, date(2026, 1, 15), date(2026, 1, 26)
+    )
+
+    assert opening == 70
+    assert [saldo for _, saldo in ledger.items] == [112, 115, 120]
+
+
+@pytest.mark.parametrize('snapshot_day', [None, 22, 26])
+def test_opening_balance_restarts_at_adjustments(db, product, snapshot_day):
+    if snapshot_day:
+        StockSnapshotService().close_day(date(2026, 1, snapshot_day))
+
+    ledger, opening, _, _ = MovementService().get_product_ledger(
+        product.id, date(2026, 1, 27), date(2026, 1, 31)
+    )
+
+    assert opening == 112
+    assert [saldo for _, saldo in ledger.items] == [97]
+
+
+def test_history_filters_dates_in_sql(product):
+    movements = MovementService().get_movement_history(product.id, date(2026, 1, 10), date(2026, 1, 20))
+
+    assert sorted(m.cantidad for m in movements) == [5, 30, 50]
+
+
+def test_history_page_renders_ledger(app, product):
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+
+    response = client.get(f'/movements/history/{product.id}?start_date=2026-01-01&end_date=2026-01-31')
+
+    assert response.status_code == 200
+    assert b'Saldo inicial' in response.data
+    assert client.get(f'/products/{product.id}').status_code == 200
@@ -0,0 +1,64 @@
+"""
+Integration tests for the product full-text search index.
+"""
+from decimal import Decimal
+
+import pytest
+
+from app.models import Product, ItemGroup
+from app.repositories import ProductRepository
+
+
+@pytest.fixture
+def catalogue(db):
+    plomeria = ItemGroup(name='Plomería')
+    db.session.add(plomeria)
+    db.session.flush()
+    for codigo, descripcion, item_group in [
+        ('P-TU-PV-01', 'Tubería PVC 1/2', plomeria),
+        ('P-CO-PV-01', 'Codo PVC para tubería', plomeria),
+        ('E-SO-PO-01', 'Socates Porcelana', None),
+    ]:
+        db.session.add(Product(codigo=codigo, descripcion=descripcion,
+                               precio_dolares=Decimal('1.00'), item_group=item_group))
+    db.session.commit()
+    return plomeria
+
+
+def _codes(result):
+    return [product.codigo for product in result.items]
+
+
+def test_search_folds_accents_and_case_with_prefixes(db, catalogue):
+    repo = ProductRepository()
+    assert repo.has_search_index()
+
+    assert sorted(_codes(repo.search_products('TUBERIA'))) == ['P-CO-PV-01', 'P-TU-PV-01']
+    assert _codes(repo.search_products('tu')) == ['P-TU-PV-01', 'P-CO-PV-01']
+    assert _codes(repo.search_products('porce')) == ['E-SO-PO-01']
+    assert _codes(repo.search_products('plomeria codo')) == ['P-CO-PV-01']
+    assert _codes(repo.search_products('p-tu', {'search_by': 'codigo'})) == ['P-TU-PV-01']
+    assert repo.search_products('tuberia', page=2, per_page=1).total == 2
+
+
+def test_index_follows_product_and_category_changes(db, catalogue):
+    repo = ProductRepository()
+    product = Product.query.filter_by(codigo='E-SO-PO-01').one()
+    product.descripcion = 'Bombillo LED'
+    product.item_group = catalogue
+    catalogue.name = 'Fontanería'
+    db.session.commit()
+
+    assert _codes(repo.search_products('socates')) == []
+    assert _codes(repo.search_products('bombillo fontaneria')) == ['E-SO-PO-01']
+
+    db.session.delete(product)
+    db.session.commit()
+    assert _codes(repo.search_products('bombillo')) == []
+    assert repo.rebuild_search_index() == 2
+
+
+def test_build_match_expression_drops_operators():
+    assert ProductRepository.build_match_expression('tubo "OR" -') == '"tubo"* "OR"*'
+    assert ProductRepository.build_match_expression('a-bc', 'codigo') == '{codigo} : ("a bc"*)'
+    assert ProductRepository.build_match_expression('*') is None
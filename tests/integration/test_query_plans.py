@@ -0,0 +1,93 @@
+"""
+EXPLAIN QUERY PLAN checks: the hot list and dashboard queries are answered
+from the partial indexes over non-deleted rows instead of full table scans.
+"""
+import re
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from app.models import Product
+from app.repositories import ProductRepository, SalesOrderRepository, CustomerRepository
+from app.services import DashboardService
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?! USING)')
+
+
+def _plans(db, run):
+    """Run a callable and return the query plan of every SELECT it issued."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        run()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+    connection = db.session.connection().connection
+    return [
+        (statement, [row[3] for row in connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)])
+        for statement, parameters in statements
+    ]
+
+
+def _full_scans(plans, tables):
+    return [
+        (detail, statement) for statement, details in plans for detail in details
+        if FULL_SCAN.match(detail) and FULL_SCAN.match(detail).group(1) in tables
+    ]
+
+
+def _uses(plans, index):
+    return any(index in detail for _, details in plans for detail in details)
+
+
+def test_dashboard_alerts_and_activity_use_partial_indexes(db, user):
+    # Few products at their reorder point; ANALYZE (run by the migration)
+    # tells the planner how small idx_product_reorder is
+    db.session.execute(insert(Product), [
+        {'codigo': f'Q-{i:03d}', 'descripcion': f'Producto {i}', 'precio_dolares': Decimal('1'),
+         'stock': 5 if i % 20 == 0 else 100, 'reorder_point': 10}
+        for i in range(200)
+    ])
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+    service = DashboardService()
+    plans = _plans(db, lambda: (service._get_alerts(), service._get_recent_activity()))
+
+    assert _full_scans(plans, {'products', 'sales_orders', 'movimientos'}) == []
+    for index in ('idx_product_reorder', 'idx_product_active_stock',
+                  'idx_sales_order_active_created', 'idx_movement_active_created'):
+        assert _uses(plans, index), index
+
+
+def test_product_lists_use_partial_indexes(db):
+    repo = ProductRepository()
+    plans = _plans(db, lambda: (
+        repo.get_low_stock_products(threshold=5),
+        repo.search_products('', filters={'item_group_id': 1}, keyset=True),
+    ))
+
+    assert _full_scans(plans, {'products'}) == []
+    assert _uses(plans, 'idx_product_active_stock')
+    assert _uses(plans, 'idx_product_active_group_codigo')
+
+
+@pytest.mark.parametrize('run, index', [
+    (lambda: SalesOrderRepository().get_by_status('confirmed'), 'idx_sales_order_active_status_date'),
+    (lambda: SalesOrderRepository().get_by_customer(1), 'idx_sales_order_active_customer_date'),
+    (lambda: SalesOrderRepository().get_by_date_range(date(2026, 1, 1), date(2026, 1, 31)),
+     'idx_sales_order_active_date'),
+    (lambda: CustomerRepository().get_active_customers(), 'idx_customer_active_name'),
+])
+def test_order_and_customer_lists_use_partial_indexes(db, run, index):
+    plans = _plans(db, run)
+
+    assert _full_scans(plans, {'sales_orders', 'customers'}) == []
+    assert _uses(plans, index)
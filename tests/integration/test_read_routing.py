@@ -0,0 +1,92 @@
+"""
+Integration tests for routing read-only queries to the replica bind.
+"""
+import shutil
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app import create_app
+from app.extensions import db, read_only, REPLICA_BIND_KEY
+from app.models import Product, User
+from app.repositories import ProductRepository
+
+
+@pytest.fixture
+def replica_app(tmp_path, monkeypatch):
+    """
+    Application whose replica is a copy of the primary database taken after
+    seeding, so rows written later only exist on the primary.
+    """
+    from app.config import TestingConfig
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{primary}')
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_REPLICA_URI', f'sqlite:///{replica}')
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        user = User(username='tester', email='tester@example.com', role='admin')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.add(Product(codigo='R-1', descripcion='Martillo', precio_dolares=Decimal('5')))
+        db.session.commit()
+        db.session.remove()
+        db.engines[None].dispose()
+        shutil.copy(primary, replica)
+
+        db.session.add(Product(codigo='R-2', descripcion='Martillo nuevo', precio_dolares=Decimal('6')))
+        db.session.commit()
+        # As at the start of a new request
+        db.session.remove()
+        yield app
+        db.session.remove()
+    # The bind's (empty) metadata is kept on the shared extension
+    db.metadatas.pop(REPLICA_BIND_KEY, None)
+
+
+def _codes(result):
+    return [product.codigo for product in result.items]
+
+
+def test_searches_read_from_the_replica(replica_app):
+    assert _codes(ProductRepository().search_products('Martillo')) == ['R-1']
+    # Queries outside read_only() stay on the primary
+    assert Product.query.count() == 2
+
+
+def test_session_sticks_to_the_primary_after_a_write(replica_app):
+    with read_only():
+        assert Product.query.count() == 1
+
+    db.session.add(Product(codigo='R-3', descripcion='Martillo de goma', precio_dolares=Decimal('7')))
+    db.session.commit()
+
+    assert _codes(ProductRepository().search_products('Martillo')) == ['R-1', 'R-2', 'R-3']
+
+    db.session.remove()
+    assert _codes(ProductRepository().search_products('Martillo')) == ['R-1']
+
+
+def test_raw_sql_writes_also_stick_to_the_primary(replica_app):
+    db.session.execute(text("UPDATE products SET descripcion = 'Mazo' WHERE codigo = 'R-1'"))
+    db.session.commit()
+
+    with read_only():
+        assert db.session.execute(text('SELECT count(*) FROM products')).scalar() == 2
+        assert Product.query.filter_by(descripcion='Mazo').count() == 1
+
+
+def test_replica_connections_cannot_write(replica_app):
+    with db.engines[REPLICA_BIND_KEY].connect() as connection:
+        with pytest.raises(Exception, match='readonly'):
+            connection.execute(text("DELETE FROM products"))
+
+
+def test_without_a_replica_read_only_uses_the_primary(db, user):
+    db.session.add(Product(codigo='P-1', descripcion='Clavo', precio_dolares=Decimal('1')))
+    db.session.commit()
+    db.session.remove()
+
+    assert REPLICA_BIND_KEY not in db.engines
+    assert _codes(ProductRepository().search_products('Clavo')) == ['P-1']
@@ -0,0 +1,54 @@
+"""
+Integration tests for the per-request SQL statistics of the request logger.
+"""
+import logging
+
+from app.models import Product
+
+
+def _login(app):
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+    return client
+
+
+def test_query_count_and_time_are_sent_as_headers(app, user):
+    client = _login(app)
+
+    response = client.get('/products/')
+
+    assert response.status_code == 200
+    assert int(response.headers['X-DB-Queries']) > 0
+    assert response.headers['X-DB-Time'].endswith('ms')
+    assert response.headers['X-Request-ID']
+
+
+def test_repeated_statements_are_logged_as_n_plus_one(app, db, user, caplog):
+    app.config['N_PLUS_ONE_THRESHOLD'] = 3
+
+    @app.route('/_test/n-plus-one')
+    def n_plus_one():
+        for product_id in range(1, 6):
+            db.session.get(Product, product_id)
+        return 'ok'
+
+    with caplog.at_level(logging.WARNING, logger='app.middleware.request_logger'):
+        response = app.test_client().get('/_test/n-plus-one')
+
+    assert response.headers['X-DB-Queries'] == '5'
+    warnings = [record for record in caplog.records if 'Possible N+1' in record.getMessage()]
+    assert len(warnings) == 1
+    assert warnings[0].repeated == 5
+    assert warnings[0].request_id == response.headers['X-Request-ID']
+
+
+def test_slow_statements_are_logged_with_the_request_id(app, user, caplog):
+    client = _login(app)
+    app.config['SLOW_QUERY_MS'] = 0
+
+    with caplog.at_level(logging.WARNING, logger='app.middleware.request_logger'):
+        response = client.get('/products/')
+
+    slow = [record for record in caplog.records if record.getMessage().startswith('Slow query')]
+    assert slow
+    assert {record.request_id for record in slow} == {response.headers['X-Request-ID']}
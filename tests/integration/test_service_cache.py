@@ -0,0 +1,105 @@
+"""
+Integration tests for cached service results and their tag invalidation.
+"""
+from datetime import date
+from decimal import Decimal
+
+from prometheus_client import REGISTRY
+from sqlalchemy import event
+
+from app.models import ItemGroup, Product, Supplier
+from app.services import DashboardService, ItemGroupService, SupplierService
+
+
+def _statements(db, run):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        result = run()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return result, statements
+
+
+def _lookups(name, result):
+    return sum(
+        sample.value for metric in REGISTRY.collect() for sample in metric.samples
+        if sample.name == 'cache_lookups_total'
+        and sample.labels['cache'] == name and sample.labels['result'] == result
+    )
+
+
+def test_groups_are_cached_until_a_group_is_written(db):
+    service = ItemGroupService()
+    db.session.add(ItemGroup(name='Herramientas'))
+    db.session.commit()
+    name = 'ItemGroupService.get_all_groups'
+    hits, misses = _lookups(name, 'hit'), _lookups(name, 'miss')
+
+    assert [group.name for group in service.get_all_groups()] == ['Herramientas']
+    groups, statements = _statements(db, service.get_all_groups)
+    assert [group.name for group in groups] == ['Herramientas']
+    assert statements == []
+    assert _lookups(name, 'hit') == hits + 1
+    assert _lookups(name, 'miss') == misses + 1
+
+    db.session.add(ItemGroup(name='Pinturas'))
+    db.session.commit()
+    assert sorted(group.name for group in service.get_all_groups()) == ['Herramientas', 'Pinturas']
+
+
+def test_product_counts_written_by_the_hierarchy_invalidate_groups(db):
+    service = ItemGroupService()
+    group = ItemGroup(name='Herramientas')
+    db.session.add(group)
+    db.session.commit()
+    assert service.get_all_groups()[0].product_count == 0
+
+    db.session.add(Product(codigo='H-1', descripcion='Martillo', precio_dolares=Decimal('5'),
+                           item_group_id=group.id))
+    db.session.commit()
+    db.session.expire_all()
+
+    assert service.get_all_groups()[0].product_count == 1
+
+
+def test_cached_instances_are_attached_to_the_current_session(db):
+    db.session.add(Supplier(nombre='Ferrecentro'))
+    db.session.commit()
+    SupplierService().get_all_suppliers()
+    db.session.remove()
+
+    suppliers, statements = _statements(db, SupplierService().get_all_suppliers)
+
+    assert statements == []
+    assert all(supplier in db.session for supplier in suppliers)
+    assert [supplier.nombre for supplier in suppliers] == ['Ferrecentro']
+
+
+def test_empty_results_are_cached_and_rollbacks_keep_entries(db):
+    service = ItemGroupService()
+    assert service.get_all_groups() == []
+    _, statements = _statements(db, service.get_all_groups)
+    assert statements == []
+
+    db.session.add(ItemGroup(name='Herramientas'))
+    db.session.flush()
+    db.session.rollback()
+    assert _statements(db, service.get_all_groups) == ([], [])
+
+    db.session.add(ItemGroup(name='Pinturas'))
+    db.session.commit()
+    assert [group.name for group in service.get_all_groups()] == ['Pinturas']
+
+
+def test_top_products_are_cached_per_argument(db):
+    service = DashboardService()
+    assert service.get_top_products(limit=5) == []
+
+    assert _statements(db, lambda: service.get_top_products(limit=5)) == ([], [])
+    _, statements = _statements(db, lambda: service.get_top_products(limit=3))
+    assert statements
@@ -0,0 +1,54 @@
+"""
+Integration tests for the SQLite performance profile and pool settings.
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from app.extensions import db
+from app.utils.sqlite_profile import sqlite_pragmas
+
+
+def _pragma(connection, name):
+    return connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+
+
+def test_file_database_connections_use_the_profile(file_app):
+    with db.engine.connect() as connection:
+        assert _pragma(connection, 'journal_mode') == 'wal'
+        assert _pragma(connection, 'synchronous') == 1  # NORMAL
+        assert _pragma(connection, 'busy_timeout') == file_app.config['SQLITE_BUSY_TIMEOUT_MS']
+        assert _pragma(connection, 'cache_size') == -file_app.config['SQLITE_CACHE_SIZE_KB']
+        assert _pragma(connection, 'temp_store') == 2  # MEMORY
+        assert _pragma(connection, 'foreign_keys') == 1
+        assert _pragma(connection, 'mmap_size') == file_app.config['SQLITE_MMAP_SIZE']
+
+    assert isinstance(db.engine.pool, QueuePool)
+    assert db.engine.pool.size() == file_app.config['DB_POOL_SIZE']
+
+
+def test_writes_commit_while_a_read_is_open(file_app):
+    with db.engine.connect() as reader, db.engine.connect() as writer:
+        reader.exec_driver_sql('BEGIN')
+        assert reader.execute(text('SELECT email FROM users')).scalar() == 'tester@example.com'
+
+        # In rollback journal mode the commit waits for the reader and fails
+        writer.exec_driver_sql('PRAGMA busy_timeout = 100')
+        writer.execute(text("UPDATE users SET email = 'new@example.com'"))
+        writer.commit()
+
+        # The open read keeps its snapshot
+        assert reader.execute(text('SELECT email FROM users')).scalar() == 'tester@example.com'
+        reader.rollback()
+        assert reader.execute(text('SELECT email FROM users')).scalar() == 'new@example.com'
+
+
+def test_in_memory_database_keeps_its_single_connection(app):
+    assert 'pool_size' not in app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    with db.engine.connect() as connection:
+        assert _pragma(connection, 'foreign_keys') == 1
+
+
+def test_invalid_modes_are_rejected():
+    with pytest.raises(ValueError, match='SQLITE_SYNCHRONOUS'):
+        sqlite_pragmas({'SQLITE_SYNCHRONOUS': 'fast'})
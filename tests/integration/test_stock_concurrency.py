@@ -0,0 +1,124 @@
+"""
+Concurrency tests for in-database stock updates.
+
+These run against a SQLite file (file_app) so every thread and process
+gets its own connection.
+"""
+import multiprocessing
+import threading
+from decimal import Decimal
+
+import pytest
+
+from app import create_app
+from app.extensions import db as _db
+from app.models import User, Product, Movimiento, Customer, SalesOrder, SalesOrderItem
+from app.services import MovementService, SalesOrderService
+from app.utils.exceptions import BusinessLogicError
+
+WORKERS = 4
+MOVEMENTS_PER_WORKER = 10
+
+
+@pytest.fixture(autouse=True)
+def product(file_app):
+    """A 20 unit product."""
+    _db.session.add(Product(codigo='S-1', descripcion='Tornillo', stock=20, precio_dolares=Decimal('0.10')))
+    _db.session.commit()
+
+
+def _move(app, tipo, results):
+    """Register MOVEMENTS_PER_WORKER single-unit movements of one type."""
+    with app.app_context():
+        product_id = Product.query.filter_by(codigo='S-1').one().id
+        user_id = User.query.filter_by(username='tester').one().id
+        for _ in range(MOVEMENTS_PER_WORKER):
+            try:
+                MovementService().create_movement(
+                    {'producto_id': product_id, 'tipo': tipo, 'cantidad': 1}, user_id
+                )
+                results.append(tipo)
+            except BusinessLogicError:
+                results.append('rejected')
+        _db.session.remove()
+
+
+def _move_in_process(tipo, queue):
+    """Process entry point: a fresh app on the same database file."""
+    results = []
+    _move(create_app('testing'), tipo, results)
+    queue.put(results)
+
+
+def _stock_and_movements():
+    product = Product.query.filter_by(codigo='S-1').one()
+    _db.session.refresh(product)
+    return product.stock, Movimiento.query.count()
+
+
+def test_concurrent_threads_do_not_drift_or_oversell(file_app):
+    results = []
+    tipos = ['SALIDA'] * WORKERS + ['ENTRADA'] * WORKERS
+    threads = [threading.Thread(target=_move, args=(file_app, tipo, results)) for tipo in tipos]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    entradas, salidas = results.count('ENTRADA'), results.count('SALIDA')
+    assert entradas == WORKERS * MOVEMENTS_PER_WORKER
+    assert entradas + salidas + results.count('rejected') == len(tipos) * MOVEMENTS_PER_WORKER
+    assert _stock_and_movements() == (20 + entradas - salidas, entradas + salidas)
+
+
+def test_concurrent_processes_do_not_drift_or_oversell(file_app):
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    processes = [context.Process(target=_move_in_process, args=('SALIDA', queue)) for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    results = [tipo for _ in processes for tipo in queue.get(timeout=60)]
+    for process in processes:
+        process.join()
+
+    # 40 requested units against 20 in stock: exactly 20 go through
+    assert results.count('SALIDA') == 20
+    assert _stock_and_movements() == (0, 20)
+
+
+def test_order_confirmed_twice_reserves_stock_once(file_app):
+    with file_app.app_context():
+        product = Product.query.filter_by(codigo='S-1').one()
+        user = User.query.filter_by(username='tester').one()
+        customer = Customer(name='Cliente', created_by=user.id)
+        _db.session.add(customer)
+        _db.session.flush()
+        order = SalesOrder(order_number='SO-1', customer_id=customer.id, created_by=user.id)
+        order.items.append(SalesOrderItem(product_id=product.id, quantity=5,
+                                          unit_price=Decimal('0.10'), total_price=Decimal('0.50')))
+        _db.session.add(order)
+        _db.session.commit()
+        order_id, user_id = order.id, user.id
+
+    outcomes = []
+
+    def confirm():
+        with file_app.app_context():
+            try:
+                SalesOrderService().confirm_order(order_id, user_id)
+                outcomes.append('confirmed')
+            except BusinessLogicError:
+                outcomes.append('rejected')
+            _db.session.remove()
+
+    threads = [threading.Thread(target=confirm) for _ in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count('confirmed') == 1
+    product = Product.query.filter_by(codigo='S-1').one()
+    _db.session.refresh(product)
+    # Confirmation reserves the units; on-hand stock drops when the order ships
+    assert (product.stock, product.reserved) == (20, 5)
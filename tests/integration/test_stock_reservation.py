@@ -0,0 +1,126 @@
+"""
+Integration tests for stock reservations held by sales orders.
+"""
+from decimal import Decimal
+
+import pytest
+
+from app.models import Product, Customer, SalesOrder, SalesOrderItem, StockReservation
+from app.services import MovementService, SalesOrderService, StockReservationService
+from app.utils.exceptions import BusinessLogicError
+
+
+@pytest.fixture
+def products(db, user):
+    items = [
+        Product(codigo='R-1', descripcion='Tubo PVC', stock=10, precio_dolares=Decimal('3.00')),
+        Product(codigo='R-2', descripcion='Codo PVC', stock=4, precio_dolares=Decimal('0.50')),
+    ]
+    db.session.add_all(items)
+    db.session.commit()
+    return items
+
+
+def _order(db, user, lines, number='SO-R'):
+    customer = Customer(name=f'Cliente {number}', created_by=user.id)
+    db.session.add(customer)
+    db.session.flush()
+    order = SalesOrder(order_number=number, customer_id=customer.id, created_by=user.id)
+    for product, quantity in lines:
+        order.items.append(SalesOrderItem(product_id=product.id, quantity=quantity,
+                                          unit_price=product.precio_dolares,
+                                          total_price=product.precio_dolares * quantity))
+    db.session.add(order)
+    db.session.commit()
+    return order
+
+
+def _stock(db, product):
+    db.session.refresh(product)
+    return product.stock, product.reserved
+
+
+def test_confirm_reserves_every_line_and_cancel_releases(db, user, products):
+    tubo, codo = products
+    order = _order(db, user, [(tubo, 3), (codo, 1), (tubo, 2)])
+    service = SalesOrderService()
+
+    service.confirm_order(order.id, user.id)
+
+    assert _stock(db, tubo) == (10, 5)
+    assert _stock(db, codo) == (4, 1)
+    assert StockReservationService().get_available([tubo.id, codo.id]) == {tubo.id: 5, codo.id: 3}
+    reservations = StockReservation.query.filter_by(sales_order_id=order.id).all()
+    assert sorted((r.product_id, r.quantity, r.status) for r in reservations) == [
+        (tubo.id, 5, 'ACTIVE'), (codo.id, 1, 'ACTIVE')
+    ]
+
+    service.cancel_order(order.id, user.id)
+
+    assert _stock(db, tubo) == (10, 0)
+    assert _stock(db, codo) == (4, 0)
+    assert {r.status for r in StockReservation.query.filter_by(sales_order_id=order.id)} == {'RELEASED'}
+
+
+def test_confirm_is_all_or_nothing_against_available_stock(db, user, products):
+    tubo, codo = products
+    first = _order(db, user, [(codo, 3)], number='SO-R1')
+    second = _order(db, user, [(tubo, 2), (codo, 2)], number='SO-R2')
+    service = SalesOrderService()
+    service.confirm_order(first.id, user.id)
+
+    with pytest.raises(BusinessLogicError, match='Disponible: 1'):
+        service.confirm_order(second.id, user.id)
+
+    assert _stock(db, tubo) == (10, 0)
+    assert _stock(db, codo) == (4, 3)
+    db.session.refresh(second)
+    assert second.status == 'draft'
+    assert StockReservation.query.filter_by(sales_order_id=second.id).count() == 0
+
+
+def test_counter_sales_cannot_take_reserved_units(db, user, products):
+    tubo, _ = products
+    order = _order(db, user, [(tubo, 8)])
+    SalesOrderService().confirm_order(order.id, user.id)
+    movements = MovementService()
+
+    with pytest.raises(BusinessLogicError, match='reservado: 8'):
+        movements.create_movement({'producto_id': tubo.id, 'tipo': 'SALIDA', 'cantidad': 3}, user.id)
+    movements.create_movement({'producto_id': tubo.id, 'tipo': 'SALIDA', 'cantidad': 2}, user.id)
+
+    assert _stock(db, tubo) == (8, 8)
+
+
+def test_adjustments_cannot_count_below_reserved_units(db, user, products):
+    tubo, codo = products
+    order = _order(db, user, [(tubo, 6)])
+    SalesOrderService().confirm_order(order.id, user.id)
+    movements = MovementService()
+
+    with pytest.raises(BusinessLogicError, match='reservado: 6'):
+        movements.create_movement({'producto_id': tubo.id, 'tipo': 'AJUSTE', 'cantidad': 5}, user.id)
+    with pytest.raises(BusinessLogicError, match='reservado: 6'):
+        movements.create_movements_batch([
+            {'producto_id': tubo.id, 'tipo': 'AJUSTE', 'cantidad': 7},
+            {'producto_id': tubo.id, 'tipo': 'SALIDA', 'cantidad': 2},
+        ], user.id)
+    assert _stock(db, tubo) == (10, 6)
+
+    movements.create_movement({'producto_id': tubo.id, 'tipo': 'AJUSTE', 'cantidad': 6}, user.id)
+    assert _stock(db, tubo) == (6, 6)
+
+
+def test_shipping_turns_reservations_into_stock_deductions(db, user, products):
+    tubo, codo = products
+    order = _order(db, user, [(tubo, 4), (codo, 4)])
+    service = SalesOrderService()
+    service.update_order_status(order.id, 'confirmed', user.id)
+    assert _stock(db, codo) == (4, 4)
+
+    service.update_order_status(order.id, 'shipped', user.id)
+    service.update_order_status(order.id, 'delivered', user.id)
+
+    assert _stock(db, tubo) == (6, 0)
+    assert _stock(db, codo) == (0, 0)
+    assert {r.status for r in StockReservation.query.filter_by(sales_order_id=order.id)} == {'FULFILLED'}
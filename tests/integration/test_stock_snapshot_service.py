@@ -0,0 +1,105 @@
+"""
+Integration tests for the daily stock snapshot ledger.
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models import Product, Movement, StockSnapshot, CierreDia
+from app.services import StockSnapshotService, InventoryReportService
+from app.utils.exceptions import BusinessLogicError
+
+
+@pytest.fixture
+def product(db):
+    product = Product(codigo='A-01', descripcion='Producto A', precio_dolares=Decimal('2.00'))
+    db.session.add(product)
+    db.session.flush()
+    for tipo, cantidad, fecha in [
+        ('ENTRADA', 10, date(2026, 1, 10)),
+        ('SALIDA', 4, date(2026, 1, 20)),
+        ('ENTRADA', 6, date(2026, 2, 5)),
+        ('SALIDA', 1, date(2026, 2, 15)),
+    ]:
+        db.session.add(Movement(producto_id=product.id, tipo=tipo, cantidad=cantidad, fecha=fecha))
+    db.session.commit()
+    return product
+
+
+def test_close_day_builds_on_previous_snapshot(db, product):
+    service = StockSnapshotService()
+
+    service.close_day(date(2026, 1, 31))
+    service.close_day(date(2026, 2, 10))
+
+    snapshots = {s.fecha: s for s in StockSnapshot.query.all()}
+    assert snapshots[date(2026, 1, 31)].closing_qty == 6
+    assert snapshots[date(2026, 2, 10)].closing_qty == 12
+    assert float(snapshots[date(2026, 2, 10)].closing_value) == 24.0
+    assert CierreDia.query.count() == 2
+
+    with pytest.raises(BusinessLogicError):
+        service.close_day(date(2026, 2, 10))
+
+
+def test_report_opening_balance_matches_full_replay(db, product):
+    report_service = InventoryReportService()
+    expected = report_service.build_report(date(2026, 2, 11), date(2026, 2, 28))
+
+    StockSnapshotService().close_day(date(2026, 2, 10))
+    assert report_service.build_report(date(2026, 2, 11), date(2026, 2, 28)).equals(expected)
+    assert expected.iloc[0]['Existencia Inicial - Cantidad'] == 12
+    assert expected.iloc[0]['Inv.final - Cantidad'] == 11
+
+
+def test_rebuild_and_invalidate(db, product):
+    service = StockSnapshotService()
+
+    result = service.rebuild(date(2026, 1, 1), date(2026, 1, 31))
+    assert result == {'days': 31, 'snapshots': 31}
+    last = StockSnapshot.query.filter_by(fecha=date(2026, 1, 31)).one()
+    assert last.closing_qty == 6
+
+    assert service.invalidate_from(date(2026, 1, 25)) == 7
+    assert service.get_latest_snapshot_date(date(2026, 2, 1)) == date(2026, 1, 24)
+    assert not service.is_closed(date(2026, 1, 25)) and service.is_closed(date(2026, 1, 24))
+    # The caller commits: a rolled back movement keeps the snapshots
+    db.session.rollback()
+    assert service.get_latest_snapshot_date(date(2026, 2, 1)) == date(2026, 1, 31)
+
+
+def test_backdated_movement_invalidates_in_its_own_transaction(db, product, monkeypatch):
+    from app.services import MovementService
+    StockSnapshotService().rebuild(date(2026, 1, 1), date(2026, 1, 31))
+    commits = []
+    commit = db.session.commit
+
+    def counting_commit():
+        commits.append(StockSnapshot.query.filter(StockSnapshot.fecha >= date(2026, 1, 25)).count())
+        commit()
+
+    monkeypatch.setattr(db.session, 'commit', counting_commit)
+
+    MovementService().create_movement(
+        {'producto_id': product.id, 'tipo': 'ENTRADA', 'cantidad': 2, 'fecha': date(2026, 1, 25)}, None
+    )
+
+    # Deleted before the one commit that saves the movement
+    assert commits == [0]
+    assert StockSnapshotService().get_latest_snapshot_date(date(2026, 2, 1)) == date(2026, 1, 24)
+
+
+def test_backdated_movement_reopens_closed_days(db, product):
+    from app.services import MovementService
+    service = StockSnapshotService()
+    service.close_day(date(2026, 1, 31))
+
+    MovementService().create_movement(
+        {'producto_id': product.id, 'tipo': 'ENTRADA', 'cantidad': 2, 'fecha': date(2026, 1, 25)}, None
+    )
+    assert not service.is_closed(date(2026, 1, 31))
+
+    service.close_day(date(2026, 1, 31))
+    assert StockSnapshot.query.filter_by(fecha=date(2026, 1, 31)).one().closing_qty == 8
+    assert CierreDia.query.count() == 1